@@ -720,4 +720,38 @@ class CompanyInfo:
             if self.processWindow:
 
                 self.processWindow.closeWindow()
-                self.processWindow = None
\ No newline at end of file
+                self.processWindow = None
+
+    def getCompanyNames(self, prefix: str, contractLevels: list[int] | None = None, limit: int | None = None) -> list | None:
+
+        """ Get company names starting with the prefix (typeahead). Called off the UI thread, so no dialog is shown. """
+
+        try:
+
+            requestJson = {
+                "Token": self.token,
+                "Prefix": prefix,
+                "ContractLevels": contractLevels,
+                "Limit": limit
+            }
+
+            response = requestToServer("GET", f"{self.domain}/typeahead", requestJson)
+
+            if response is None or response.status_code != 200:
+
+                self.Logger.Error(f"Failed to get company names. Status code: {None if response is None else response.status_code}")
+                return None
+
+            retDict = response.json()
+
+            if retDict.get("ErrorInfo", {}).get("Error", False):
+
+                self.Logger.Error(f"Error in get company names response: {retDict.get('ErrorInfo', {}).get('Message', '')}")
+                return None
+
+            return retDict.get("Companies", [])
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to get company names from server.")
+            return None
\ No newline at end of file
@@ -2,6 +2,7 @@ import maplex
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 import os
+import threading
 
 import DataAccess
 import PJ_Mobius_Dialog
@@ -34,6 +35,7 @@ class AddUserForm(ttk.Frame):
 
         self.userAccessLevel = os.getenv("PJ_MOBIUS_ACCESS")
         self.companyList = {}
+        self.companyQueryJob = None
 
         # Generate form
 
@@ -62,10 +64,9 @@ class AddUserForm(ttk.Frame):
             self.combo_accessLevel.current(0)
             self.userStatus.set("active")
 
-            if self.userAccessLevel == "super" and len(self.companyList) > 0:
+            if self.userAccessLevel == "super":
 
                 self.company.set("")
-                self.combo_company.current(0)
 
             self.Logger.Info("Add User form cleared.")
 
@@ -114,10 +115,9 @@ class AddUserForm(ttk.Frame):
 
         if self.userAccessLevel == "super" and self.accessLevel.get() != "Super":
 
-            if not self.company.get():
+            if self.company.get() not in self.companyList:
 
                 PJ_Mobius_Dialog.Dialog("Error", "Company must be selected for non-Super users.").showDialog()
-                self.combo_company.current(0)
                 self.combo_company.focus_set()
                 return False
 
@@ -214,7 +214,56 @@ class AddUserForm(ttk.Frame):
 
             # Enable company selection for non-Super users
 
-            self.combo_company.configure(state="readonly")
+            self.combo_company.configure(state="normal")
+            self.queryCompanies()
+
+    def companyTyped(self, event):
+
+        # Ask the server once typing pauses
+
+        if event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+
+            return
+
+        if self.companyQueryJob is not None:
+
+            self.after_cancel(self.companyQueryJob)
+
+        self.companyQueryJob = self.after(250, self.queryCompanies)
+
+    def queryCompanies(self):
+
+        # Look the typed prefix up without blocking the form
+
+        self.companyQueryJob = None
+        prefix = self.company.get().strip()
+
+        def worker():
+
+            companyList = DataAccess.CompanyInfo().getCompanyNames(prefix, contractLevels=[5, 4])
+
+            try:
+
+                self.after(0, lambda: self.showCompanies(prefix, companyList))
+
+            except Exception:
+
+                # The form was closed meanwhile
+
+                pass
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def showCompanies(self, prefix: str, companyList: list | None):
+
+        if companyList is None or prefix != self.company.get().strip():
+
+            # Failed, or the text changed while the request was running
+
+            return
+
+        self.companyList = {company.get("CompanyName", "N/A"): company.get("CompanyID", None) for company in companyList}
+        self.combo_company['values'] = list(self.companyList)
 
     def generateForm(self):
 
@@ -310,40 +359,14 @@ class AddUserForm(ttk.Frame):
 
             if self.userAccessLevel == "super":
 
-                # Get company list from database
-
-                companyList = []
-                company5List = DataAccess.CompanyInfo().getCompanyInfo(contractLevel=5)
-                company4List = DataAccess.CompanyInfo().getCompanyInfo(contractLevel=4)
-
-                if company5List is not None:
-
-                    companyList.extend(company5List)
-
-                if company4List is not None:
-
-                    companyList.extend(company4List)
-
-                # Create company dictionary
-
-                self.companyList = {company.get("CompanyName", "N/A"): company.get("CompanyID", None) for company in companyList}
-
                 lbl_company = ttk.Label(form_f, text="Company", width=15, anchor=W)
                 lbl_company.grid(row=8, column=0, padx=(10, 5), pady=(5, 5))
                 
-                # Add company names to combobox
+                # Company names are looked up on the server as the user types (contract level 5 and 4 companies)
                 # Disable by default; enabled when access level is changed to non-Super
 
                 self.combo_company = ttk.Combobox(form_f, width=28, state="disabled", textvariable=self.company)
-                companyNames = [company.get("CompanyName", "N/A") for company in companyList]
-                self.combo_company['values'] = companyNames
-
-                # Avoid index error if company list is empty
-
-                if len(companyNames) > 0:
-
-                    self.combo_company.current(0)
-
+                self.combo_company.bind("<KeyRelease>", self.companyTyped)
                 self.combo_company.grid(row=8, column=1, padx=(5, 10), pady=(5, 5))
 
             # Fix the width of the grid columns
@@ -1,10 +1,17 @@
+import contextlib
 import maplex
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
 
+import AsyncTableAdapters
 import BaseModelData as BMD
 import Company
 import initSuperUser
+import ReferenceData
 import Session
+import TableAdapters
+import Tools
 import User
 
 ############################################
@@ -12,15 +19,224 @@ import User
 
 Logger = maplex.Logger("AppEndPoint")
 
+############################################
+# Worker startup and shutdown
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+
+    # Startup
+
+    Session.sessionTouchBuffer.start()
+
+    if Session.signedTokens:
+
+        await run_in_threadpool(Session.sessionRevocationList.start)
+
+    await run_in_threadpool(ReferenceData.referenceData.start)
+
+    yield
+
+    # Shutdown
+
+    Session.sessionRevocationList.stop()
+    await run_in_threadpool(ReferenceData.referenceData.stop)
+    await run_in_threadpool(Session.sessionTouchBuffer.stop)
+
+    if Tools.HashExecutor.instance is not None:
+
+        await run_in_threadpool(Tools.HashExecutor.instance.shutdown)
+
 ############################################
 # Initialize FastAPI instance
 # and set SSL
 
 Logger.Info("Initializing FastAPI.")
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 Logger.Info("FastAPI initialized.")
 v1Root = "/api/v1"
 
+# DB driver: "sync" runs handlers in the threadpool, "async" runs them on the event loop
+
+useAsyncDriver = Tools.readConfigValue("DB_DRIVER", "sync") == "async"
+Logger.Info(f"Database driver: {'async' if useAsyncDriver else 'sync'}")
+
+############################################
+# Request scoped unit of work
+
+class UnitOfWork:
+
+    ''' One connection and one transaction shared by every adapter in a request '''
+
+    def __init__(self):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger("UnitOfWork")
+
+        # The connection is checked out on first use
+
+        self.pooledConnection = None
+        self.completed = False
+
+    @property
+    def connection(self):
+
+        if self.pooledConnection is None:
+
+            self.pooledConnection = TableAdapters.SyncConnection(TableAdapters.ConnectionPool.getInstance().checkout())
+
+        return self.pooledConnection
+
+    def complete(self, errorInfo: BMD.errorInfo):
+
+        ''' Commit the request transaction, or roll it back if the request failed '''
+
+        if errorInfo.Error:
+
+            self.rollback()
+            return
+
+        if self.pooledConnection is not None:
+
+            self.pooledConnection.commit()
+            self.Logger.Debug("Request transaction committed.")
+
+        self.completed = True
+
+    def rollback(self):
+
+        if self.pooledConnection is not None:
+
+            try:
+
+                self.pooledConnection.rollback()
+                self.Logger.Debug("Request transaction rolled back.")
+
+            except Exception as e:
+
+                self.Logger.ShowError(e, "Failed to roll back request transaction.")
+
+        self.completed = True
+
+    def close(self):
+
+        if self.pooledConnection is None:
+
+            return
+
+        if not self.completed:
+
+            self.Logger.Debug("Request finished without completing its transaction.")
+            self.rollback()
+
+        # Check in also rolls back anything left open
+
+        TableAdapters.ConnectionPool.getInstance().checkin(self.pooledConnection.connection)
+        self.pooledConnection = None
+
+class AsyncUnitOfWork:
+
+    ''' One asyncio connection and one transaction shared by every adapter in a request '''
+
+    def __init__(self):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger("AsyncUnitOfWork")
+
+        # The connection is checked out on first use
+
+        self.pooledConnection = None
+        self.completed = False
+
+    async def getConnection(self):
+
+        if self.pooledConnection is None:
+
+            self.pooledConnection = AsyncTableAdapters.AsyncConnection(await (await AsyncTableAdapters.AsyncConnectionPool.getInstance()).checkout())
+
+        return self.pooledConnection
+
+    async def complete(self, errorInfo: BMD.errorInfo):
+
+        ''' Commit the request transaction, or roll it back if the request failed '''
+
+        if errorInfo.Error:
+
+            await self.rollback()
+            return
+
+        if self.pooledConnection is not None:
+
+            await self.pooledConnection.commit()
+            self.Logger.Debug("Request transaction committed.")
+
+        self.completed = True
+
+    async def rollback(self):
+
+        if self.pooledConnection is not None:
+
+            try:
+
+                await self.pooledConnection.rollback()
+                self.Logger.Debug("Request transaction rolled back.")
+
+            except Exception as e:
+
+                self.Logger.ShowError(e, "Failed to roll back request transaction.")
+
+        self.completed = True
+
+    async def close(self):
+
+        if self.pooledConnection is None:
+
+            return
+
+        if not self.completed:
+
+            self.Logger.Debug("Request finished without completing its transaction.")
+            await self.rollback()
+
+        # Check in also rolls back anything left open
+
+        await (await AsyncTableAdapters.AsyncConnectionPool.getInstance()).checkin(self.pooledConnection.connection)
+        self.pooledConnection = None
+
+def getUnitOfWork():
+
+    unitOfWork = UnitOfWork()
+
+    try:
+
+        yield unitOfWork
+
+    finally:
+
+        unitOfWork.close()
+
+async def getDriverUnitOfWork():
+
+    # Unit of work matching the configured DB driver
+
+    unitOfWork = AsyncUnitOfWork() if useAsyncDriver else UnitOfWork()
+
+    try:
+
+        yield unitOfWork
+
+    finally:
+
+        if useAsyncDriver:
+
+            await unitOfWork.close()
+
+        elif unitOfWork.pooledConnection is not None:
+
+            await run_in_threadpool(unitOfWork.close)
+
 ############################################
 # Main methods
 ############################################
@@ -63,8 +279,7 @@ def initSuperReceived(item: BMD.InitSuperUserItem):
 #################################
 # Login
 
-@app.get(f"{v1Root}/login", response_model=BMD.LoginRequestResponse)
-def getLogin(item: BMD.LoginRequestItem):
+def getLoginSync(item: BMD.LoginRequestItem, unitOfWork: UnitOfWork, address: str | None = None):
 
     Logger.Info(f"Login request received: {item.UserName}")
     retItem = BMD.LoginRequestResponse()
@@ -75,18 +290,29 @@ def getLogin(item: BMD.LoginRequestItem):
         retItem.LoginResult.Message = "Empty item."
         return retItem
 
+    # Reject throttled attempts before any hashing or database work
+
+    throttleMessage = User.loginThrottle.check(item.UserName, address)
+
+    if throttleMessage is not None:
+
+        retItem.LoginResult.Message = throttleMessage
+        return retItem
+
     try:
 
-        userLogin = User.UserLogin(item.UserName, item.Password)
+        userLogin = User.UserLogin(item.UserName, item.Password, unitOfWork.connection)
         retItemDict = userLogin.Login()
 
         retItem.LoginResult = BMD.loginResult(**retItemDict["LoginResult"])
         retItem.SessionInfo = BMD.sessionInfo(**retItemDict["SessionInfo"])
         retItem.ErrorInfo = BMD.errorInfo(**retItemDict["ErrorInfo"])
+        unitOfWork.complete(retItem.ErrorInfo)
 
     except Exception as e:
 
         Logger.ShowError(e, "Failed to login.")
+        unitOfWork.rollback()
         retItem.ErrorInfo.Error = True
         retItem.ErrorInfo.Message = f"{e}"
 
@@ -98,8 +324,86 @@ def getLogin(item: BMD.LoginRequestItem):
 
     return retItem
 
+@app.get(f"{v1Root}/login", response_model=BMD.LoginRequestResponse)
+async def getLogin(item: BMD.LoginRequestItem, request: Request, unitOfWork = Depends(getDriverUnitOfWork)):
+
+    address = request.client.host if request.client else None
+
+    if not useAsyncDriver:
+
+        return await run_in_threadpool(getLoginSync, item, unitOfWork, address)
+
+    Logger.Info(f"Login request received: {item.UserName}")
+    retItem = BMD.LoginRequestResponse()
+
+    if "" in {item.UserName, item.Password}:
+
+        Logger.Warn(f"UserName or Password, or both are blank: [UserName: {item.UserName}, Password: {item.Password}]")
+        retItem.LoginResult.Message = "Empty item."
+        return retItem
+
+    # Reject throttled attempts before any hashing or database work
+
+    throttleMessage = User.loginThrottle.check(item.UserName, address)
+
+    if throttleMessage is not None:
+
+        retItem.LoginResult.Message = throttleMessage
+        return retItem
+
+    try:
+
+        userLogin = await User.AsyncUserLogin.create(item.UserName, item.Password, await unitOfWork.getConnection())
+        retItemDict = await userLogin.Login()
+
+        retItem.LoginResult = BMD.loginResult(**retItemDict["LoginResult"])
+        retItem.SessionInfo = BMD.sessionInfo(**retItemDict["SessionInfo"])
+        retItem.ErrorInfo = BMD.errorInfo(**retItemDict["ErrorInfo"])
+        await unitOfWork.complete(retItem.ErrorInfo)
+
+    except Exception as e:
+
+        Logger.ShowError(e, "Failed to login.")
+        await unitOfWork.rollback()
+        retItem.ErrorInfo.Error = True
+        retItem.ErrorInfo.Message = f"{e}"
+
+    finally:
+
+        if 'userLogin' in locals():
+
+            await userLogin.close()
+
+    return retItem
+
+def patchSessionSync(item: BMD.UpdateSessionTimeRequestItem, unitOfWork: UnitOfWork):
+
+    # Update session time
+    # Also used to log out (set update time to 00:00:00)
+
+    Logger.Info(f"Session update request received: {item.model_dump()}")
+    retItem = BMD.UpdateSessionRequestResponse()
+
+    try:
+
+        retItem.Update = Session.SessionUpdate(unitOfWork.connection).Update(item.Token, item.Update)
+        unitOfWork.complete(retItem.ErrorInfo)
+
+    except Exception as e:
+
+        Logger.ShowError(e, "Failed to update session information.")
+        unitOfWork.rollback()
+        retItem.ErrorInfo.Error = True
+        retItem.ErrorInfo.Message = f"{e}"
+
+    return retItem
+
 @app.patch(f"{v1Root}/session", response_model=BMD.UpdateSessionRequestResponse)
-def patchSession(item: BMD.UpdateSessionTimeRequestItem):
+async def patchSession(item: BMD.UpdateSessionTimeRequestItem, unitOfWork = Depends(getDriverUnitOfWork)):
+
+    if not useAsyncDriver:
+
+        return await run_in_threadpool(patchSessionSync, item, unitOfWork)
 
     # Update session time
     # Also used to log out (set update time to 00:00:00)
@@ -109,25 +413,26 @@ def patchSession(item: BMD.UpdateSessionTimeRequestItem):
 
     try:
 
-        retItem.Update = Session.SessionUpdate().Update(item.Token, item.Update)
+        retItem.Update = await Session.AsyncSessionUpdate(await unitOfWork.getConnection()).Update(item.Token, item.Update)
+        await unitOfWork.complete(retItem.ErrorInfo)
 
     except Exception as e:
 
         Logger.ShowError(e, "Failed to update session information.")
+        await unitOfWork.rollback()
         retItem.ErrorInfo.Error = True
         retItem.ErrorInfo.Message = f"{e}"
 
     return retItem
 
-@app.get(f"{v1Root}/session", response_model=BMD.SessionInfoResponse)
-def getSessionInfo(item: BMD.UpdateSessionTimeRequestItem):
+def getSessionInfoSync(item: BMD.UpdateSessionTimeRequestItem, unitOfWork: UnitOfWork):
 
     Logger.Info(f"Get session info request received: {item.model_dump()}")
     retItem = BMD.SessionInfoResponse()
 
     try:
 
-        sessionInfo = Session.CheckSession(item.Token)
+        sessionInfo = Session.CheckSession(item.Token, unitOfWork.connection)
 
         if not sessionInfo.IsValid(False):
 
@@ -148,10 +453,12 @@ def getSessionInfo(item: BMD.UpdateSessionTimeRequestItem):
         retItem.SessionInfo.CompanyID = sessionData[1]
         retItem.SessionInfo.AccessLevel = sessionData[2]
         retItem.SessionInfo.LogoutTime = sessionData[3]
+        unitOfWork.complete(retItem.ErrorInfo)
 
     except Exception as e:
 
         Logger.ShowError(e, "Failed to get session information.")
+        unitOfWork.rollback()
         retItem.ErrorInfo.Error = True
         retItem.ErrorInfo.Message = f"{e}"
 
@@ -163,11 +470,61 @@ def getSessionInfo(item: BMD.UpdateSessionTimeRequestItem):
 
     return retItem
 
+@app.get(f"{v1Root}/session", response_model=BMD.SessionInfoResponse)
+async def getSessionInfo(item: BMD.UpdateSessionTimeRequestItem, unitOfWork = Depends(getDriverUnitOfWork)):
+
+    if not useAsyncDriver:
+
+        return await run_in_threadpool(getSessionInfoSync, item, unitOfWork)
+
+    Logger.Info(f"Get session info request received: {item.model_dump()}")
+    retItem = BMD.SessionInfoResponse()
+
+    try:
+
+        sessionInfo = await Session.AsyncCheckSession.create(item.Token, await unitOfWork.getConnection())
+
+        if not await sessionInfo.IsValid(False):
+
+            retItem.ErrorInfo.Error = True
+            retItem.ErrorInfo.Message = "Invalid session."
+            return retItem
+
+        sessionData = await sessionInfo.GetSessionInfo()
+
+        if not sessionData:
+
+            retItem.ErrorInfo.Error = True
+            retItem.ErrorInfo.Message = "Session not found."
+            return retItem
+
+        retItem.Session = True
+        retItem.SessionInfo.UserID = sessionData[0]
+        retItem.SessionInfo.CompanyID = sessionData[1]
+        retItem.SessionInfo.AccessLevel = sessionData[2]
+        retItem.SessionInfo.LogoutTime = sessionData[3]
+        await unitOfWork.complete(retItem.ErrorInfo)
+
+    except Exception as e:
+
+        Logger.ShowError(e, "Failed to get session information.")
+        await unitOfWork.rollback()
+        retItem.ErrorInfo.Error = True
+        retItem.ErrorInfo.Message = f"{e}"
+
+    finally:
+
+        if 'sessionInfo' in locals():
+
+            await sessionInfo.close()
+
+    return retItem
+
 #####################################
 # Update password
 
 @app.patch(f"{v1Root}/password", response_model=BMD.UpdatePasswordRequestResponse)
-def putPassword(item: BMD.UpdatePasswordRequestItem):
+def putPassword(item: BMD.UpdatePasswordRequestItem, unitOfWork: UnitOfWork = Depends(getUnitOfWork)):
 
     Logger.Info(f"Password update request received: {item.UserName}")
     retItem = BMD.UpdatePasswordRequestResponse()
@@ -178,12 +535,14 @@ def putPassword(item: BMD.UpdatePasswordRequestItem):
 
     try:
 
-        userPasswordUpdate = User.UserPasswordUpdate(item.UserName, item.NewPassword, item.Token, item.OldPassword)
-        retItem = userPasswordUpdate.Update()
+        userPasswordUpdate = User.UserPasswordUpdate(item.UserName, item.NewPassword, item.Token, item.OldPassword, unitOfWork.connection)
+        retItem = BMD.UpdatePasswordRequestResponse(**userPasswordUpdate.Update())
+        unitOfWork.complete(retItem.ErrorInfo)
 
     except Exception as e:
 
         Logger.ShowError(e, "Failed to update password.")
+        unitOfWork.rollback()
         retItem.ErrorInfo.Error = True
         retItem.ErrorInfo.Message = f"{e}"
 
@@ -198,8 +557,7 @@ def putPassword(item: BMD.UpdatePasswordRequestItem):
 #####################################
 # Post user info
 
-@app.post(f"{v1Root}/user", response_model=BMD.PostUserInfoResponse)
-def postUserInfo(item: BMD.PostUserInfoRequestItem):
+def postUserInfoSync(item: BMD.PostUserInfoRequestItem, unitOfWork: UnitOfWork):
 
     Logger.Info(f"Post user info request received.")
     # No model dump for security reason
@@ -207,7 +565,7 @@ def postUserInfo(item: BMD.PostUserInfoRequestItem):
 
     try:
 
-        userInfo = User.UserInfo(item.Token)
+        userInfo = User.UserInfo(item.Token, unitOfWork.connection)
         retDict = userInfo.addUser(
             item.UserName,
             item.Email,
@@ -220,10 +578,12 @@ def postUserInfo(item: BMD.PostUserInfoRequestItem):
         retItem.Created = retDict["Created"]
         retItem.UserID = retDict["UserID"]
         retItem.ErrorInfo = BMD.errorInfo(**retDict["ErrorInfo"])
+        unitOfWork.complete(retItem.ErrorInfo)
 
     except Exception as e:
 
         Logger.ShowError(e, "Failed to post user information.")
+        unitOfWork.rollback()
         retItem.ErrorInfo.Error = True
         retItem.ErrorInfo.Message = f"{e}"
 
@@ -235,68 +595,318 @@ def postUserInfo(item: BMD.PostUserInfoRequestItem):
 
     return retItem
 
-#####################################
-# Get user info
+@app.post(f"{v1Root}/user", response_model=BMD.PostUserInfoResponse)
+async def postUserInfo(item: BMD.PostUserInfoRequestItem, unitOfWork = Depends(getDriverUnitOfWork)):
 
-@app.get(f"{v1Root}/user", response_model=BMD.GetUserInfoResponse)
-def getUserInfo(item: BMD.GetUserInfoRequestItem):
+    if not useAsyncDriver:
 
-    Logger.Info(f"Get user info request received: {item.model_dump()}")
-    retItem = BMD.GetUserInfoResponse()
+        return await run_in_threadpool(postUserInfoSync, item, unitOfWork)
+
+    Logger.Info(f"Post user info request received.")
+    # No model dump for security reason
+    retItem = BMD.PostUserInfoResponse()
 
     try:
 
-        userInfo = User.UserInfo(item.Token)
-        retItemDict = userInfo.getUserInfo(
-            userId=item.UserID,
-            userName=item.UserName,
-            eMail=item.Email,
-            accessLevel=item.AccessLevel,
-            companyId=item.CompanyID,
-            userStatus=item.UserStatus,
-            active=item.Active
+        userInfo = await User.AsyncUserInfo.create(item.Token, await unitOfWork.getConnection())
+        retDict = await userInfo.addUser(
+            item.UserName,
+            item.Email,
+            item.Password,
+            item.InitialPassword,
+            item.AccessLevel,
+            item.UserStatus,
+            item.CompanyID
             )
-        retItem.Users = [BMD.UserInfoResponseItem(**user) for user in retItemDict["Users"]]
-        retItem.ErrorInfo = BMD.errorInfo(**retItemDict["ErrorInfo"])
+        retItem.Created = retDict["Created"]
+        retItem.UserID = retDict["UserID"]
+        retItem.ErrorInfo = BMD.errorInfo(**retDict["ErrorInfo"])
+        await unitOfWork.complete(retItem.ErrorInfo)
 
     except Exception as e:
 
-        Logger.ShowError(e, "Failed to get user information.")
+        Logger.ShowError(e, "Failed to post user information.")
+        await unitOfWork.rollback()
         retItem.ErrorInfo.Error = True
         retItem.ErrorInfo.Message = f"{e}"
 
     finally:
-        
+
         if 'userInfo' in locals():
 
-            userInfo.close()
+            await userInfo.close()
 
     return retItem
 
 #####################################
-# Post company informations
+# Bulk post users
 
-@app.post(f"{v1Root}/company", response_model=BMD.PostCompanyResponse)
-def postCompanyInfo(item: BMD.PostCompanyRequestItem):
+def postUsersBulkSync(item: BMD.PostUsersBulkRequestItem, unitOfWork: UnitOfWork):
 
-    Logger.Info(f"Post company info request received: {item.model_dump()}")
-    retItem = BMD.PostCompanyResponse()
+    Logger.Info(f"Bulk post users request received: [{len(item.Users)} users]")
+    # No model dump for security reason
+    retItem = BMD.PostUsersBulkResponse()
 
     try:
 
-        companyManager = Company.CompanyManager(item.Token)
-        retItem = companyManager.createCompany(
-            item.CompanyName,
-            item.ContractLevel,
-            item.CompanyPhone,
-            item.CompanyZipCode,
-            item.CompanyAddress,
-            item.CompanyEmail
-            )
-
+        userInfo = User.UserInfo(item.Token, unitOfWork.connection)
+        retDict = userInfo.addUsers([user.model_dump() for user in item.Users])
+        retItem.Created = retDict["Created"]
+        retItem.Results = [BMD.bulkUserResult(**result) for result in retDict["Results"]]
+        retItem.ErrorInfo = BMD.errorInfo(**retDict["ErrorInfo"])
+        unitOfWork.complete(retItem.ErrorInfo)
+
+    except Exception as e:
+
+        Logger.ShowError(e, "Failed to post users.")
+        unitOfWork.rollback()
+        retItem.ErrorInfo.Error = True
+        retItem.ErrorInfo.Message = f"{e}"
+
+    finally:
+
+        if 'userInfo' in locals():
+
+            userInfo.close()
+
+    return retItem
+
+@app.post(f"{v1Root}/user/bulk", response_model=BMD.PostUsersBulkResponse)
+async def postUsersBulk(item: BMD.PostUsersBulkRequestItem, unitOfWork = Depends(getDriverUnitOfWork)):
+
+    if not useAsyncDriver:
+
+        return await run_in_threadpool(postUsersBulkSync, item, unitOfWork)
+
+    Logger.Info(f"Bulk post users request received: [{len(item.Users)} users]")
+    retItem = BMD.PostUsersBulkResponse()
+
+    try:
+
+        userInfo = await User.AsyncUserInfo.create(item.Token, await unitOfWork.getConnection())
+        retDict = await userInfo.addUsers([user.model_dump() for user in item.Users])
+        retItem.Created = retDict["Created"]
+        retItem.Results = [BMD.bulkUserResult(**result) for result in retDict["Results"]]
+        retItem.ErrorInfo = BMD.errorInfo(**retDict["ErrorInfo"])
+        await unitOfWork.complete(retItem.ErrorInfo)
+
+    except Exception as e:
+
+        Logger.ShowError(e, "Failed to post users.")
+        await unitOfWork.rollback()
+        retItem.ErrorInfo.Error = True
+        retItem.ErrorInfo.Message = f"{e}"
+
+    finally:
+
+        if 'userInfo' in locals():
+
+            await userInfo.close()
+
+    return retItem
+
+#####################################
+# Get user info
+
+def getUserInfoSync(item: BMD.GetUserInfoRequestItem, unitOfWork: UnitOfWork):
+
+    Logger.Info(f"Get user info request received: {item.model_dump()}")
+    retItem = BMD.GetUserInfoResponse()
+
+    try:
+
+        userInfo = User.UserInfo(item.Token, unitOfWork.connection)
+        retItemDict = userInfo.getUserInfo(
+            userId=item.UserID,
+            userName=item.UserName,
+            eMail=item.Email,
+            accessLevel=item.AccessLevel,
+            companyId=item.CompanyID,
+            userStatus=item.UserStatus,
+            active=item.Active,
+            cursor=item.Cursor,
+            limit=item.Limit
+            )
+        retItem.Users = [BMD.UserInfoResponseItem(**user) for user in retItemDict["Users"]]
+        retItem.NextCursor = retItemDict["NextCursor"]
+        retItem.ErrorInfo = BMD.errorInfo(**retItemDict["ErrorInfo"])
+        unitOfWork.complete(retItem.ErrorInfo)
+
+    except Exception as e:
+
+        Logger.ShowError(e, "Failed to get user information.")
+        unitOfWork.rollback()
+        retItem.ErrorInfo.Error = True
+        retItem.ErrorInfo.Message = f"{e}"
+
+    finally:
+        
+        if 'userInfo' in locals():
+
+            userInfo.close()
+
+    return retItem
+
+@app.get(f"{v1Root}/user", response_model=BMD.GetUserInfoResponse)
+async def getUserInfo(item: BMD.GetUserInfoRequestItem, unitOfWork = Depends(getDriverUnitOfWork)):
+
+    if not useAsyncDriver:
+
+        return await run_in_threadpool(getUserInfoSync, item, unitOfWork)
+
+    Logger.Info(f"Get user info request received: {item.model_dump()}")
+    retItem = BMD.GetUserInfoResponse()
+
+    try:
+
+        userInfo = await User.AsyncUserInfo.create(item.Token, await unitOfWork.getConnection())
+        retItemDict = await userInfo.getUserInfo(
+            userId=item.UserID,
+            userName=item.UserName,
+            eMail=item.Email,
+            accessLevel=item.AccessLevel,
+            companyId=item.CompanyID,
+            userStatus=item.UserStatus,
+            active=item.Active,
+            cursor=item.Cursor,
+            limit=item.Limit
+            )
+        retItem.Users = [BMD.UserInfoResponseItem(**user) for user in retItemDict["Users"]]
+        retItem.NextCursor = retItemDict["NextCursor"]
+        retItem.ErrorInfo = BMD.errorInfo(**retItemDict["ErrorInfo"])
+        await unitOfWork.complete(retItem.ErrorInfo)
+
+    except Exception as e:
+
+        Logger.ShowError(e, "Failed to get user information.")
+        await unitOfWork.rollback()
+        retItem.ErrorInfo.Error = True
+        retItem.ErrorInfo.Message = f"{e}"
+
+    finally:
+        
+        if 'userInfo' in locals():
+
+            await userInfo.close()
+
+    return retItem
+
+#####################################
+# Export user info
+# The rows stream on the request connection, so the unit of work is closed after the body is sent (scope="request")
+
+def exportUserInfoSync(item: BMD.ExportUserInfoRequestItem, unitOfWork: UnitOfWork):
+
+    Logger.Info(f"Export user info request received: {item.model_dump()}")
+    retItem = BMD.ExportResponse()
+    writer, rows = None, None
+
+    try:
+
+        userInfo = User.UserInfo(item.Token, unitOfWork.connection)
+        retDict, writer, rows = userInfo.exportUserInfo(
+            userId=item.UserID,
+            userName=item.UserName,
+            eMail=item.Email,
+            accessLevel=item.AccessLevel,
+            companyId=item.CompanyID,
+            userStatus=item.UserStatus,
+            active=item.Active,
+            exportFormat=item.Format
+            )
+        retItem.ErrorInfo = BMD.errorInfo(**retDict["ErrorInfo"])
+        unitOfWork.complete(retItem.ErrorInfo)
+
+    except Exception as e:
+
+        Logger.ShowError(e, "Failed to export user information.")
+        unitOfWork.rollback()
+        retItem.ErrorInfo.Error = True
+        retItem.ErrorInfo.Message = f"{e}"
+
+    finally:
+
+        if 'userInfo' in locals():
+
+            userInfo.close()
+
+    if retItem.ErrorInfo.Error or rows is None:
+
+        return retItem
+
+    return StreamingResponse(rows, media_type=writer.mediaType())
+
+@app.get(f"{v1Root}/user/export")
+async def exportUserInfo(item: BMD.ExportUserInfoRequestItem, unitOfWork = Depends(getDriverUnitOfWork, scope="request")):
+
+    if not useAsyncDriver:
+
+        return await run_in_threadpool(exportUserInfoSync, item, unitOfWork)
+
+    Logger.Info(f"Export user info request received: {item.model_dump()}")
+    retItem = BMD.ExportResponse()
+    writer, rows = None, None
+
+    try:
+
+        userInfo = await User.AsyncUserInfo.create(item.Token, await unitOfWork.getConnection())
+        retDict, writer, rows = await userInfo.exportUserInfo(
+            userId=item.UserID,
+            userName=item.UserName,
+            eMail=item.Email,
+            accessLevel=item.AccessLevel,
+            companyId=item.CompanyID,
+            userStatus=item.UserStatus,
+            active=item.Active,
+            exportFormat=item.Format
+            )
+        retItem.ErrorInfo = BMD.errorInfo(**retDict["ErrorInfo"])
+        await unitOfWork.complete(retItem.ErrorInfo)
+
+    except Exception as e:
+
+        Logger.ShowError(e, "Failed to export user information.")
+        await unitOfWork.rollback()
+        retItem.ErrorInfo.Error = True
+        retItem.ErrorInfo.Message = f"{e}"
+
+    finally:
+
+        if 'userInfo' in locals():
+
+            await userInfo.close()
+
+    if retItem.ErrorInfo.Error or rows is None:
+
+        return retItem
+
+    return StreamingResponse(rows, media_type=writer.mediaType())
+
+#####################################
+# Post company informations
+
+def postCompanyInfoSync(item: BMD.PostCompanyRequestItem, unitOfWork: UnitOfWork):
+
+    Logger.Info(f"Post company info request received: {item.model_dump()}")
+    retItem = BMD.PostCompanyResponse()
+
+    try:
+
+        companyManager = Company.CompanyManager(item.Token, unitOfWork.connection)
+        retItem = BMD.PostCompanyResponse(**companyManager.createCompany(
+            item.CompanyName,
+            item.ContractLevel,
+            item.CompanyPhone,
+            item.CompanyZipCode,
+            item.CompanyAddress,
+            item.CompanyEmail
+            ))
+        unitOfWork.complete(retItem.ErrorInfo)
+
     except Exception as e:
 
         Logger.ShowError(e, "Failed to post company information.")
+        unitOfWork.rollback()
         retItem.ErrorInfo.Error = True
         retItem.ErrorInfo.Message = f"{e}"
 
@@ -308,19 +918,104 @@ def postCompanyInfo(item: BMD.PostCompanyRequestItem):
 
     return retItem
 
+@app.post(f"{v1Root}/company", response_model=BMD.PostCompanyResponse)
+async def postCompanyInfo(item: BMD.PostCompanyRequestItem, unitOfWork = Depends(getDriverUnitOfWork)):
+
+    if not useAsyncDriver:
+
+        return await run_in_threadpool(postCompanyInfoSync, item, unitOfWork)
+
+    Logger.Info(f"Post company info request received: {item.model_dump()}")
+    retItem = BMD.PostCompanyResponse()
+
+    try:
+
+        companyManager = await Company.AsyncCompanyManager.create(item.Token, await unitOfWork.getConnection())
+        retItem = BMD.PostCompanyResponse(**await companyManager.createCompany(
+            item.CompanyName,
+            item.ContractLevel,
+            item.CompanyPhone,
+            item.CompanyZipCode,
+            item.CompanyAddress,
+            item.CompanyEmail
+            ))
+        await unitOfWork.complete(retItem.ErrorInfo)
+
+    except Exception as e:
+
+        Logger.ShowError(e, "Failed to post company information.")
+        await unitOfWork.rollback()
+        retItem.ErrorInfo.Error = True
+        retItem.ErrorInfo.Message = f"{e}"
+
+    finally:
+
+        if 'companyManager' in locals():
+
+            await companyManager.close()
+
+    return retItem
+
 #####################################
 # Get company informations
 
+def getCompanyInfoSync(item: BMD.GetCompanyInfoRequestItem, unitOfWork: UnitOfWork):
+
+    Logger.Info(f"Get company info request received: {item.model_dump()}")
+    retItem = BMD.GetCompanyInfoResponse()
+
+    try:
+
+        companyManager = Company.CompanyManager(item.Token, unitOfWork.connection)
+        retDict = companyManager.getCompanyList(item.CompanyID, item.CompanyName, item.ContractLevel)
+
+        # Break down company list
+
+        for company in retDict["CompanyList"]:
+
+            companyItem = BMD.CompanyInfoResponseItem()
+            companyItem.CompanyID = company[0]
+            companyItem.CompanyName = company[1]
+            companyItem.CompanyPhone = company[2]
+            companyItem.CompanyZipCode = company[3]
+            companyItem.CompanyAddress = company[4]
+            companyItem.CompanyEmail = company[5]
+            companyItem.ContractLevel = company[6]
+
+            retItem.Companies.append(companyItem)
+
+        retItem.ErrorInfo = BMD.errorInfo(**retDict["ErrorInfo"])
+        unitOfWork.complete(retItem.ErrorInfo)
+
+    except Exception as e:
+
+        Logger.ShowError(e, "Failed to get company information.")
+        unitOfWork.rollback()
+        retItem.ErrorInfo.Error = True
+        retItem.ErrorInfo.Message = f"{e}"
+
+    finally:
+
+        if 'companyManager' in locals():
+
+            companyManager.close()
+
+    return retItem
+
 @app.get(f"{v1Root}/company", response_model=BMD.GetCompanyInfoResponse)
-def getCompanyInfo(item: BMD.GetCompanyInfoRequestItem):
+async def getCompanyInfo(item: BMD.GetCompanyInfoRequestItem, unitOfWork = Depends(getDriverUnitOfWork)):
+
+    if not useAsyncDriver:
+
+        return await run_in_threadpool(getCompanyInfoSync, item, unitOfWork)
 
     Logger.Info(f"Get company info request received: {item.model_dump()}")
     retItem = BMD.GetCompanyInfoResponse()
 
     try:
 
-        companyManager = Company.CompanyManager(item.Token)
-        retDict = companyManager.getCompanyList(str,item.CompanyID, item.CompanyName, item.ContractLevel)
+        companyManager = await Company.AsyncCompanyManager.create(item.Token, await unitOfWork.getConnection())
+        retDict = await companyManager.getCompanyList(item.CompanyID, item.CompanyName, item.ContractLevel)
 
         # Break down company list
 
@@ -338,10 +1033,50 @@ def getCompanyInfo(item: BMD.GetCompanyInfoRequestItem):
             retItem.Companies.append(companyItem)
 
         retItem.ErrorInfo = BMD.errorInfo(**retDict["ErrorInfo"])
+        await unitOfWork.complete(retItem.ErrorInfo)
 
     except Exception as e:
 
         Logger.ShowError(e, "Failed to get company information.")
+        await unitOfWork.rollback()
+        retItem.ErrorInfo.Error = True
+        retItem.ErrorInfo.Message = f"{e}"
+
+    finally:
+
+        if 'companyManager' in locals():
+
+            await companyManager.close()
+
+    return retItem
+
+#####################################
+# Search company informations
+
+def searchCompanyInfoSync(item: BMD.SearchCompanyRequestItem, unitOfWork: UnitOfWork):
+
+    Logger.Info(f"Search company info request received: {item.model_dump()}")
+    retItem = BMD.SearchCompanyResponse()
+
+    try:
+
+        companyManager = Company.CompanyManager(item.Token, unitOfWork.connection)
+        retDict = companyManager.searchCompanyList(item.CompanyName, item.CompanyAddress, item.CompanyEmail, item.OrSearch, item.Fuzzy, item.Cursor, item.Limit)
+
+        # Break down company list
+
+        for company in retDict["CompanyList"]:
+
+            retItem.Companies.append(BMD.CompanyInfoResponseItem(**Company.CompanyManager.companyDict(company)))
+
+        retItem.NextCursor = retDict["NextCursor"]
+        retItem.ErrorInfo = BMD.errorInfo(**retDict["ErrorInfo"])
+        unitOfWork.complete(retItem.ErrorInfo)
+
+    except Exception as e:
+
+        Logger.ShowError(e, "Failed to search company information.")
+        unitOfWork.rollback()
         retItem.ErrorInfo.Error = True
         retItem.ErrorInfo.Message = f"{e}"
 
@@ -353,10 +1088,335 @@ def getCompanyInfo(item: BMD.GetCompanyInfoRequestItem):
 
     return retItem
 
+@app.get(f"{v1Root}/company/search", response_model=BMD.SearchCompanyResponse)
+async def searchCompanyInfo(item: BMD.SearchCompanyRequestItem, unitOfWork = Depends(getDriverUnitOfWork)):
+
+    if not useAsyncDriver:
+
+        return await run_in_threadpool(searchCompanyInfoSync, item, unitOfWork)
+
+    Logger.Info(f"Search company info request received: {item.model_dump()}")
+    retItem = BMD.SearchCompanyResponse()
+
+    try:
+
+        companyManager = await Company.AsyncCompanyManager.create(item.Token, await unitOfWork.getConnection())
+        retDict = await companyManager.searchCompanyList(item.CompanyName, item.CompanyAddress, item.CompanyEmail, item.OrSearch, item.Fuzzy, item.Cursor, item.Limit)
+
+        # Break down company list
+
+        for company in retDict["CompanyList"]:
+
+            retItem.Companies.append(BMD.CompanyInfoResponseItem(**Company.CompanyManager.companyDict(company)))
+
+        retItem.NextCursor = retDict["NextCursor"]
+        retItem.ErrorInfo = BMD.errorInfo(**retDict["ErrorInfo"])
+        await unitOfWork.complete(retItem.ErrorInfo)
+
+    except Exception as e:
+
+        Logger.ShowError(e, "Failed to search company information.")
+        await unitOfWork.rollback()
+        retItem.ErrorInfo.Error = True
+        retItem.ErrorInfo.Message = f"{e}"
+
+    finally:
+
+        if 'companyManager' in locals():
+
+            await companyManager.close()
+
+    return retItem
+
+#####################################
+# Company name typeahead
+
+def typeaheadCompanySync(item: BMD.CompanyTypeaheadRequestItem, unitOfWork: UnitOfWork):
+
+    Logger.Debug(f"Company typeahead request received: {item.Prefix}")
+    retItem = BMD.CompanyTypeaheadResponse()
+
+    try:
+
+        companyManager = Company.CompanyManager(item.Token, unitOfWork.connection)
+        retDict = companyManager.typeaheadCompany(item.Prefix, item.ContractLevels, item.Limit)
+        retItem.Companies = [BMD.CompanyNameItem(CompanyID=company[0], CompanyName=company[1], ContractLevel=company[2]) for company in retDict["CompanyList"]]
+        retItem.ErrorInfo = BMD.errorInfo(**retDict["ErrorInfo"])
+        unitOfWork.complete(retItem.ErrorInfo)
+
+    except Exception as e:
+
+        Logger.ShowError(e, "Failed to look up company names.")
+        unitOfWork.rollback()
+        retItem.ErrorInfo.Error = True
+        retItem.ErrorInfo.Message = f"{e}"
+
+    finally:
+
+        if 'companyManager' in locals():
+
+            companyManager.close()
+
+    return retItem
+
+@app.get(f"{v1Root}/company/typeahead", response_model=BMD.CompanyTypeaheadResponse)
+async def typeaheadCompany(item: BMD.CompanyTypeaheadRequestItem, unitOfWork = Depends(getDriverUnitOfWork)):
+
+    if not useAsyncDriver:
+
+        return await run_in_threadpool(typeaheadCompanySync, item, unitOfWork)
+
+    Logger.Debug(f"Company typeahead request received: {item.Prefix}")
+    retItem = BMD.CompanyTypeaheadResponse()
+
+    try:
+
+        companyManager = await Company.AsyncCompanyManager.create(item.Token, await unitOfWork.getConnection())
+        retDict = await companyManager.typeaheadCompany(item.Prefix, item.ContractLevels, item.Limit)
+        retItem.Companies = [BMD.CompanyNameItem(CompanyID=company[0], CompanyName=company[1], ContractLevel=company[2]) for company in retDict["CompanyList"]]
+        retItem.ErrorInfo = BMD.errorInfo(**retDict["ErrorInfo"])
+        await unitOfWork.complete(retItem.ErrorInfo)
+
+    except Exception as e:
+
+        Logger.ShowError(e, "Failed to look up company names.")
+        await unitOfWork.rollback()
+        retItem.ErrorInfo.Error = True
+        retItem.ErrorInfo.Message = f"{e}"
+
+    finally:
+
+        if 'companyManager' in locals():
+
+            await companyManager.close()
+
+    return retItem
+
+#####################################
+# Export company info
+# The rows stream on the request connection, so the unit of work is closed after the body is sent (scope="request")
+
+def exportCompanyInfoSync(item: BMD.ExportCompanyInfoRequestItem, unitOfWork: UnitOfWork):
+
+    Logger.Info(f"Export company info request received: {item.model_dump()}")
+    retItem = BMD.ExportResponse()
+    writer, rows = None, None
+
+    try:
+
+        companyManager = Company.CompanyManager(item.Token, unitOfWork.connection)
+        retDict, writer, rows = companyManager.exportCompanyList(item.CompanyID, item.CompanyName, item.ContractLevel, item.Format)
+        retItem.ErrorInfo = BMD.errorInfo(**retDict["ErrorInfo"])
+        unitOfWork.complete(retItem.ErrorInfo)
+
+    except Exception as e:
+
+        Logger.ShowError(e, "Failed to export company information.")
+        unitOfWork.rollback()
+        retItem.ErrorInfo.Error = True
+        retItem.ErrorInfo.Message = f"{e}"
+
+    finally:
+
+        if 'companyManager' in locals():
+
+            companyManager.close()
+
+    if retItem.ErrorInfo.Error or rows is None:
+
+        return retItem
+
+    return StreamingResponse(rows, media_type=writer.mediaType())
+
+@app.get(f"{v1Root}/company/export")
+async def exportCompanyInfo(item: BMD.ExportCompanyInfoRequestItem, unitOfWork = Depends(getDriverUnitOfWork, scope="request")):
+
+    if not useAsyncDriver:
+
+        return await run_in_threadpool(exportCompanyInfoSync, item, unitOfWork)
+
+    Logger.Info(f"Export company info request received: {item.model_dump()}")
+    retItem = BMD.ExportResponse()
+    writer, rows = None, None
+
+    try:
+
+        companyManager = await Company.AsyncCompanyManager.create(item.Token, await unitOfWork.getConnection())
+        retDict, writer, rows = await companyManager.exportCompanyList(item.CompanyID, item.CompanyName, item.ContractLevel, item.Format)
+        retItem.ErrorInfo = BMD.errorInfo(**retDict["ErrorInfo"])
+        await unitOfWork.complete(retItem.ErrorInfo)
+
+    except Exception as e:
+
+        Logger.ShowError(e, "Failed to export company information.")
+        await unitOfWork.rollback()
+        retItem.ErrorInfo.Error = True
+        retItem.ErrorInfo.Message = f"{e}"
+
+    finally:
+
+        if 'companyManager' in locals():
+
+            await companyManager.close()
+
+    if retItem.ErrorInfo.Error or rows is None:
+
+        return retItem
+
+    return StreamingResponse(rows, media_type=writer.mediaType())
+
+#####################################
+# Reference data
+
+async def referenceDataResponse(name: str, request: Request) -> Response:
+
+    # Served from memory. Clients revalidate with If-None-Match once max-age runs out.
+
+    payload = ReferenceData.referenceData.payloads.get(name)
+
+    if payload is None:
+
+        # The startup load failed. Retry it off the event loop.
+
+        payload = await run_in_threadpool(ReferenceData.referenceData.get, name)
+
+    if payload is None:
+
+        return Response(status_code=503, headers={"Retry-After": "60"})
+
+    body, etag = payload
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={ReferenceData.referenceData.maxAge}"}
+    ifNoneMatch = request.headers.get("if-none-match")
+
+    if ifNoneMatch is not None and (ifNoneMatch.strip() == "*" or etag in (tag.strip() for tag in ifNoneMatch.split(","))):
+
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get(f"{v1Root}/reference/contractlevels", response_model=BMD.ContractLevelsResponse)
+async def getContractLevels(request: Request):
+
+    return await referenceDataResponse("contractlevels", request)
+
+@app.get(f"{v1Root}/reference/languagetypes", response_model=BMD.LanguageTypesResponse)
+async def getLanguageTypes(request: Request):
+
+    return await referenceDataResponse("languagetypes", request)
+
+@app.get(f"{v1Root}/reference/languages", response_model=BMD.LanguagesResponse)
+async def getLanguages(request: Request):
+
+    return await referenceDataResponse("languages", request)
+
 #####################################
 # Health check
 
 @app.get("/healthcheck", response_model=BMD.HealthCheckResponse)
 def HealthCheck():
 
-    return {"ResponseMessage": "Hello from PJ_Mobius."}
\ No newline at end of file
+    return {"ResponseMessage": "Hello from PJ_Mobius."}
+
+#####################################
+# Server statistics
+# Only admin and super users may read them
+
+def checkStatsAuthoritySync(token: str | None, unitOfWork: UnitOfWork) -> BMD.errorInfo:
+
+    errorInfo = BMD.errorInfo()
+
+    try:
+
+        sessionInfo = Session.CheckSession(token, unitOfWork.connection)
+
+        if not sessionInfo.IsValid(False):
+
+            errorInfo.Error = True
+            errorInfo.Message = "Invalid session."
+
+        elif sessionInfo.GetSessionInfo()[2] not in ("super", "admin"):
+
+            errorInfo.Error = True
+            errorInfo.Message = "User has no authority to read server statistics."
+            Logger.Warn("Server statistics request rejected: Access level too low.")
+
+        unitOfWork.complete(errorInfo)
+
+    except Exception as e:
+
+        Logger.ShowError(e, "Failed to check session for server statistics.")
+        unitOfWork.rollback()
+        errorInfo.Error = True
+        errorInfo.Message = f"{e}"
+
+    finally:
+
+        if 'sessionInfo' in locals():
+
+            sessionInfo.close()
+
+    return errorInfo
+
+async def checkStatsAuthority(token: str | None, unitOfWork) -> BMD.errorInfo:
+
+    if not useAsyncDriver:
+
+        return await run_in_threadpool(checkStatsAuthoritySync, token, unitOfWork)
+
+    errorInfo = BMD.errorInfo()
+
+    try:
+
+        sessionInfo = await Session.AsyncCheckSession.create(token, await unitOfWork.getConnection())
+
+        if not await sessionInfo.IsValid(False):
+
+            errorInfo.Error = True
+            errorInfo.Message = "Invalid session."
+
+        elif (await sessionInfo.GetSessionInfo())[2] not in ("super", "admin"):
+
+            errorInfo.Error = True
+            errorInfo.Message = "User has no authority to read server statistics."
+            Logger.Warn("Server statistics request rejected: Access level too low.")
+
+        await unitOfWork.complete(errorInfo)
+
+    except Exception as e:
+
+        Logger.ShowError(e, "Failed to check session for server statistics.")
+        await unitOfWork.rollback()
+        errorInfo.Error = True
+        errorInfo.Message = f"{e}"
+
+    finally:
+
+        if 'sessionInfo' in locals():
+
+            await sessionInfo.close()
+
+    return errorInfo
+
+@app.get("/cachestats", response_model=BMD.CacheStatsResponse)
+async def CacheStats(item: BMD.StatsRequestItem, unitOfWork = Depends(getDriverUnitOfWork)):
+
+    retItem = BMD.CacheStatsResponse()
+    retItem.ErrorInfo = await checkStatsAuthority(item.Token, unitOfWork)
+
+    if not retItem.ErrorInfo.Error:
+
+        retItem.Caches = [BMD.cacheStats(**cache.stats()) for cache in (Session.sessionCache, User.loginThrottle.suspended, Company.companyDirectory)]
+
+    return retItem
+
+@app.get("/hashstats", response_model=BMD.HashStatsResponse)
+async def HashStats(item: BMD.StatsRequestItem, unitOfWork = Depends(getDriverUnitOfWork)):
+
+    retItem = BMD.HashStatsResponse()
+    retItem.ErrorInfo = await checkStatsAuthority(item.Token, unitOfWork)
+
+    if not retItem.ErrorInfo.Error:
+
+        retItem = BMD.HashStatsResponse(**Tools.HashExecutor.getInstance().stats(), ErrorInfo=retItem.ErrorInfo)
+
+    return retItem
\ No newline at end of file
@@ -0,0 +1,712 @@
+import asyncio
+import datetime
+from typing import Literal
+import aiomysql
+import maplex
+import TableAdapters
+import Tools
+import uuid
+
+class AsyncConnectionPool:
+
+    ''' Process-wide pool of asyncio database connections '''
+
+    instance = None
+    instanceLock = None
+
+    @classmethod
+    async def getInstance(cls) -> "AsyncConnectionPool":
+
+        if cls.instanceLock is None:
+
+            cls.instanceLock = asyncio.Lock()
+
+        async with cls.instanceLock:
+
+            if cls.instance is None:
+
+                instance = cls()
+                await instance.open()
+                cls.instance = instance
+
+            return cls.instance
+
+    def __init__(self):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger("AsyncTableAdapters: ConnectionPool")
+
+        # Pool settings (shared with the sync pool)
+
+        self.minSize = Tools.readConfigValue("MIN_SIZE", 2, "DB_POOL")
+        self.maxSize = max(Tools.readConfigValue("MAX_SIZE", 10, "DB_POOL"), 1)
+        self.maxLifetime = Tools.readConfigValue("MAX_LIFETIME", 1800, "DB_POOL")
+        self.checkoutTimeout = Tools.readConfigValue("CHECKOUT_TIMEOUT", 30, "DB_POOL")
+        self.minSize = min(self.minSize, self.maxSize)
+        self.pool = None
+
+    async def open(self):
+
+        userName, passWd = TableAdapters.DbConnection().readCredentials()
+        self.pool = await aiomysql.create_pool(
+            host="pj-mobius-db",
+            user=userName,
+            password=passWd,
+            db="MobiusDB",
+            minsize=self.minSize,
+            maxsize=self.maxSize,
+            pool_recycle=self.maxLifetime,
+            autocommit=False
+            )
+        self.Logger.Info(f"Async connection pool created: [min: {self.minSize}, max: {self.maxSize}, lifetime: {self.maxLifetime}s]")
+
+    async def checkout(self):
+
+        ''' Get a connection from the pool. Waits until one is free or the timeout passes. '''
+
+        try:
+
+            return await asyncio.wait_for(self.pool.acquire(), self.checkoutTimeout)
+
+        except asyncio.TimeoutError:
+
+            raise TimeoutError("Timed out waiting for a database connection.")
+
+    async def checkin(self, connection):
+
+        ''' Return a connection to the pool '''
+
+        try:
+
+            # End any open transaction so the next user gets a fresh snapshot
+
+            await connection.rollback()
+
+        except Exception as e:
+
+            self.Logger.Warn(f"Discarding broken connection on check in: {e}")
+            connection.close()
+
+        self.pool.release(connection)
+
+class AsyncConnection(TableAdapters.BaseConnection):
+
+    ''' aiomysql connection of a unit of work '''
+
+    def cursor(self, cursorClass=aiomysql.Cursor):
+
+        return self.connection.cursor(cursorClass)
+
+    async def commit(self):
+
+        await self.connection.commit()
+        self.runCommitHooks()
+
+    async def rollback(self):
+
+        self.commitHooks = []
+        await self.connection.rollback()
+
+class AsyncBaseTableAdapters:
+
+    def __init__(self, loggerName: str, connection=None):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger(loggerName)
+
+        # A connection handed in by a unit of work is committed and returned by its owner
+
+        self.ownConnection = connection is None
+        self.connection = connection
+        self.cursor = None
+
+    @classmethod
+    async def create(cls, connection=None):
+
+        adapter = cls(connection)
+
+        try:
+
+            if adapter.ownConnection:
+
+                adapter.connection = await (await AsyncConnectionPool.getInstance()).checkout()
+
+            adapter.cursor = await adapter.connection.cursor()
+            adapter.Logger.Info("Database connection checked out.")
+
+        except Exception as e:
+
+            adapter.Logger.ShowError(e, "Failed to connect database.")
+            raise
+
+        return adapter
+
+    async def closeConnection(self):
+
+        try:
+
+            await self.cursor.close()
+
+            if self.ownConnection:
+
+                await (await AsyncConnectionPool.getInstance()).checkin(self.connection)
+                self.Logger.Info("Database connection returned to the pool.")
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to close database connection.")
+            raise
+
+    async def commit(self):
+
+        # Statements run inside a unit of work are committed once at the end of the request
+
+        if self.ownConnection:
+
+            await self.connection.commit()
+
+    async def rollback(self):
+
+        if self.ownConnection:
+
+            await self.connection.rollback()
+
+    def afterCommit(self, callback):
+
+        # Writes on an own connection are committed before they return
+
+        if self.ownConnection:
+
+            callback()
+
+        else:
+
+            self.connection.afterCommit(callback)
+
+    async def savepoint(self, name: str):
+
+        # A part of the request transaction that can be undone on its own
+
+        await self.cursor.execute(f"SAVEPOINT {name};")
+
+    async def rollbackToSavepoint(self, name: str):
+
+        await self.cursor.execute(f"ROLLBACK TO SAVEPOINT {name};")
+
+    async def releaseSavepoint(self, name: str):
+
+        await self.cursor.execute(f"RELEASE SAVEPOINT {name};")
+
+    async def streamRows(self, sql: str, replaceList: list, chunkSize: int = 500):
+
+        ''' Yield the result in chunks from an unbuffered server-side cursor '''
+
+        streamCursor = await self.connection.cursor(aiomysql.SSCursor)
+
+        try:
+
+            await streamCursor.execute(sql, replaceList)
+
+            while True:
+
+                rows = await streamCursor.fetchmany(chunkSize)
+
+                if not rows:
+
+                    break
+
+                yield rows
+
+        finally:
+
+            await streamCursor.close()
+
+class AsyncUserTableAdapters(AsyncBaseTableAdapters):
+
+    def __init__(self, connection=None):
+
+        super().__init__("AsyncTableAdapters: Users", connection)
+
+    #######################################
+    # Insert
+
+    async def insertUser(self, userName: str, eMail: str, userPassword: str, initialPassword: int=1, accessLevel: str="user", companyId: int | None = None, userStatus: str | None = None, createUserId: int | None = None) -> int:
+
+        try:
+
+            # Hash password in the hashing processes
+
+            hashedPassword = await Tools.HashExecutor.getInstance().hashAsync(userPassword)
+
+            # Insert new user info
+
+            sql = f"INSERT INTO Users " \
+                f"(user_name, email, password_hash, initial_password, access_level, company_id, user_status, created_user_id,  updated_user_id) " \
+                f"VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s);"
+            await self.cursor.execute(sql, (userName, eMail, hashedPassword, initialPassword, accessLevel, companyId, userStatus, createUserId, createUserId))
+            await self.commit()
+            self.Logger.Info(f"New user info created. [UserID: {self.cursor.lastrowid}]")
+
+            return self.cursor.lastrowid
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to insert new user information.")
+            raise
+
+    async def insertUsers(self, users: list[tuple], createUserId: int | None = None) -> dict[str, int]:
+
+        try:
+
+            sql = f"INSERT INTO Users " \
+                f"(user_name, email, password_hash, initial_password, access_level, company_id, user_status, created_user_id,  updated_user_id) " \
+                f"VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s);"
+            await self.cursor.executemany(sql, [(*user, createUserId, createUserId) for user in users])
+
+            # Auto increment values of one statement are not always consecutive, so read them back
+
+            placeholders = ", ".join(["%s"] * len(users))
+            await self.cursor.execute(f"SELECT user_name, user_id FROM Users WHERE user_name IN ({placeholders});", [user[0] for user in users])
+            userIds = dict(await self.cursor.fetchall())
+
+            await self.commit()
+            self.Logger.Info(f"{len(users)} new users created.")
+
+            return userIds
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to insert new users.")
+            raise
+
+    ##########################################
+    # Update
+
+    async def updateUserPassword(self, userId: int, newPassword: str, updateUserId: int):
+
+        try:
+
+            sql = f"UPDATE Users SET password_hash=%s, initial_password=0, updated_user_id=%s, updated_at=CURRENT_TIMESTAMP WHERE user_id=%s;"
+            await self.cursor.execute(sql, (newPassword, updateUserId, userId))
+            await self.commit()
+            self.Logger.Info("User password updated.")
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to update user password.")
+            raise
+
+    async def updatePasswordHash(self, userId: int, passwordHash: str):
+
+        try:
+
+            # Replace the stored hash of an unchanged password
+
+            sql = f"UPDATE Users SET password_hash=%s WHERE user_id=%s;"
+            await self.cursor.execute(sql, (passwordHash, userId))
+            await self.commit()
+            self.Logger.Info("User password hash upgraded.")
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to upgrade user password hash.")
+            raise
+
+    async def updateLoginFailed(self, userId: int, failedCount: int, failedAt: datetime.datetime | None = None, userStatus: Literal['active', 'inactive', 'suspended'] = 'active'):
+
+        try:
+
+            # Update login failed info
+
+            sql = f"UPDATE Users SET login_failed=%s, login_failed_at=%s, user_status=%s WHERE user_id=%s;"
+            await self.cursor.execute(sql, (failedCount, failedAt, userStatus, userId))
+            await self.commit()
+            self.Logger.Info("User login failed info updated.")
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to update user login failed info.")
+            raise
+
+    async def countLoginFailed(self, userId: int) -> int | None:
+
+        try:
+
+            sql, replaceList = TableAdapters.UserTableAdapters.countLoginFailedSql(userId)
+            await self.cursor.execute(sql, replaceList)
+            await self.commit()
+            self.Logger.Info("User login failed info updated.")
+
+            return self.cursor.lastrowid or None
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to update user login failed info.")
+            raise
+
+    ##########################################
+    # Select
+
+    async def selectUser(self, userId: int | None = None, userName: str | None = None, eMail: str | None = None, accessLevel: Literal['super', 'admin', 'user', 'guest'] | None = None, companyId: int | None = None, userStatus: Literal['active', 'inactive', 'suspended'] | None = None, active: bool | None = None, afterUserId: int | None = None, limit: int | None = None) -> tuple[tuple]:
+
+        if userId is None and userName is None and eMail is None and accessLevel is None and companyId is None and userStatus is None:
+
+            # If the parameters are all empty
+
+            self.Logger.Warn("Selecting all Users at once is not allowed.")
+            return None
+
+        try:
+
+            # Generate sql
+
+            sql, replaceList = TableAdapters.UserTableAdapters.selectUserSql(userId, userName, eMail, accessLevel, companyId, userStatus, active, afterUserId, limit)
+
+            # Execute sql
+
+            await self.cursor.execute(sql, replaceList)
+            return await self.cursor.fetchall()
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to select user informantions.")
+            raise
+
+    async def selectExistingUsers(self, userNames: list[str], eMails: list[str]) -> tuple[set[str], set[str]]:
+
+        if not userNames and not eMails:
+
+            return set(), set()
+
+        try:
+
+            sql, replaceList = TableAdapters.UserTableAdapters.selectExistingUsersSql(userNames, eMails)
+            await self.cursor.execute(sql, replaceList)
+            rows = await self.cursor.fetchall()
+
+            return {row[0] for row in rows}, {row[1] for row in rows}
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to select existing users.")
+            raise
+
+    async def streamUser(self, userId: int | None = None, userName: str | None = None, eMail: str | None = None, accessLevel: Literal['super', 'admin', 'user', 'guest'] | None = None, companyId: int | None = None, userStatus: Literal['active', 'inactive', 'suspended'] | None = None, active: bool | None = None, chunkSize: int = 500):
+
+        if userId is None and userName is None and eMail is None and accessLevel is None and companyId is None and userStatus is None:
+
+            self.Logger.Warn("Selecting all Users at once is not allowed.")
+            return
+
+        try:
+
+            sql, replaceList = TableAdapters.UserTableAdapters.selectUserSql(userId, userName, eMail, accessLevel, companyId, userStatus, active, withActive=True)
+
+            async for rows in self.streamRows(sql, replaceList, chunkSize):
+
+                yield rows
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to stream user informantions.")
+            raise
+
+class AsyncSessionInfoTableAdapters(AsyncBaseTableAdapters):
+
+    def __init__(self, connection=None):
+
+        super().__init__("AsyncTableAdapters: Session", connection)
+
+    #################################
+    # Insert
+
+    async def CreateNewSession(self, userData: tuple) -> tuple | None:
+
+        self.Logger.Info("Creating new session information.")
+
+        try:
+
+            # Logins of one user wait for each other on the user row, so the live session check and the insert cannot interleave
+
+            await self.cursor.execute("SELECT user_id FROM Users WHERE user_id=%s FOR UPDATE;", (userData[0],))
+
+            sessionId = str(uuid.uuid1())
+            sql, replaceList = TableAdapters.SessionInfoTableAdapters.createNewSessionSql(sessionId, userData)
+
+            if await self.cursor.execute(sql, replaceList) == 0:
+
+                # Session from another computer is still remains
+
+                await self.rollback()
+                self.Logger.Warn("There is another active session.")
+                return None
+
+            await self.cursor.execute("SELECT logout_datetime FROM SessionInfo WHERE session_uuid=%s;", (TableAdapters.SessionInfoTableAdapters.toSessionKey(sessionId),))
+            logoutDatetime = (await self.cursor.fetchall())[0][0]
+            await self.commit()
+            self.Logger.Info("Session info created.")
+
+            return sessionId, userData[0], userData[6], userData[5], logoutDatetime
+
+        except Exception as e:
+
+            await self.rollback()
+            self.Logger.ShowError(e, "Failed to create session information.")
+            raise
+
+    ################################
+    # Update
+
+    async def UpdateLogout(self, uuid: str, update: str):
+
+        self.Logger.Info(f"Updating logout datetime: +{update}")
+
+        sessionKey = TableAdapters.SessionInfoTableAdapters.toSessionKey(uuid)
+
+        if sessionKey is None:
+
+            self.Logger.Warn(f"Malformed session ID: {uuid}")
+            return
+
+        sql = f"UPDATE SessionInfo SET logout_datetime=ADDTIME(CURRENT_TIMESTAMP, %s) WHERE session_uuid=%s;"
+        await self.cursor.execute(sql, (update, sessionKey))
+        await self.commit()
+
+        self.Logger.Info("Logout datetime updated.")
+
+    async def UpdateLogoutBatch(self, uuids: list[str], update: str) -> int:
+
+        self.Logger.Info(f"Updating logout datetime of {len(uuids)} sessions: +{update}")
+
+        sessionKeys = [sessionKey for sessionKey in map(TableAdapters.SessionInfoTableAdapters.toSessionKey, uuids) if sessionKey is not None]
+
+        if not sessionKeys:
+
+            return 0
+
+        placeholders = ", ".join(["%s"] * len(sessionKeys))
+        sql = f"UPDATE SessionInfo SET logout_datetime=ADDTIME(CURRENT_TIMESTAMP, %s) WHERE session_uuid IN ({placeholders}) AND logout_datetime>CURRENT_TIMESTAMP;"
+        updatedCount = await self.cursor.execute(sql, (update, *sessionKeys))
+        await self.commit()
+
+        self.Logger.Info(f"Logout datetime updated: {updatedCount} sessions.")
+        return updatedCount
+
+    ################################
+    # Select
+
+    async def selectSessionInfo(self, uuid: str) -> tuple[tuple] | None:
+
+        self.Logger.Info(f"Selecting session information: {uuid}")
+
+        sessionKey = TableAdapters.SessionInfoTableAdapters.toSessionKey(uuid)
+
+        if sessionKey is None:
+
+            self.Logger.Warn(f"Malformed session ID: {uuid}")
+            return None
+
+        try:
+
+            sql = f"SELECT user_id, company_id, access_level, logout_datetime FROM SessionInfo WHERE session_uuid=%s;"
+            await self.cursor.execute(sql, (sessionKey,))
+            result = await self.cursor.fetchall()
+
+            return result if result else None
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, f"Failed to select session information: {uuid}")
+            raise
+
+    async def selectActiveUserIds(self, userIds: list[int], logoutDatetime: datetime.datetime | None = None) -> set[int]:
+
+        if not userIds:
+
+            return set()
+
+        if logoutDatetime is None:
+
+            logoutDatetime = datetime.datetime.now()
+
+        self.Logger.Info(f"Selecting active users among {len(userIds)} users.")
+
+        try:
+
+            sql, replaceList = TableAdapters.SessionInfoTableAdapters.selectActiveUserIdsSql(userIds, logoutDatetime)
+            await self.cursor.execute(sql, replaceList)
+
+            return {row[0] for row in await self.cursor.fetchall()}
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to select active users.")
+            raise
+
+    async def selectSessionInfoByTimeAndUser(self, userId: int, BeforeAfter: Literal['before', 'after'], logoutDatetime: datetime.datetime | None = None) -> tuple[tuple] | None:
+
+        if logoutDatetime is None:
+
+            logoutDatetime = datetime.datetime.now()
+
+        logoutDatetimeString = f"{logoutDatetime:%Y/%m/%d %H:%M:%S}"
+        timeSpan = f"{'<' if BeforeAfter == 'before' else '>'}"
+
+        self.Logger.Info(f"Selecting session information by time and user: {userId}, {BeforeAfter}, {logoutDatetime:%Y/%m/%d %H:%M:%S}")
+
+        try:
+
+            sql = f"SELECT session_uuid, user_id, company_id, access_level, logout_datetime FROM SessionInfo WHERE user_id=%s AND logout_datetime{timeSpan}=%s;"
+            await self.cursor.execute(sql, (userId, logoutDatetimeString))
+            result = tuple((TableAdapters.SessionInfoTableAdapters.fromSessionKey(row[0]), *row[1:]) for row in await self.cursor.fetchall())
+
+            return result if result else None
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, f"Failed to select session information by time and user: {userId}, {BeforeAfter}, {timeSpan}")
+            raise
+
+class AsyncCompanyTableAdapters(AsyncBaseTableAdapters):
+
+    def __init__(self, connection=None):
+
+        super().__init__("AsyncCompanyTableAdapters", connection)
+
+    #################################
+    # Insert
+
+    async def insertCompany(self, companyName: str, companyPhone: str, companyZipCode: str, companyAddress: str, companyEmail: str, contractLevel: int, createUserId: int | None = None) -> int:
+
+        try:
+
+            # Insert new company info
+
+            sql = f"INSERT INTO ContractCompanies "\
+                f"(company_name, company_phone, company_zip_code, company_address, company_email, contract_level, created_user_id, updated_user_id) "\
+                f"VALUES (%s, %s, %s, %s, %s, %s, %s, %s);"
+            await self.cursor.execute(sql, (companyName, companyPhone, companyZipCode, companyAddress, companyEmail, contractLevel, createUserId, createUserId))
+            await self.commit()
+            self.Logger.Info(f"New company info created. [CompanyID: {self.cursor.lastrowid}]")
+
+            return self.cursor.lastrowid
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to insert new company info.")
+            raise
+
+    #################################
+    # Select
+
+    async def selectCompany(self, companyId: int | None = None, companyName: str | None = None, contractLevel: int | None = None, orSearch: bool = False) -> tuple[tuple] | None:
+
+        # Select companies by exact match
+
+        if companyId is None and companyName is None and contractLevel is None:
+
+            # If the parameters are all empty
+
+            self.Logger.Warn("Selecting all Companies at once is not allowed.")
+            return None
+
+        try:
+
+            # Generate sql
+
+            sql, replaceList = TableAdapters.CompanyTableAdapters.selectCompanySql(companyId, companyName, contractLevel, orSearch)
+            self.Logger.Debug(f"Select Company SQL: {sql} with {replaceList}")
+
+            # Execute sql
+
+            await self.cursor.execute(sql, replaceList)
+            return await self.cursor.fetchall()
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to select company informantions.")
+            raise
+
+    async def selectCompanyNames(self) -> tuple[tuple]:
+
+        try:
+
+            await self.cursor.execute("SELECT company_id, company_name, contract_level FROM ContractCompanies;")
+            return await self.cursor.fetchall()
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to select company names.")
+            raise
+
+    async def selectAllCompanies(self, limit: int) -> tuple[tuple]:
+
+        try:
+
+            await self.cursor.execute("SELECT * FROM ContractCompanies ORDER BY company_id LIMIT %s;", (limit,))
+            return await self.cursor.fetchall()
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to select all companies.")
+            raise
+
+    async def readNgramSize(self) -> int:
+
+        # Shares the process-wide value of the sync adapter
+
+        if TableAdapters.CompanyTableAdapters.ngramSize is None:
+
+            await self.cursor.execute("SELECT @@ngram_token_size;")
+            TableAdapters.CompanyTableAdapters.ngramSize = int((await self.cursor.fetchall())[0][0])
+            self.Logger.Info(f"Server ngram_token_size: {TableAdapters.CompanyTableAdapters.ngramSize}")
+
+        return TableAdapters.CompanyTableAdapters.ngramSize
+
+    async def searchCompany(self, companyName: str | None = None, companyAddress: str | None = None, companyEmail: str | None = None, orSearch: bool = False, fuzzy: bool = False, offset: int = 0, limit: int | None = None) -> tuple[tuple] | None:
+
+        emptyStrs = {None, ""}
+
+        if companyName in emptyStrs and companyAddress in emptyStrs and companyEmail in emptyStrs:
+
+            self.Logger.Warn("Searching all Companies at once is not allowed.")
+            return None
+
+        if companyEmail not in emptyStrs:
+
+            self.Logger.Warn("Searching by company email is not recommended for security reason.")
+
+        try:
+
+            sql, replaceList = TableAdapters.CompanyTableAdapters.searchCompanySql(companyName, companyAddress, companyEmail, orSearch, fuzzy, offset, limit, await self.readNgramSize())
+            self.Logger.Debug(f"Search Company SQL: {sql} with {replaceList}")
+
+            await self.cursor.execute(sql, replaceList)
+            return await self.cursor.fetchall()
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to search company informantions.")
+            raise
+
+    async def streamCompany(self, companyId: int | None = None, companyName: str | None = None, contractLevel: int | None = None, chunkSize: int = 500):
+
+        if companyId is None and companyName is None and contractLevel is None:
+
+            self.Logger.Warn("Selecting all Companies at once is not allowed.")
+            return
+
+        try:
+
+            sql, replaceList = TableAdapters.CompanyTableAdapters.selectCompanySql(companyId, companyName, contractLevel)
+
+            async for rows in self.streamRows(sql, replaceList, chunkSize):
+
+                yield rows
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to stream company informantions.")
+            raise
@@ -59,6 +59,8 @@ class GetUserInfoRequestItem(BaseModel):
     CompanyID: int | None = None
     UserStatus: str | None = None
     Active: bool | None = None
+    Cursor: str | None = None
+    Limit: int | None = None
 
 ############################################
 # Post user info request item class
@@ -74,6 +76,24 @@ class PostUserInfoRequestItem(BaseModel):
     UserStatus: str | None = None
     CompanyID: int | None = None
 
+############################################
+# Bulk post users request item class
+
+class bulkUserItem(BaseModel):
+
+    UserName: str | None = None
+    Email: str | None = None
+    Password: str | None = None
+    InitialPassword: int | None = None
+    AccessLevel: str | None = None
+    UserStatus: str | None = None
+    CompanyID: int | None = None
+
+class PostUsersBulkRequestItem(BaseModel):
+
+    Token: str | None = None
+    Users: list[bulkUserItem] = []
+
 ############################################
 # Add company request item class
 
@@ -97,6 +117,60 @@ class GetCompanyInfoRequestItem(BaseModel):
     CompanyName: str | None = None
     ContractLevel: int | None = None
 
+############################################
+# Search company request item class
+
+class SearchCompanyRequestItem(BaseModel):
+
+    Token: str | None = None
+    CompanyName: str | None = None
+    CompanyAddress: str | None = None
+    CompanyEmail: str | None = None
+    OrSearch: bool = False
+    Fuzzy: bool = False
+    Cursor: str | None = None
+    Limit: int | None = None
+
+############################################
+# Company typeahead request item class
+
+class CompanyTypeaheadRequestItem(BaseModel):
+
+    Token: str | None = None
+    Prefix: str | None = None
+    ContractLevels: list[int] | None = None
+    Limit: int | None = None
+
+############################################
+# Export request item classes
+
+class ExportUserInfoRequestItem(BaseModel):
+
+    Token: str | None = None
+    UserID: int | None = None
+    UserName: str | None = None
+    Email: str | None = None
+    AccessLevel: str | None = None
+    CompanyID: int | None = None
+    UserStatus: str | None = None
+    Active: bool | None = None
+    Format: str = "ndjson"
+
+class ExportCompanyInfoRequestItem(BaseModel):
+
+    Token: str | None = None
+    CompanyID: int | None = None
+    CompanyName: str | None = None
+    ContractLevel: int | None = None
+    Format: str = "ndjson"
+
+############################################
+# Server statistics request item class
+
+class StatsRequestItem(BaseModel):
+
+    Token: str | None = None
+
 ############################################
 # Response item class
 ############################################
@@ -106,6 +180,34 @@ class HealthCheckResponse(BaseModel):
 
     ResponseMessage: str
 
+############################################
+# Cache statistics response item class
+
+class cacheStats(BaseModel):
+
+    Name: str
+    Size: int = 0
+    MaxSize: int = 0
+    Hits: int = 0
+    Misses: int = 0
+    Evictions: int = 0
+
+class CacheStatsResponse(BaseModel):
+
+    Caches: list[cacheStats] = []
+    ErrorInfo: errorInfo = errorInfo()
+
+############################################
+# Password hashing statistics response item class
+
+class HashStatsResponse(BaseModel):
+
+    Workers: int = 0
+    InFlight: int = 0
+    QueueDepth: int = 0
+    Completed: int = 0
+    ErrorInfo: errorInfo = errorInfo()
+
 ############################################
 # Init super user response item class
 
@@ -179,6 +281,7 @@ class UserInfoResponseItem(BaseModel):
 class GetUserInfoResponse(BaseModel):
 
     Users: list[UserInfoResponseItem] = []
+    NextCursor: str | None = None
     ErrorInfo: errorInfo = errorInfo()
 
 ############################################
@@ -190,6 +293,23 @@ class PostUserInfoResponse(BaseModel):
     UserID: int | None = None
     ErrorInfo: errorInfo = errorInfo()
 
+############################################
+# Bulk post users response item class
+
+class bulkUserResult(BaseModel):
+
+    Index: int
+    UserName: str | None = None
+    Created: bool = False
+    UserID: int | None = None
+    Message: str = ""
+
+class PostUsersBulkResponse(BaseModel):
+
+    Created: int = 0
+    Results: list[bulkUserResult] = []
+    ErrorInfo: errorInfo = errorInfo()
+
 ############################################
 # Add company response item class
 
@@ -216,3 +336,72 @@ class GetCompanyInfoResponse(BaseModel):
 
     Companies: list[CompanyInfoResponseItem] = []
     ErrorInfo: errorInfo = errorInfo()
+
+############################################
+# Company typeahead response item class
+
+class CompanyNameItem(BaseModel):
+
+    CompanyID: int | None = None
+    CompanyName: str | None = None
+    ContractLevel: int | None = None
+
+class CompanyTypeaheadResponse(BaseModel):
+
+    Companies: list[CompanyNameItem] = []
+    ErrorInfo: errorInfo = errorInfo()
+
+############################################
+# Search company response item class
+
+class SearchCompanyResponse(BaseModel):
+
+    Companies: list[CompanyInfoResponseItem] = []
+    NextCursor: str | None = None
+    ErrorInfo: errorInfo = errorInfo()
+
+############################################
+# Export response item class (sent instead of the stream when the request is rejected)
+
+class ExportResponse(BaseModel):
+
+    ErrorInfo: errorInfo = errorInfo()
+
+############################################
+# Reference data response item classes
+
+class ContractLevelItem(BaseModel):
+
+    LevelID: int
+    LevelName: str
+    LevelDescription: str | None = None
+
+class ContractLevelsResponse(BaseModel):
+
+    Version: str
+    ContractLevels: list[ContractLevelItem] = []
+
+class LanguageTypeItem(BaseModel):
+
+    TypeID: int
+    RootID: int
+    ParentID: int
+    TypeName: str
+    TypeDescription: str | None = None
+
+class LanguageTypesResponse(BaseModel):
+
+    Version: str
+    LanguageTypes: list[LanguageTypeItem] = []
+
+class LanguageItem(BaseModel):
+
+    LanguageID: int
+    LanguageName: str
+    LanguageDescription: str | None = None
+    TypeID: int | None = None
+
+class LanguagesResponse(BaseModel):
+
+    Version: str
+    Languages: list[LanguageItem] = []
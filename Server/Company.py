@@ -1,10 +1,302 @@
+import AsyncTableAdapters
+import heapq
+import itertools
 import maplex
 import Session
 import TableAdapters
+import threading
+import time
+import Tools
+
+#####################################
+# Typeahead index of company names
+
+class CompanyNameIndex:
+
+    ''' Company names by prefix, one trie per contract level. Loaded from the database and kept current on createCompany. '''
+
+    def __init__(self):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger("CompanyNameIndex")
+
+        # Settings: the refresh interval bounds staleness if the invalidation bus is not available
+
+        self.maxLimit = Tools.readConfigValue("MAX_LIMIT", 20, "COMPANY_TYPEAHEAD")
+        self.refreshInterval = Tools.readConfigValue("REFRESH", 300, "COMPANY_TYPEAHEAD")
+
+        self.tries = None
+        self.loadedAt = None
+        self.lock = threading.Lock()
+        self.subscription = Tools.InvalidationBus.getInstance().subscribe("Companies")
+
+    def isStale(self) -> bool:
+
+        # A company write in any worker reloads the index
+
+        if self.subscription.poll() is not None:
+
+            self.loadedAt = None
+
+        return self.loadedAt is None or time.monotonic() - self.loadedAt > self.refreshInterval
+
+    def indexCompany(self, tries: dict, companyId: int, companyName: str, contractLevel: int):
+
+        # The whole name ranks before a word inside it, e.g. "Mobius Works" is found by "mob" and "wor"
+
+        trie = tries.get(contractLevel)
+
+        if trie is None:
+
+            trie = tries[contractLevel] = Tools.PrefixTrie(f"CompanyNames: {contractLevel}", self.maxLimit)
+
+        value = (companyName.casefold(), companyName, companyId)
+        trie.add(companyName, value, (0,))
+
+        for word in companyName.split()[1:]:
+
+            trie.add(word, value, (1,))
+
+    def load(self, companies: tuple[tuple]):
+
+        ''' Replace the index with the (company ID, company name, contract level) rows '''
+
+        tries = {}
+
+        for companyId, companyName, contractLevel in companies:
+
+            self.indexCompany(tries, companyId, companyName, contractLevel)
+
+        with self.lock:
+
+            self.tries = tries
+            self.loadedAt = time.monotonic()
+
+        self.Logger.Info(f"Company name index loaded: {len(companies)} companies.")
+
+    def add(self, companyId: int, companyName: str, contractLevel: int):
+
+        with self.lock:
+
+            if self.tries is not None:
+
+                self.indexCompany(self.tries, companyId, companyName, contractLevel)
+
+    def search(self, prefix: str, contractLevels: list[int] | None = None, limit: int = 10) -> list[tuple]:
+
+        ''' (company ID, company name, contract level) of the best matches, whole name matches first and then by name '''
+
+        with self.lock:
+
+            tries = self.tries or {}
+            levels = list(tries) if contractLevels is None else [level for level in contractLevels if level in tries]
+            results = [
+                [(rank, value, level) for rank, value in tries[level].search(prefix, limit)]
+                for level in levels
+                ]
+
+        matches = heapq.merge(*results)
+
+        return [(value[2], value[1], level) for rank, value, level in itertools.islice(matches, limit)]
+
+companyNameIndex = CompanyNameIndex()
+
+#####################################
+# Directory cache of company rows
+
+class CompanyDirectory:
+
+    ''' Every company row, indexed by ID, name and contract level. Dropped on company writes in any worker and reloaded on the next read. '''
+
+    # Columns of ContractCompanies used by the indexes
+
+    ID_COLUMN = 0
+    NAME_COLUMN = 1
+    LEVEL_COLUMN = 6
+
+    def __init__(self):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger("CompanyDirectory")
+
+        # Settings: a table larger than MAX_SIZE is not cached and every lookup reads the database
+
+        self.enabled = Tools.readConfigValue("ENABLED", True, "COMPANY_CACHE")
+        self.maxSize = max(Tools.readConfigValue("MAX_SIZE", 10000, "COMPANY_CACHE"), 1)
+        self.refreshInterval = Tools.readConfigValue("REFRESH", 300, "COMPANY_CACHE")
+
+        self.byId = None
+        self.byName = {}
+        self.byLevel = {}
+        self.loadedAt = None
+        self.lock = threading.Lock()
+
+        # A load started before an invalidation would bring the old rows back
+
+        self.generation = 0
+        self.subscription = Tools.InvalidationBus.getInstance().subscribe("Companies")
+
+        # Statistics
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def nameKey(companyName: str) -> str:
+
+        # company_name compares case-insensitively in MySQL. Names equal here are equal there, not the other way round.
+
+        return companyName.casefold()
+
+    def needsLoad(self) -> int | None:
+
+        ''' The generation to pass to load() if the cache should be (re)loaded, otherwise None '''
+
+        if self.subscription.poll() is not None:
+
+            self.drop()
+
+        with self.lock:
+
+            if not self.enabled:
+
+                return None
+
+            if self.loadedAt is not None and time.monotonic() - self.loadedAt <= self.refreshInterval:
+
+                return None
+
+            return self.generation
+
+    def load(self, companies: tuple[tuple], generation: int):
+
+        ''' Replace the cache with the rows of selectAllCompanies(maxSize + 1) '''
+
+        byId = None
+        byName = {}
+        byLevel = {}
+
+        if len(companies) <= self.maxSize:
+
+            byId = {company[CompanyDirectory.ID_COLUMN]: company for company in companies}
+
+            for company in companies:
+
+                byName[self.nameKey(company[CompanyDirectory.NAME_COLUMN])] = company
+                byLevel.setdefault(company[CompanyDirectory.LEVEL_COLUMN], []).append(company)
+
+        with self.lock:
+
+            if generation != self.generation:
+
+                self.Logger.Debug("Company directory changed while loading, the load is discarded.")
+                return
+
+            self.byId = byId
+            self.byName = byName
+            self.byLevel = {level: tuple(levelCompanies) for level, levelCompanies in byLevel.items()}
+            self.loadedAt = time.monotonic()
+
+        if byId is None:
+
+            self.Logger.Warn(f"More than {self.maxSize} companies. The company directory cache is not used.")
+
+        else:
+
+            self.Logger.Info(f"Company directory loaded: {len(companies)} companies.")
+
+    def drop(self):
+
+        with self.lock:
+
+            self.generation += 1
+            self.evictions += len(self.byId or ())
+            self.byId = None
+            self.byName = {}
+            self.byLevel = {}
+            self.loadedAt = None
+
+    def invalidate(self):
+
+        # Drop the directory and the name index in every worker
+
+        self.drop()
+        self.subscription.publish()
+
+    def lookup(self, companyId: int | None = None, companyName: str | None = None, contractLevel: int | None = None) -> tuple[tuple] | None:
+
+        ''' Companies matching every given condition like CompanyTableAdapters.selectCompany, or None if the cache cannot answer '''
+
+        if companyName == "":
+
+            companyName = None
+
+        if companyId is None and companyName is None and contractLevel is None:
+
+            return None
+
+        with self.lock:
+
+            if self.byId is None:
+
+                self.misses += 1
+                return None
+
+            # Start from the most selective index and filter by the other conditions
+
+            if companyId is not None:
+
+                company = self.byId.get(companyId)
+                companies = (company,) if company is not None else ()
+
+            elif companyName is not None:
+
+                company = self.byName.get(self.nameKey(companyName))
+                companies = (company,) if company is not None else ()
+
+            else:
+
+                companies = self.byLevel.get(contractLevel, ())
+
+            companies = tuple(
+                company for company in companies
+                if (companyName is None or self.nameKey(company[CompanyDirectory.NAME_COLUMN]) == self.nameKey(companyName))
+                and (contractLevel is None or company[CompanyDirectory.LEVEL_COLUMN] == contractLevel)
+                )
+
+            # casefold() folds less than the accent-insensitive collation of company_name ("Cafe" equals "Café" in MySQL).
+            # A name the cache does not know may still match, so only the database can answer.
+
+            if companyName is not None and not companies:
+
+                self.misses += 1
+                return None
+
+            self.hits += 1
+
+        return companies
+
+    def stats(self) -> dict:
+
+        with self.lock:
+
+            return {
+                "Name": "CompanyDirectory",
+                "Size": len(self.byId or ()),
+                "MaxSize": self.maxSize,
+                "Hits": self.hits,
+                "Misses": self.misses,
+                "Evictions": self.evictions
+            }
+
+companyDirectory = CompanyDirectory()
 
 class CompanyManager:
 
-    def __init__(self, token: str):
+    def __init__(self, token: str, connection=None):
 
         # Logging objects
 
@@ -12,8 +304,8 @@ class CompanyManager:
 
         # Table adapters
 
-        self.CompanyAdapter = TableAdapters.CompanyTableAdapters()
-        self.Session = Session.CheckSession(token)
+        self.CompanyAdapter = TableAdapters.CompanyTableAdapters(connection)
+        self.Session = Session.CheckSession(token, connection)
         self.sessionToken = token
 
     def close(self):
@@ -22,6 +314,30 @@ class CompanyManager:
         self.Session.close()
         self.Logger.Info("Closed CompanyManager object.")
 
+    def selectCompany(self, companyId: int | None = None, companyName: str | None = None, contractLevel: int | None = None) -> tuple[tuple] | None:
+
+        # Answered from the directory cache, the database is read only to load it or when it cannot be used
+
+        generation = companyDirectory.needsLoad()
+
+        if generation is not None:
+
+            companyDirectory.load(self.CompanyAdapter.selectAllCompanies(companyDirectory.maxSize + 1), generation)
+
+        companies = companyDirectory.lookup(companyId, companyName, contractLevel)
+
+        if companies is None:
+
+            companies = self.CompanyAdapter.selectCompany(companyId, companyName, contractLevel)
+
+        return companies
+
+    @staticmethod
+    def companyAdded(companyId: int, companyName: str, contractLevel: int):
+
+        companyDirectory.invalidate()
+        companyNameIndex.add(companyId, companyName, contractLevel)
+
     def createCompany(self, companyName: str | None = None, contractLevel: int | None = None, companyPhone: str | None = None, companyZipCode: str | None = None, companyAddress: str | None = None, companyEmail: str | None = None) -> dict:
 
         # Create a new company
@@ -47,7 +363,7 @@ class CompanyManager:
 
             # Check for existing company with the same name
 
-            existingCompanies = self.CompanyAdapter.selectCompany(companyName=companyName)
+            existingCompanies = self.selectCompany(companyName=companyName)
 
             if existingCompanies:
 
@@ -58,7 +374,15 @@ class CompanyManager:
 
             # Insert the new company
 
-            retDict["CompanyID"] = self.CompanyAdapter.insertCompany(companyName, contractLevel, companyPhone, companyZipCode, companyAddress, companyEmail)
+            retDict["CompanyID"] = self.CompanyAdapter.insertCompany(
+                companyName=companyName,
+                companyPhone=companyPhone,
+                companyZipCode=companyZipCode,
+                companyAddress=companyAddress,
+                companyEmail=companyEmail,
+                contractLevel=contractLevel,
+                createUserId=self.Session.GetSessionInfo()[0]
+                )
 
             if not retDict["CompanyID"]:
 
@@ -68,6 +392,13 @@ class CompanyManager:
 
             else:
 
+                retDict["Success"] = True
+
+                # Every company write drops the directory once it is committed, so no worker reloads it without the new row.
+                # A rolled back insert leaves the caches alone.
+
+                companyId = retDict["CompanyID"]
+                self.CompanyAdapter.afterCommit(lambda: self.companyAdded(companyId, companyName, contractLevel))
                 self.Logger.Info(f"Created new company with ID: {retDict['CompanyID']}")
 
         except Exception as e:
@@ -78,7 +409,7 @@ class CompanyManager:
 
         return retDict
 
-    def getCompanyList(self, str,companyID: int | None = None, companyName: str | None = None, contractLevel: int | None = None) -> tuple[tuple] | None:
+    def getCompanyList(self, companyID: int | None = None, companyName: str | None = None, contractLevel: int | None = None) -> tuple[tuple] | None:
         
         # Get company list
 
@@ -94,7 +425,388 @@ class CompanyManager:
                 retDict["ErrorInfo"]["Message"] = "Invalid session."
                 return retDict
 
-            retDict["CompanyList"] = self.CompanyAdapter.selectCompany(companyID, companyName, contractLevel)
+            retDict["CompanyList"] = self.selectCompany(companyID, companyName, contractLevel)
+
+            if not retDict["CompanyList"]:
+
+                retDict["ErrorInfo"]["Error"] = True
+                retDict["ErrorInfo"]["Message"] = "No company found."
+                self.Logger.Info("No company found with the given criteria.")
+
+            else:
+
+                self.Logger.Debug(f"Found {len(retDict['CompanyList'])} companies with the given criteria.")
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to get company list.")
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = f"Failed to get company list: {str(e)}"
+
+        return retDict
+
+    @staticmethod
+    def checkSearchRequest(companyName: str | None, companyAddress: str | None, companyEmail: str | None, cursor: str | None, limit: int | None) -> tuple[str | None, int, int]:
+
+        ''' Check the search parameters. Returns the error message (None if valid), the offset and the page size. '''
+
+        defaultLimit = Tools.readConfigValue("DEFAULT_LIMIT", 20, "COMPANY_SEARCH")
+        maxLimit = Tools.readConfigValue("MAX_LIMIT", 100, "COMPANY_SEARCH")
+
+        if limit is None:
+
+            limit = defaultLimit
+
+        if not any(term is not None and term.strip() for term in (companyName, companyAddress, companyEmail)):
+
+            return "At least one search condition must be specified.", 0, limit
+
+        if limit < 1 or limit > maxLimit:
+
+            return f"Limit must be between 1 and {maxLimit}.", 0, limit
+
+        if cursor is None:
+
+            return None, 0, limit
+
+        # Ranked results are paged by position
+
+        position = Tools.decodeCursor(cursor)
+
+        if position is None or not isinstance(position.get("Offset"), int) or position["Offset"] < 0:
+
+            return "Bad cursor.", 0, limit
+
+        return None, position["Offset"], limit
+
+    @staticmethod
+    def searchPageOf(retDict: dict, companyList: tuple[tuple] | None, offset: int, limit: int) -> tuple[tuple]:
+
+        ''' Cut the extra row off the page and set the cursor of the next page '''
+
+        companyList = companyList or ()
+
+        if len(companyList) > limit:
+
+            companyList = companyList[:limit]
+            retDict["NextCursor"] = Tools.encodeCursor({"Offset": offset + limit})
+
+        return companyList
+
+    def searchCompanyList(self, companyName: str | None = None, companyAddress: str | None = None, companyEmail: str | None = None, orSearch: bool = False, fuzzy: bool = False, cursor: str | None = None, limit: int | None = None) -> dict:
+
+        # Search companies by partial or fuzzy match, best match first
+
+        retDict = {"CompanyList": (), "NextCursor": None, "ErrorInfo": {"Error": False, "Message": ""}}
+
+        message, offset, limit = self.checkSearchRequest(companyName, companyAddress, companyEmail, cursor, limit)
+
+        if message is not None:
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = message
+            self.Logger.Info(f"Bad company search request: {message}")
+            return retDict
+
+        try:
+
+            # Check the session validity
+
+            if not self.Session.IsValid():
+
+                retDict["ErrorInfo"]["Error"] = True
+                retDict["ErrorInfo"]["Message"] = "Invalid session."
+                return retDict
+
+            # One extra row tells if there is a next page
+
+            companyList = self.CompanyAdapter.searchCompany(companyName, companyAddress, companyEmail, orSearch, fuzzy, offset, limit + 1)
+            retDict["CompanyList"] = self.searchPageOf(retDict, companyList, offset, limit)
+            self.Logger.Debug(f"Found {len(retDict['CompanyList'])} companies with the given search terms.")
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to search companies.")
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = f"Failed to search companies: {str(e)}"
+
+        return retDict
+
+    @staticmethod
+    def checkTypeaheadRequest(limit: int | None) -> tuple[str | None, int]:
+
+        defaultLimit = Tools.readConfigValue("DEFAULT_LIMIT", 10, "COMPANY_TYPEAHEAD")
+
+        if limit is None:
+
+            limit = defaultLimit
+
+        if limit < 1 or limit > companyNameIndex.maxLimit:
+
+            return f"Limit must be between 1 and {companyNameIndex.maxLimit}.", limit
+
+        return None, limit
+
+    def typeaheadCompany(self, prefix: str | None = None, contractLevels: list[int] | None = None, limit: int | None = None) -> dict:
+
+        # Company names starting with the prefix, from the in-memory index
+
+        retDict = {"CompanyList": [], "ErrorInfo": {"Error": False, "Message": ""}}
+
+        message, limit = self.checkTypeaheadRequest(limit)
+
+        if message is not None:
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = message
+            self.Logger.Info(f"Bad company typeahead request: {message}")
+            return retDict
+
+        try:
+
+            # Check the session validity
+
+            if not self.Session.IsValid():
+
+                retDict["ErrorInfo"]["Error"] = True
+                retDict["ErrorInfo"]["Message"] = "Invalid session."
+                return retDict
+
+            if companyNameIndex.isStale():
+
+                companyNameIndex.load(self.CompanyAdapter.selectCompanyNames())
+
+            retDict["CompanyList"] = companyNameIndex.search(prefix or "", contractLevels, limit)
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to look up company names.")
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = f"Failed to look up company names: {str(e)}"
+
+        return retDict
+
+    @staticmethod
+    def companyDict(company: tuple) -> dict:
+
+        return {
+            "CompanyID": company[0],
+            "CompanyName": company[1],
+            "CompanyPhone": company[2],
+            "CompanyZipCode": company[3],
+            "CompanyAddress": company[4],
+            "CompanyEmail": company[5],
+            "ContractLevel": company[6]
+        }
+
+    def exportCompanyList(self, companyID: int | None = None, companyName: str | None = None, contractLevel: int | None = None, exportFormat: str = "ndjson") -> tuple[dict, Tools.ExportWriter | None, object]:
+
+        # Check the export request like getCompanyList and return the row chunks to stream
+
+        retDict = {"ErrorInfo": {"Error": False, "Message": ""}}
+
+        if companyID is None and companyName is None and contractLevel is None:
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = "At least one search condition must be specified."
+            self.Logger.Info("At least one search condition must be specified.")
+            return retDict, None, None
+
+        if not Tools.ExportWriter.isSupported(exportFormat):
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = "Bad export format."
+            self.Logger.Info(f"Bad export format: {exportFormat}")
+            return retDict, None, None
+
+        try:
+
+            # Check the session validity
+
+            if not self.Session.IsValid():
+
+                retDict["ErrorInfo"]["Error"] = True
+                retDict["ErrorInfo"]["Message"] = "Invalid session."
+                return retDict, None, None
+
+            writer = Tools.ExportWriter(exportFormat)
+
+            return retDict, writer, self.exportRows(writer, companyID, companyName, contractLevel)
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to export company list.")
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = f"Failed to export company list: {str(e)}"
+            return retDict, None, None
+
+    def exportRows(self, writer: Tools.ExportWriter, companyID: int | None, companyName: str | None, contractLevel: int | None):
+
+        # Streams on the request connection, which the unit of work keeps until the body is sent
+
+        companyAdapter = None
+
+        try:
+
+            companyAdapter = TableAdapters.CompanyTableAdapters(self.CompanyAdapter.connection)
+
+            for companies in companyAdapter.streamCompany(companyID, companyName, contractLevel, Tools.readConfigValue("CHUNK_SIZE", 500, "EXPORT")):
+
+                yield writer.chunk([self.companyDict(company) for company in companies])
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to export company list.")
+            yield writer.error(f"{e}")
+
+        finally:
+
+            if companyAdapter is not None:
+
+                companyAdapter.closeConnection()
+
+class AsyncCompanyManager:
+
+    def __init__(self, token: str, companyAdapter: AsyncTableAdapters.AsyncCompanyTableAdapters, session: Session.AsyncCheckSession):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger("AsyncCompanyManager")
+
+        # Table adapters
+
+        self.CompanyAdapter = companyAdapter
+        self.Session = session
+        self.sessionToken = token
+
+    @classmethod
+    async def create(cls, token: str, connection=None) -> "AsyncCompanyManager":
+
+        companyAdapter = await AsyncTableAdapters.AsyncCompanyTableAdapters.create(connection)
+
+        try:
+
+            session = await Session.AsyncCheckSession.create(token, connection)
+
+        except Exception:
+
+            await companyAdapter.closeConnection()
+            raise
+
+        return cls(token, companyAdapter, session)
+
+    async def close(self):
+
+        await self.CompanyAdapter.closeConnection()
+        await self.Session.close()
+        self.Logger.Info("Closed AsyncCompanyManager object.")
+
+    async def selectCompany(self, companyId: int | None = None, companyName: str | None = None, contractLevel: int | None = None) -> tuple[tuple] | None:
+
+        # Answered from the directory cache, the database is read only to load it or when it cannot be used
+
+        generation = companyDirectory.needsLoad()
+
+        if generation is not None:
+
+            companyDirectory.load(await self.CompanyAdapter.selectAllCompanies(companyDirectory.maxSize + 1), generation)
+
+        companies = companyDirectory.lookup(companyId, companyName, contractLevel)
+
+        if companies is None:
+
+            companies = await self.CompanyAdapter.selectCompany(companyId, companyName, contractLevel)
+
+        return companies
+
+    async def createCompany(self, companyName: str | None = None, contractLevel: int | None = None, companyPhone: str | None = None, companyZipCode: str | None = None, companyAddress: str | None = None, companyEmail: str | None = None) -> dict:
+
+        # Create a new company
+
+        retDict = {"Success": False, "CompanyID": None, "ErrorInfo": {"Error": False, "Message": ""}}
+
+        try:
+
+            # Check the session validity
+
+            if not await self.Session.IsValid():
+
+                retDict["ErrorInfo"]["Error"] = True
+                retDict["ErrorInfo"]["Message"] = "Invalid session."
+                return retDict
+
+            if companyName is None or contractLevel is None:
+
+                retDict["ErrorInfo"]["Error"] = True
+                retDict["ErrorInfo"]["Message"] = "Company name and contract level are required."
+                self.Logger.Info("Company name and contract level are required to create a company.")
+                return retDict
+
+            # Check for existing company with the same name
+
+            existingCompanies = await self.selectCompany(companyName=companyName)
+
+            if existingCompanies:
+
+                retDict["ErrorInfo"]["Error"] = True
+                retDict["ErrorInfo"]["Message"] = f"Company named {companyName} already exists."
+                self.Logger.Info(f"Company named {companyName} already exists.")
+                return retDict
+
+            # Insert the new company
+
+            retDict["CompanyID"] = await self.CompanyAdapter.insertCompany(
+                companyName=companyName,
+                companyPhone=companyPhone,
+                companyZipCode=companyZipCode,
+                companyAddress=companyAddress,
+                companyEmail=companyEmail,
+                contractLevel=contractLevel,
+                createUserId=(await self.Session.GetSessionInfo())[0]
+                )
+
+            if not retDict["CompanyID"]:
+
+                retDict["ErrorInfo"]["Error"] = True
+                retDict["ErrorInfo"]["Message"] = "Failed to create company."
+                self.Logger.Info("Failed to create a new company.")
+
+            else:
+
+                retDict["Success"] = True
+
+                # Every company write drops the directory once it is committed, so no worker reloads it without the new row.
+                # A rolled back insert leaves the caches alone.
+
+                companyId = retDict["CompanyID"]
+                self.CompanyAdapter.afterCommit(lambda: CompanyManager.companyAdded(companyId, companyName, contractLevel))
+                self.Logger.Info(f"Created new company with ID: {retDict['CompanyID']}")
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to create company.")
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = f"Failed to create company: {str(e)}"
+
+        return retDict
+
+    async def getCompanyList(self, companyID: int | None = None, companyName: str | None = None, contractLevel: int | None = None) -> dict:
+
+        # Get company list
+
+        retDict = {"CompanyList": None, "ErrorInfo": {"Error": False, "Message": ""}}
+
+        try:
+
+            # Check the session validity
+
+            if not await self.Session.IsValid():
+
+                retDict["ErrorInfo"]["Error"] = True
+                retDict["ErrorInfo"]["Message"] = "Invalid session."
+                return retDict
+
+            retDict["CompanyList"] = await self.selectCompany(companyID, companyName, contractLevel)
 
             if not retDict["CompanyList"]:
 
@@ -112,4 +824,148 @@ class CompanyManager:
             retDict["ErrorInfo"]["Error"] = True
             retDict["ErrorInfo"]["Message"] = f"Failed to get company list: {str(e)}"
 
-        return retDict
\ No newline at end of file
+        return retDict
+
+    async def searchCompanyList(self, companyName: str | None = None, companyAddress: str | None = None, companyEmail: str | None = None, orSearch: bool = False, fuzzy: bool = False, cursor: str | None = None, limit: int | None = None) -> dict:
+
+        # Search companies by partial or fuzzy match, best match first
+
+        retDict = {"CompanyList": (), "NextCursor": None, "ErrorInfo": {"Error": False, "Message": ""}}
+
+        message, offset, limit = CompanyManager.checkSearchRequest(companyName, companyAddress, companyEmail, cursor, limit)
+
+        if message is not None:
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = message
+            self.Logger.Info(f"Bad company search request: {message}")
+            return retDict
+
+        try:
+
+            # Check the session validity
+
+            if not await self.Session.IsValid():
+
+                retDict["ErrorInfo"]["Error"] = True
+                retDict["ErrorInfo"]["Message"] = "Invalid session."
+                return retDict
+
+            # One extra row tells if there is a next page
+
+            companyList = await self.CompanyAdapter.searchCompany(companyName, companyAddress, companyEmail, orSearch, fuzzy, offset, limit + 1)
+            retDict["CompanyList"] = CompanyManager.searchPageOf(retDict, companyList, offset, limit)
+            self.Logger.Debug(f"Found {len(retDict['CompanyList'])} companies with the given search terms.")
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to search companies.")
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = f"Failed to search companies: {str(e)}"
+
+        return retDict
+
+    async def typeaheadCompany(self, prefix: str | None = None, contractLevels: list[int] | None = None, limit: int | None = None) -> dict:
+
+        # Company names starting with the prefix, from the in-memory index
+
+        retDict = {"CompanyList": [], "ErrorInfo": {"Error": False, "Message": ""}}
+
+        message, limit = CompanyManager.checkTypeaheadRequest(limit)
+
+        if message is not None:
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = message
+            self.Logger.Info(f"Bad company typeahead request: {message}")
+            return retDict
+
+        try:
+
+            # Check the session validity
+
+            if not await self.Session.IsValid():
+
+                retDict["ErrorInfo"]["Error"] = True
+                retDict["ErrorInfo"]["Message"] = "Invalid session."
+                return retDict
+
+            if companyNameIndex.isStale():
+
+                companyNameIndex.load(await self.CompanyAdapter.selectCompanyNames())
+
+            retDict["CompanyList"] = companyNameIndex.search(prefix or "", contractLevels, limit)
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to look up company names.")
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = f"Failed to look up company names: {str(e)}"
+
+        return retDict
+
+    async def exportCompanyList(self, companyID: int | None = None, companyName: str | None = None, contractLevel: int | None = None, exportFormat: str = "ndjson") -> tuple[dict, Tools.ExportWriter | None, object]:
+
+        # Check the export request like getCompanyList and return the row chunks to stream
+
+        retDict = {"ErrorInfo": {"Error": False, "Message": ""}}
+
+        if companyID is None and companyName is None and contractLevel is None:
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = "At least one search condition must be specified."
+            self.Logger.Info("At least one search condition must be specified.")
+            return retDict, None, None
+
+        if not Tools.ExportWriter.isSupported(exportFormat):
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = "Bad export format."
+            self.Logger.Info(f"Bad export format: {exportFormat}")
+            return retDict, None, None
+
+        try:
+
+            # Check the session validity
+
+            if not await self.Session.IsValid():
+
+                retDict["ErrorInfo"]["Error"] = True
+                retDict["ErrorInfo"]["Message"] = "Invalid session."
+                return retDict, None, None
+
+            writer = Tools.ExportWriter(exportFormat)
+
+            return retDict, writer, self.exportRows(writer, companyID, companyName, contractLevel)
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to export company list.")
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = f"Failed to export company list: {str(e)}"
+            return retDict, None, None
+
+    async def exportRows(self, writer: Tools.ExportWriter, companyID: int | None, companyName: str | None, contractLevel: int | None):
+
+        # Streams on the request connection, which the unit of work keeps until the body is sent
+
+        companyAdapter = None
+
+        try:
+
+            companyAdapter = await AsyncTableAdapters.AsyncCompanyTableAdapters.create(self.CompanyAdapter.connection)
+
+            async for companies in companyAdapter.streamCompany(companyID, companyName, contractLevel, Tools.readConfigValue("CHUNK_SIZE", 500, "EXPORT")):
+
+                yield writer.chunk([CompanyManager.companyDict(company) for company in companies])
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to export company list.")
+            yield writer.error(f"{e}")
+
+        finally:
+
+            if companyAdapter is not None:
+
+                await companyAdapter.closeConnection()
\ No newline at end of file
@@ -0,0 +1,19 @@
+# One-off grant for databases created before the maintenance user existed.
+# initDBUserPermissions.sh only runs on a fresh data volume, so run this once against an existing one:
+#   docker exec -i janet sh < DB_init/grantMaintenanceUser.sh
+# Running it again only resets the password and the grants.
+
+set -e
+
+MAINTENANCE_USER=$(cat /run/secrets/maintenance_user)
+MAINTENANCE_PASSWORD=$(cat /run/secrets/maintenance_password)
+MYSQL_ROOT_PASSWORD=$(cat /run/secrets/root_password)
+
+mysql -u root -p$MYSQL_ROOT_PASSWORD <<-EOSQL
+
+    CREATE USER IF NOT EXISTS '$MAINTENANCE_USER'@'%' IDENTIFIED BY '$MAINTENANCE_PASSWORD';
+    ALTER USER '$MAINTENANCE_USER'@'%' IDENTIFIED BY '$MAINTENANCE_PASSWORD';
+    GRANT SELECT, INSERT, UPDATE, DELETE, CREATE, ALTER, INDEX, DROP, REFERENCES ON MobiusDB.* TO '$MAINTENANCE_USER'@'%';
+
+    FLUSH PRIVILEGES;
+EOSQL
\ No newline at end of file
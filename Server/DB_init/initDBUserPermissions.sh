@@ -3,6 +3,9 @@ until mysqladmin ping -h "localhost" --silent; do
     sleep 1
 done
 
+MAINTENANCE_USER=$(cat /run/secrets/maintenance_user)
+MAINTENANCE_PASSWORD=$(cat /run/secrets/maintenance_password)
+
 mysql -u root -p$MYSQL_ROOT_PASSWORD <<-EOSQL
 
     REVOKE ALL PRIVILEGES ON *.* FROM 'mobius'@'%';
@@ -15,6 +18,8 @@ mysql -u root -p$MYSQL_ROOT_PASSWORD <<-EOSQL
     GRANT INSERT, UPDATE, SELECT, DELETE ON MobiusDB.Users TO 'mobius'@'%';
     GRANT INSERT, UPDATE, SELECT ON MobiusDB.SessionInfo TO 'mobius'@'%';
     GRANT SELECT ON MobiusDB.ContractLevel TO 'mobius'@'%';
+    CREATE USER IF NOT EXISTS '$MAINTENANCE_USER'@'%' IDENTIFIED BY '$MAINTENANCE_PASSWORD';
+    GRANT SELECT, INSERT, UPDATE, DELETE, CREATE, ALTER, INDEX, DROP, REFERENCES ON MobiusDB.* TO '$MAINTENANCE_USER'@'%';
     REVOKE ALL PRIVILEGES ON *.* FROM 'root'@'%';
     GRANT ALL PRIVILEGES ON *.* TO 'root'@'localhost';
 
@@ -0,0 +1,153 @@
+import BaseModelData as BMD
+import hashlib
+import maplex
+import TableAdapters
+import threading
+import Tools
+
+class ReferenceDataCache:
+
+    ''' Serialized copies of the seed tables, reloaded when REFERENCE_DATA.VERSION changes '''
+
+    # Dataset name: (adapter method, response model, list field, item model, item fields in column order)
+
+    DATASETS = {
+        "contractlevels": (
+            "selectContractLevels", BMD.ContractLevelsResponse, "ContractLevels", BMD.ContractLevelItem,
+            ("LevelID", "LevelName", "LevelDescription")
+            ),
+        "languagetypes": (
+            "selectLanguageTypes", BMD.LanguageTypesResponse, "LanguageTypes", BMD.LanguageTypeItem,
+            ("TypeID", "RootID", "ParentID", "TypeName", "TypeDescription")
+            ),
+        "languages": (
+            "selectLanguages", BMD.LanguagesResponse, "Languages", BMD.LanguageItem,
+            ("LanguageID", "LanguageName", "LanguageDescription", "TypeID")
+            )
+    }
+
+    def __init__(self):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger("ReferenceDataCache")
+
+        # Settings
+
+        self.maxAge = Tools.readConfigValue("MAX_AGE", 86400, "REFERENCE_DATA")
+        self.versionFile = Tools.readConfigValue("VERSION_FILE", "/var/lib/pj-mobius-server/reference_data_version", "REFERENCE_DATA")
+        self.checkInterval = Tools.readConfigValue("CHECK_INTERVAL", 60, "REFERENCE_DATA")
+
+        # Dataset name: (body, ETag). Replaced as a whole on reload, so readers never see a mix of versions.
+
+        self.version = None
+        self.payloads = {}
+        self.loadLock = threading.Lock()
+
+        self.checkTask = Tools.PeriodicTask("ReferenceDataCheck", self.checkInterval, self.check)
+
+    def readVersion(self) -> str:
+
+        # The version file is on the volume mounted into the container, so a bump needs no rebuild.
+        # config.mpl is baked into the image and only gives the version until the file exists.
+
+        try:
+
+            with open(self.versionFile, "r") as versionFile:
+
+                version = versionFile.read().strip()
+
+            if version:
+
+                return version
+
+        except FileNotFoundError:
+
+            pass
+
+        return Tools.readConfigValue("VERSION", "1", "REFERENCE_DATA")
+
+    @staticmethod
+    def serialize(name: str, version: str, rows: tuple[tuple]) -> tuple[bytes, str]:
+
+        ''' Build the response body and its strong ETag '''
+
+        _, responseModel, listField, itemModel, fields = ReferenceDataCache.DATASETS[name]
+        items = [itemModel(**dict(zip(fields, row))) for row in rows]
+        body = responseModel(**{"Version": version, listField: items}).model_dump_json().encode()
+
+        # The digest changes with the content even if someone forgets the version bump
+
+        return body, f'"{version}-{hashlib.sha256(body).hexdigest()[:16]}"'
+
+    def load(self, version: str):
+
+        tableAdapter = TableAdapters.ReferenceTableAdapters()
+
+        try:
+
+            payloads = {
+                name: self.serialize(name, version, getattr(tableAdapter, dataset[0])())
+                for name, dataset in ReferenceDataCache.DATASETS.items()
+                }
+
+        finally:
+
+            tableAdapter.closeConnection()
+
+        self.payloads = payloads
+        self.version = version
+        self.Logger.Info(f"Reference data loaded: [version: {version}]")
+
+    def check(self):
+
+        # The version file is read again on every check, so a bump reaches every worker within CHECK_INTERVAL
+
+        version = self.readVersion()
+
+        if version == self.version:
+
+            return
+
+        with self.loadLock:
+
+            if version != self.version:
+
+                self.load(version)
+
+    def get(self, name: str) -> tuple[bytes, str] | None:
+
+        ''' Returns (body, ETag), loading on first use if the startup load failed '''
+
+        if name not in self.payloads:
+
+            try:
+
+                self.check()
+
+            except Exception as e:
+
+                self.Logger.ShowError(e, "Failed to load reference data.")
+                return None
+
+        return self.payloads.get(name)
+
+    def start(self):
+
+        try:
+
+            self.check()
+
+        except Exception as e:
+
+            # The periodic check and the first request retry the load
+
+            self.Logger.ShowError(e, "Failed to load reference data at startup.")
+
+        self.checkTask.start()
+
+    def stop(self):
+
+        self.checkTask.stop()
+
+referenceData = ReferenceDataCache()
\ No newline at end of file
@@ -1,21 +1,288 @@
+import AsyncTableAdapters
 import datetime
 import maplex
+import SessionToken
 import TableAdapters
+import threading
+import Tools
 
-class SessionUpdate:
+#####################################
+# Session row cache: session uuid -> ((user_id, company_id, access_level, logout_datetime),)
+
+sessionCache = Tools.TTLCache(
+    "SessionInfo",
+    Tools.readConfigValue("MAX_SIZE", 10000, "SESSION_CACHE"),
+    Tools.readConfigValue("TTL", 60, "SESSION_CACHE"),
+    "SessionInfo"
+    )
+
+def extendCachedSession(token: str, sessionInfo: tuple, update: str):
+
+    ''' Mirror an UpdateLogout(token, update) in the cached row '''
+
+    hours, minutes, seconds = (int(value) for value in update.split(":"))
+    logoutDatetime = datetime.datetime.now() + datetime.timedelta(hours=hours, minutes=minutes, seconds=seconds)
+    sessionCache.set(token, ((*sessionInfo[0][:3], logoutDatetime),))
+
+#####################################
+# Write-behind buffer for sliding session expiry
+
+class SessionTouchBuffer:
+
+    ''' Collects session touches and writes them in batches from a background thread '''
 
     def __init__(self):
 
         # Logging objects
 
+        self.Logger = maplex.Logger("SessionTouchBuffer")
+
+        # Settings
+
+        self.extendBelow = datetime.timedelta(minutes=Tools.readConfigValue("EXTEND_BELOW", 25, "SESSION_TOUCH"))
+        self.flushInterval = Tools.readConfigValue("FLUSH_INTERVAL", 5, "SESSION_TOUCH")
+        self.batchSize = max(Tools.readConfigValue("BATCH_SIZE", 500, "SESSION_TOUCH"), 1)
+
+        # Sessions closer to their end than this are written at once,
+        # so a pending touch cannot lose the race against the expiry
+
+        self.writeNowBelow = datetime.timedelta(seconds=self.flushInterval * 2)
+
+        # Pending touches: token -> update time span
+
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.flushTask = Tools.PeriodicTask("SessionTouchFlush", self.flushInterval, self.flush)
+
+    def touch(self, token: str, logoutDatetime: datetime.datetime, update: str) -> str:
+
+        ''' Register a session touch. Returns "skipped", "queued" or "now" (the caller writes it). '''
+
+        remaining = logoutDatetime - datetime.datetime.now()
+
+        if remaining > self.extendBelow:
+
+            return "skipped"
+
+        if remaining < self.writeNowBelow or not self.flushTask.isRunning():
+
+            self.discard(token)
+            return "now"
+
+        with self.lock:
+
+            self.pending[token] = update
+
+        return "queued"
+
+    def discard(self, token: str):
+
+        with self.lock:
+
+            self.pending.pop(token, None)
+
+    def flush(self):
+
+        with self.lock:
+
+            pending = self.pending
+            self.pending = {}
+
+        if not pending:
+
+            return
+
+        # Group tokens by update time span
+
+        tokensByUpdate = {}
+
+        for token, update in pending.items():
+
+            tokensByUpdate.setdefault(update, []).append(token)
+
+        try:
+
+            tableAdapter = TableAdapters.SessionInfoTableAdapters()
+
+            for update, tokens in tokensByUpdate.items():
+
+                for i in range(0, len(tokens), self.batchSize):
+
+                    tableAdapter.UpdateLogoutBatch(tokens[i:i + self.batchSize], update)
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, f"Failed to flush {len(pending)} session touches.")
+
+        finally:
+
+            if 'tableAdapter' in locals():
+
+                tableAdapter.closeConnection()
+
+    def start(self):
+
+        self.flushTask.start()
+
+    def stop(self):
+
+        self.flushTask.stop()
+
+        # Write whatever is still pending
+
+        self.flush()
+
+sessionTouchBuffer = SessionTouchBuffer()
+
+#####################################
+# Signed session tokens
+
+class SessionRevocationList:
+
+    ''' Sessions that ended before their signed token expires '''
+
+    def __init__(self):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger("SessionRevocationList")
+
+        # Settings: tokens expire at most one session length after they are issued
+
+        self.window = datetime.timedelta(minutes=Tools.readConfigValue("REVOCATION_WINDOW", 60, "SESSION_TOKEN"))
+        self.refreshInterval = Tools.readConfigValue("REVOCATION_REFRESH", 5, "SESSION_TOKEN")
+
+        # Revoked sessions: session uuid -> revoked at
+
+        self.revoked = {}
+        self.localRevoked = {}
+        self.lastRefresh = None
+        self.lock = threading.Lock()
+        self.refreshTask = Tools.PeriodicTask("SessionRevocationRefresh", self.refreshInterval, self.refresh)
+
+    def revoke(self, sessionId: str):
+
+        # The token claims no longer describe this session
+
+        with self.lock:
+
+            self.localRevoked[sessionId] = datetime.datetime.now()
+
+    def isRevoked(self, sessionId: str) -> bool:
+
+        with self.lock:
+
+            return sessionId in self.revoked or sessionId in self.localRevoked
+
+    def isFresh(self) -> bool:
+
+        # Local validation is only trusted while the list is kept up to date
+
+        with self.lock:
+
+            return self.lastRefresh is not None and datetime.datetime.now() - self.lastRefresh < datetime.timedelta(seconds=self.refreshInterval * 3)
+
+    def refresh(self):
+
+        since = datetime.datetime.now() - self.window
+
+        try:
+
+            tableAdapter = TableAdapters.SessionInfoTableAdapters()
+            endedSessions = tableAdapter.selectEndedSessions(since)
+
+        finally:
+
+            if 'tableAdapter' in locals():
+
+                tableAdapter.closeConnection()
+
+        with self.lock:
+
+            self.revoked = {session[0]: session[1] for session in endedSessions}
+            self.localRevoked = {sessionId: revokedAt for sessionId, revokedAt in self.localRevoked.items() if revokedAt > since}
+            self.lastRefresh = datetime.datetime.now()
+
+    def start(self):
+
+        try:
+
+            self.refresh()
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to load the session revocation list.")
+
+        self.refreshTask.start()
+
+    def stop(self):
+
+        self.refreshTask.stop()
+
+sessionTokens = SessionToken.SessionToken()
+signedTokens = SessionToken.SessionToken.enabled()
+sessionRevocationList = SessionRevocationList()
+
+def resolveSession(token: str | None) -> tuple[str | None, tuple[tuple] | None]:
+
+    ''' Resolve a token to its session UUID, plus its session row when a signed token can be trusted locally '''
+
+    if not sessionTokens.isSigned(token):
+
+        return token, None
+
+    claims = sessionTokens.verify(token)
+
+    if claims is None:
+
+        return None, None
+
+    if claims["exp"] >= datetime.datetime.now() and sessionRevocationList.isFresh() and not sessionRevocationList.isRevoked(claims["sid"]):
+
+        return claims["sid"], ((claims["uid"], claims["cid"], claims["lvl"], claims["exp"]),)
+
+    # Expired or revoked claims: the database decides
+
+    return claims["sid"], None
+
+class SessionUpdate:
+
+    def __init__(self, connection=None):
+
+        # Logging objects
+
         self.Logger = maplex.Logger("UserLogout")
 
+        # Request connection (None: use a pooled connection per call)
+
+        self.connection = connection
+
+    @staticmethod
+    def dropSession(sessionId: str):
+
+        # The row changed in the database, so every worker drops its copy
+
+        sessionCache.invalidate(sessionId, force=True)
+        sessionRevocationList.revoke(sessionId)
+
     def Update(self, token: str, update: str) -> bool:
 
         try:
 
-            tableAdapter = TableAdapters.SessionInfoTableAdapters()
-            tableAdapter.UpdateLogout(token, update)
+            sessionId = sessionTokens.sessionIdOf(token)
+
+            if sessionId is None:
+
+                self.Logger.Warn("Invalid session token.")
+                return False
+
+            tableAdapter = TableAdapters.SessionInfoTableAdapters(self.connection)
+            sessionTouchBuffer.discard(sessionId)
+            tableAdapter.UpdateLogout(sessionId, update)
+
+            # Other workers reload the row once it is committed, not before
+
+            tableAdapter.afterCommit(lambda: self.dropSession(sessionId))
             return True
 
         except Exception as e:
@@ -29,38 +296,29 @@ class SessionUpdate:
 
                 tableAdapter.closeConnection()
 
-    def CreateNewSession(self, userInfo) -> tuple | None:
+    def CreateNewSession(self, userInfo) -> dict | None:
 
         ''' Create new session for the user '''
 
         try:
 
-            tableAdapter = TableAdapters.SessionInfoTableAdapters()
-            sessionId = tableAdapter.CreateNewSession(userInfo)
-
-            if not sessionId:
+            tableAdapter = TableAdapters.SessionInfoTableAdapters(self.connection)
 
-                self.Logger.Error("Failed to create new session.")
-                return None
+            # The new session row comes back from the insert itself
 
-            sessionInfo = tableAdapter.selectSessionInfo(sessionId)
+            sessionInfo = tableAdapter.CreateNewSession(userInfo)
 
             if not sessionInfo:
 
-                self.Logger.Error("Failed to get new session info.")
-                return None
-            
-            elif len(sessionInfo) > 1:
-
-                self.Logger.Error("Duplicate new session info.")
+                self.Logger.Error("Failed to create new session.")
                 return None
 
             sessionInfoDict = {
-                "Token": sessionId,
-                "UserID": sessionInfo[0][0],
-                "CompanyID": sessionInfo[0][1],
-                "AccessLevel": sessionInfo[0][2],
-                "LogoutTime": sessionInfo[0][3]
+                "Token": sessionTokens.issue(*sessionInfo) if signedTokens else sessionInfo[0],
+                "UserID": sessionInfo[1],
+                "CompanyID": sessionInfo[2],
+                "AccessLevel": sessionInfo[3],
+                "LogoutTime": sessionInfo[4]
             }
 
             return sessionInfoDict
@@ -78,30 +336,63 @@ class SessionUpdate:
 
 class CheckSession:
 
-    def __init__(self, token):
+    def __init__(self, token, connection=None):
 
         # Logging objects
 
         self.Logger = maplex.Logger("CheckSession")
 
         self.token = token
+        self.sessionId = sessionTokens.sessionIdOf(token)
 
         # Table adapter
 
-        self.tableAdapter = TableAdapters.SessionInfoTableAdapters()
+        self.tableAdapter = TableAdapters.SessionInfoTableAdapters(connection)
 
     def close(self):
 
         self.tableAdapter.closeConnection()
         self.Logger.Info("Closed CheckSession object.")
 
+    def selectSessionInfo(self) -> tuple[tuple] | None:
+
+        # Signed tokens are answered from their claims while they are valid.
+        # Cached rows are only trusted until their logout time.
+        # Past it, another worker may have extended the session, so read it again.
+
+        sessionId, sessionInfo = resolveSession(self.token)
+
+        if sessionInfo is not None or sessionId is None:
+
+            return sessionInfo
+
+        cachedInfo = sessionCache.get(sessionId)
+
+        if cachedInfo is not None and cachedInfo[0][3] >= datetime.datetime.now():
+
+            return cachedInfo
+
+        sessionInfo = self.tableAdapter.selectSessionInfo(sessionId)
+
+        if sessionInfo and sessionInfo[0][3] >= datetime.datetime.now():
+
+            sessionCache.set(sessionId, sessionInfo)
+
+        elif cachedInfo is not None:
+
+            # Drop the ended row. Nothing was cached for a miss, so there is nothing to tell the other workers.
+
+            sessionCache.invalidate(sessionId)
+
+        return sessionInfo
+
     def IsValid(self, updateSessionTime=True):
 
         try:
 
             # Get session info
 
-            sessionInfo = self.tableAdapter.selectSessionInfo(self.token)
+            sessionInfo = self.selectSessionInfo()
 
             if not sessionInfo:
 
@@ -119,7 +410,15 @@ class CheckSession:
 
             if updateSessionTime:
 
-                self.tableAdapter.UpdateLogout(self.token, "00:30:00")
+                touchResult = sessionTouchBuffer.touch(self.sessionId, sessionInfo[0][3], "00:30:00")
+
+                if touchResult == "now":
+
+                    self.tableAdapter.UpdateLogout(self.sessionId, "00:30:00")
+
+                if touchResult != "skipped":
+
+                    extendCachedSession(self.sessionId, sessionInfo, "00:30:00")
 
             return True
 
@@ -136,7 +435,7 @@ class CheckSession:
 
             # Get session info
 
-            sessionInfo = self.tableAdapter.selectSessionInfo(self.token)
+            sessionInfo = self.selectSessionInfo()
 
             if not sessionInfo:
 
@@ -170,4 +469,237 @@ class CheckSession:
         except Exception as e:
 
             self.Logger.ShowError(e, "Failed to check if user is active.")
-            raise
\ No newline at end of file
+            raise
+
+    def activeUserIds(self, userIds: list[int]) -> set[int]:
+
+        """ The users among userIds with a live session. """
+
+        return self.tableAdapter.selectActiveUserIds(userIds)
+
+class AsyncSessionUpdate:
+
+    def __init__(self, connection=None):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger("AsyncUserLogout")
+
+        # Request connection (None: use a pooled connection per call)
+
+        self.connection = connection
+
+    async def Update(self, token: str, update: str) -> bool:
+
+        try:
+
+            sessionId = sessionTokens.sessionIdOf(token)
+
+            if sessionId is None:
+
+                self.Logger.Warn("Invalid session token.")
+                return False
+
+            tableAdapter = await AsyncTableAdapters.AsyncSessionInfoTableAdapters.create(self.connection)
+            sessionTouchBuffer.discard(sessionId)
+            await tableAdapter.UpdateLogout(sessionId, update)
+
+            # Other workers reload the row once it is committed, not before
+
+            tableAdapter.afterCommit(lambda: SessionUpdate.dropSession(sessionId))
+            return True
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to logout.")
+            raise
+
+        finally:
+
+            if 'tableAdapter' in locals():
+
+                await tableAdapter.closeConnection()
+
+    async def CreateNewSession(self, userInfo) -> dict | None:
+
+        ''' Create new session for the user '''
+
+        try:
+
+            tableAdapter = await AsyncTableAdapters.AsyncSessionInfoTableAdapters.create(self.connection)
+
+            # The new session row comes back from the insert itself
+
+            sessionInfo = await tableAdapter.CreateNewSession(userInfo)
+
+            if not sessionInfo:
+
+                self.Logger.Error("Failed to create new session.")
+                return None
+
+            sessionInfoDict = {
+                "Token": sessionTokens.issue(*sessionInfo) if signedTokens else sessionInfo[0],
+                "UserID": sessionInfo[1],
+                "CompanyID": sessionInfo[2],
+                "AccessLevel": sessionInfo[3],
+                "LogoutTime": sessionInfo[4]
+            }
+
+            return sessionInfoDict
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to create new session.")
+            raise
+
+        finally:
+
+            if 'tableAdapter' in locals():
+
+                await tableAdapter.closeConnection()
+
+class AsyncCheckSession:
+
+    def __init__(self, token, tableAdapter: AsyncTableAdapters.AsyncSessionInfoTableAdapters):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger("AsyncCheckSession")
+
+        self.token = token
+        self.sessionId = sessionTokens.sessionIdOf(token)
+
+        # Table adapter
+
+        self.tableAdapter = tableAdapter
+
+    @classmethod
+    async def create(cls, token, connection=None) -> "AsyncCheckSession":
+
+        return cls(token, await AsyncTableAdapters.AsyncSessionInfoTableAdapters.create(connection))
+
+    async def close(self):
+
+        await self.tableAdapter.closeConnection()
+        self.Logger.Info("Closed AsyncCheckSession object.")
+
+    async def selectSessionInfo(self) -> tuple[tuple] | None:
+
+        # Same cache rules as CheckSession.selectSessionInfo
+
+        sessionId, sessionInfo = resolveSession(self.token)
+
+        if sessionInfo is not None or sessionId is None:
+
+            return sessionInfo
+
+        cachedInfo = sessionCache.get(sessionId)
+
+        if cachedInfo is not None and cachedInfo[0][3] >= datetime.datetime.now():
+
+            return cachedInfo
+
+        sessionInfo = await self.tableAdapter.selectSessionInfo(sessionId)
+
+        if sessionInfo and sessionInfo[0][3] >= datetime.datetime.now():
+
+            sessionCache.set(sessionId, sessionInfo)
+
+        elif cachedInfo is not None:
+
+            # Drop the ended row. Nothing was cached for a miss, so there is nothing to tell the other workers.
+
+            sessionCache.invalidate(sessionId)
+
+        return sessionInfo
+
+    async def IsValid(self, updateSessionTime=True):
+
+        try:
+
+            # Get session info
+
+            sessionInfo = await self.selectSessionInfo()
+
+            if not sessionInfo:
+
+                self.Logger.Warn("Invalid session info: Session not found.")
+                return False
+
+            # Check expire time
+
+            currentTime = datetime.datetime.now()
+
+            if sessionInfo[0][3] < currentTime:
+
+                self.Logger.Warn("Invalid session info: Session expired.")
+                return False
+
+            if updateSessionTime:
+
+                touchResult = sessionTouchBuffer.touch(self.sessionId, sessionInfo[0][3], "00:30:00")
+
+                if touchResult == "now":
+
+                    await self.tableAdapter.UpdateLogout(self.sessionId, "00:30:00")
+
+                if touchResult != "skipped":
+
+                    extendCachedSession(self.sessionId, sessionInfo, "00:30:00")
+
+            return True
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to check session.")
+            raise
+
+    async def GetSessionInfo(self):
+
+        ''' Get session info: user_id, company_id, access_level, logout_time '''
+
+        try:
+
+            # Get session info
+
+            sessionInfo = await self.selectSessionInfo()
+
+            if not sessionInfo:
+
+                self.Logger.Warn("Invalid session info: Session not found.")
+                return None
+
+            return sessionInfo[0]
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to get session info.")
+            raise
+
+    async def isActive(self, userId: int) -> bool:
+
+        """ Check if the user is active. """
+
+        try:
+
+            logoutDatetime = datetime.datetime.now()
+            sessionInfo = await self.tableAdapter.selectSessionInfoByTimeAndUser(userId, "after", logoutDatetime)
+
+            if not sessionInfo:
+
+                self.Logger.Info(f"User {userId} is not active.")
+                return False
+
+            self.Logger.Info(f"User {userId} is active.")
+            return True
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to check if user is active.")
+            raise
+
+    async def activeUserIds(self, userIds: list[int]) -> set[int]:
+
+        """ The users among userIds with a live session. """
+
+        return await self.tableAdapter.selectActiveUserIds(userIds)
\ No newline at end of file
@@ -0,0 +1,281 @@
+import datetime
+import maplex
+import signal
+import sys
+import TableAdapters
+import time
+import Tools
+
+class SessionArchiver:
+
+    ''' Moves expired sessions from SessionInfo into the month-partitioned SessionInfoHistory '''
+
+    LOCK_NAME = "MobiusDB.session_archive"
+    HISTORY_TABLE = "SessionInfoHistory"
+    COLUMNS = "session_id, session_uuid, user_id, user_name, company_id, access_level, login_datetime, logout_datetime"
+
+    def __init__(self):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger("SessionArchiver")
+
+        # Settings: the revocation list still reads recently ended sessions, so they are kept at least that long
+
+        self.enabled = Tools.readConfigValue("ENABLED", True, "SESSION_RETENTION")
+        self.interval = Tools.readConfigValue("INTERVAL", 3600, "SESSION_RETENTION")
+        self.graceMinutes = max(Tools.readConfigValue("GRACE_MINUTES", 1440, "SESSION_RETENTION"), Tools.readConfigValue("REVOCATION_WINDOW", 60, "SESSION_TOKEN"))
+        self.batchSize = max(Tools.readConfigValue("BATCH_SIZE", 1000, "SESSION_RETENTION"), 1)
+        self.maxBatches = max(Tools.readConfigValue("MAX_BATCHES", 100, "SESSION_RETENTION"), 1)
+        self.batchPause = Tools.readConfigValue("BATCH_PAUSE", 0.1, "SESSION_RETENTION")
+        self.historyMonths = Tools.readConfigValue("HISTORY_MONTHS", 24, "SESSION_RETENTION")
+
+        self.archiveTask = Tools.PeriodicTask("SessionArchive", self.interval, self.run)
+
+    #################################
+    # Partitions
+
+    @staticmethod
+    def monthStart(date: datetime.datetime) -> datetime.date:
+
+        return datetime.date(date.year, date.month, 1)
+
+    @staticmethod
+    def addMonths(month: datetime.date, count: int) -> datetime.date:
+
+        index = month.year * 12 + month.month - 1 + count
+
+        return datetime.date(index // 12, index % 12 + 1, 1)
+
+    @staticmethod
+    def partitionName(month: datetime.date) -> str:
+
+        return f"p{month:%Y%m}"
+
+    @staticmethod
+    def partitionMonth(partitionName: str) -> datetime.date | None:
+
+        # "p_future" holds everything after the last month partition
+
+        try:
+
+            return datetime.datetime.strptime(partitionName, "p%Y%m").date()
+
+        except ValueError:
+
+            return None
+
+    @staticmethod
+    def reorganizeSql(months: list[datetime.date]) -> str:
+
+        ''' Split the catch-all partition into one partition per month '''
+
+        partitions = [
+            f"PARTITION {SessionArchiver.partitionName(month)} VALUES LESS THAN ('{SessionArchiver.addMonths(month, 1):%Y-%m-%d}')"
+            for month in months
+            ]
+        partitions.append("PARTITION p_future VALUES LESS THAN (MAXVALUE)")
+
+        return f"ALTER TABLE {SessionArchiver.HISTORY_TABLE} REORGANIZE PARTITION p_future INTO ({', '.join(partitions)});"
+
+    def partitionMonths(self, cursor) -> list[datetime.date]:
+
+        cursor.execute(
+            "SELECT PARTITION_NAME FROM information_schema.PARTITIONS WHERE TABLE_SCHEMA=DATABASE() AND TABLE_NAME=%s;",
+            (SessionArchiver.HISTORY_TABLE,)
+            )
+
+        return sorted(month for month in (self.partitionMonth(row[0]) for row in cursor.fetchall()) if month is not None)
+
+    def ensurePartitions(self, cursor, oldest: datetime.datetime | None):
+
+        ''' Add month partitions from the oldest session to be archived through next month '''
+
+        existingMonths = self.partitionMonths(cursor)
+        lastMonth = self.addMonths(self.monthStart(datetime.datetime.now()), 1)
+        month = self.monthStart(oldest) if oldest is not None else lastMonth
+
+        if existingMonths:
+
+            # Older sessions fall into the first partition
+
+            month = max(month, self.addMonths(existingMonths[-1], 1))
+
+        newMonths = []
+
+        while month <= lastMonth:
+
+            newMonths.append(month)
+            month = self.addMonths(month, 1)
+
+        if newMonths:
+
+            self.Logger.Info(f"Adding history partitions: {self.partitionName(newMonths[0])} - {self.partitionName(newMonths[-1])}")
+            cursor.execute(self.reorganizeSql(newMonths))
+
+    def dropExpiredPartitions(self, cursor) -> int:
+
+        # Dropping a partition is a metadata change, unlike deleting its rows
+
+        if self.historyMonths <= 0:
+
+            return 0
+
+        oldestKept = self.addMonths(self.monthStart(datetime.datetime.now()), -self.historyMonths)
+        expired = [self.partitionName(month) for month in self.partitionMonths(cursor) if month < oldestKept]
+
+        if expired:
+
+            self.Logger.Info(f"Dropping expired history partitions: {', '.join(expired)}")
+            cursor.execute(f"ALTER TABLE {SessionArchiver.HISTORY_TABLE} DROP PARTITION {', '.join(expired)};")
+
+        return len(expired)
+
+    #################################
+    # Archive
+
+    def archiveBatch(self, connection, cursor) -> int:
+
+        ''' Move one batch of expired sessions in one transaction. Returns the number moved. '''
+
+        try:
+
+            cursor.execute(
+                "SELECT session_id FROM SessionInfo WHERE logout_datetime<DATE_SUB(CURRENT_TIMESTAMP, INTERVAL %s MINUTE) "
+                "ORDER BY logout_datetime LIMIT %s FOR UPDATE;",
+                (self.graceMinutes, self.batchSize)
+                )
+            sessionIds = [row[0] for row in cursor.fetchall()]
+
+            if not sessionIds:
+
+                connection.rollback()
+                return 0
+
+            placeholders = ", ".join(["%s"] * len(sessionIds))
+            cursor.execute(
+                f"INSERT INTO {SessionArchiver.HISTORY_TABLE} ({SessionArchiver.COLUMNS}) "
+                f"SELECT {SessionArchiver.COLUMNS} FROM SessionInfo WHERE session_id IN ({placeholders});",
+                sessionIds
+                )
+            cursor.execute(f"DELETE FROM SessionInfo WHERE session_id IN ({placeholders});", sessionIds)
+            connection.commit()
+
+            return len(sessionIds)
+
+        except Exception:
+
+            connection.rollback()
+            raise
+
+    def run(self) -> int:
+
+        ''' Archive expired sessions in bounded batches. Returns the number archived. '''
+
+        connection = TableAdapters.DbConnection().connectMaintenance()
+        cursor = connection.cursor()
+        archivedCount = 0
+
+        try:
+
+            # Only one archive runs at a time, also with several maintenance containers or a manual run
+
+            cursor.execute("SELECT GET_LOCK(%s, 0);", (SessionArchiver.LOCK_NAME,))
+
+            if cursor.fetchone()[0] != 1:
+
+                self.Logger.Info("Session archive is running on another worker.")
+                return 0
+
+            try:
+
+                cursor.execute("SELECT MIN(logout_datetime) FROM SessionInfo;")
+                self.ensurePartitions(cursor, cursor.fetchone()[0])
+
+                for _ in range(self.maxBatches):
+
+                    if self.archiveTask.stopEvent.is_set():
+
+                        break
+
+                    movedCount = self.archiveBatch(connection, cursor)
+                    archivedCount += movedCount
+
+                    if movedCount < self.batchSize:
+
+                        break
+
+                    # Leave room for the login traffic between batches
+
+                    time.sleep(self.batchPause)
+
+                self.dropExpiredPartitions(cursor)
+                self.Logger.Info(f"Archived {archivedCount} sessions.")
+
+                return archivedCount
+
+            finally:
+
+                cursor.execute("SELECT RELEASE_LOCK(%s);", (SessionArchiver.LOCK_NAME,))
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, f"Session archive failed after {archivedCount} sessions.")
+            raise
+
+        finally:
+
+            cursor.close()
+            connection.close()
+
+    def serve(self):
+
+        ''' Archive now and then every interval until SIGTERM. Runs in the maintenance container, not in the API. '''
+
+        stopEvent = self.archiveTask.stopEvent
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopEvent.set())
+
+        if not self.enabled:
+
+            self.Logger.Info("Session archive is disabled.")
+            stopEvent.wait()
+            return
+
+        if TableAdapters.DbConnection().readMaintenanceCredentials() is None:
+
+            self.Logger.Warn("Maintenance database user is not configured. Session archive is disabled.")
+            stopEvent.wait()
+            return
+
+        try:
+
+            self.run()
+
+        except Exception:
+
+            # Logged by run, the next interval retries
+
+            pass
+
+        self.archiveTask.run()
+        self.Logger.Info("Session archive stopped.")
+
+sessionArchiver = SessionArchiver()
+
+if __name__ == "__main__":
+
+    # "--serve" keeps archiving every interval (maintenance container).
+    # Without it, run one archive pass now, e.g. from cron or after a long downtime.
+
+    if "--serve" in sys.argv[1:]:
+
+        sessionArchiver.serve()
+        sys.exit(0)
+
+    try:
+
+        sessionArchiver.run()
+
+    except Exception:
+
+        sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,123 @@
+import base64
+import datetime
+import hashlib
+import hmac
+import json
+import maplex
+import os
+import threading
+import Tools
+
+class SessionToken:
+
+    ''' Signed session tokens: "v1.<claims>.<signature>" '''
+
+    PREFIX = "v1"
+
+    # The HMAC key is read from the secret file once per process
+
+    key = None
+    keyLock = threading.Lock()
+
+    def __init__(self):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger("SessionToken")
+
+    @classmethod
+    def enabled(cls) -> bool:
+
+        return Tools.readConfigValue("SIGNED", False, "SESSION_TOKEN") and cls().readKey() is not None
+
+    def readKey(self) -> bytes | None:
+
+        with SessionToken.keyLock:
+
+            if SessionToken.key is None:
+
+                try:
+
+                    with open(os.getenv("SESSION_KEY"), "rb") as keyFile:
+
+                        SessionToken.key = keyFile.read().strip()
+
+                except Exception as e:
+
+                    self.Logger.ShowError(e, "Failed to read session token key. Signed tokens are disabled.")
+                    SessionToken.key = b""
+
+            return SessionToken.key or None
+
+    @staticmethod
+    def encode(data: bytes) -> str:
+
+        return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+    @staticmethod
+    def decode(data: str) -> bytes:
+
+        return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+    def sign(self, payload: str) -> str:
+
+        return self.encode(hmac.new(self.readKey(), f"{SessionToken.PREFIX}.{payload}".encode(), hashlib.sha256).digest())
+
+    def issue(self, sessionId: str, userId: int, companyId: int | None, accessLevel: str, expiresAt: datetime.datetime) -> str:
+
+        ''' Create a signed token carrying the session claims '''
+
+        claims = {
+            "sid": sessionId,
+            "uid": userId,
+            "cid": companyId,
+            "lvl": accessLevel,
+            "exp": int(expiresAt.timestamp())
+        }
+        payload = self.encode(json.dumps(claims, separators=(",", ":")).encode())
+
+        return f"{SessionToken.PREFIX}.{payload}.{self.sign(payload)}"
+
+    @staticmethod
+    def isSigned(token: str | None) -> bool:
+
+        return token is not None and token.startswith(f"{SessionToken.PREFIX}.")
+
+    def verify(self, token: str) -> dict | None:
+
+        ''' Return the claims of a signed token, or None if the token is malformed or the signature does not match '''
+
+        try:
+
+            prefix, payload, signature = token.split(".")
+
+            if prefix != SessionToken.PREFIX or self.readKey() is None:
+
+                return None
+
+            if not hmac.compare_digest(signature, self.sign(payload)):
+
+                self.Logger.Warn("Session token signature mismatch.")
+                return None
+
+            claims = json.loads(self.decode(payload))
+            claims["exp"] = datetime.datetime.fromtimestamp(claims["exp"])
+
+            return claims
+
+        except Exception as e:
+
+            self.Logger.Warn(f"Malformed session token: {e}")
+            return None
+
+    def sessionIdOf(self, token: str | None) -> str | None:
+
+        ''' Session UUID behind a token. Bare UUID tokens are returned as they are. '''
+
+        if not self.isSigned(token):
+
+            return token
+
+        claims = self.verify(token)
+
+        return claims["sid"] if claims else None
@@ -1,12 +1,39 @@
+import collections
 import datetime
 from typing import Literal
 import maplex
 import os
 import pymysql
+import threading
+import time
 import Tools
+import uuid
 
 class DbConnection:
 
+    # Credentials are read from the secret files once per process
+
+    credentials = None
+    credentialsLock = threading.Lock()
+
+    def readCredentials(self) -> tuple[str, str]:
+
+        with DbConnection.credentialsLock:
+
+            if DbConnection.credentials is None:
+
+                with open(os.getenv("DB_USER"), "r") as userNameFile:
+                
+                    userName = userNameFile.read().strip()
+
+                with open(os.getenv("DB_PASSWORD"), "r") as passWdFile:
+
+                    passWd = passWdFile.read().strip()
+
+                DbConnection.credentials = (userName, passWd)
+
+            return DbConnection.credentials
+
     def connect(self):
 
         database = "MobiusDB"
@@ -15,13 +42,7 @@ class DbConnection:
 
         try:
 
-            with open(os.getenv("DB_USER"), "r") as userNameFile:
-            
-                userName = userNameFile.read().strip()
-
-            with open(os.getenv("DB_PASSWORD"), "r") as passWdFile:
-
-                passWd = passWdFile.read().strip()
+            userName, passWd = self.readCredentials()
 
             # DB connection
 
@@ -31,19 +52,298 @@ class DbConnection:
 
             raise
 
-class UserTableAdapters:
+    def readMaintenanceCredentials(self) -> tuple[str, str] | None:
+
+        # Schema changes and archiving need more privileges than the application user has
+
+        if os.getenv("DB_MAINTENANCE_USER") is None or os.getenv("DB_MAINTENANCE_PASSWORD") is None:
+
+            return None
+
+        with open(os.getenv("DB_MAINTENANCE_USER"), "r") as userNameFile:
+
+            userName = userNameFile.read().strip()
+
+        with open(os.getenv("DB_MAINTENANCE_PASSWORD"), "r") as passWdFile:
+
+            passWd = passWdFile.read().strip()
+
+        return userName, passWd
+
+    def connectMaintenance(self):
+
+        credentials = self.readMaintenanceCredentials()
+
+        if credentials is None:
+
+            raise PermissionError("Maintenance database user is not configured.")
+
+        userName, passWd = credentials
+
+        return pymysql.connect(user=userName, passwd=passWd, host="pj-mobius-db", database="MobiusDB")
+
+class ConnectionPool:
+
+    ''' Process-wide bounded pool of database connections '''
+
+    instance = None
+    instanceLock = threading.Lock()
+
+    @classmethod
+    def getInstance(cls) -> "ConnectionPool":
+
+        with cls.instanceLock:
+
+            if cls.instance is None:
+
+                cls.instance = cls()
+
+            return cls.instance
 
     def __init__(self):
 
         # Logging objects
 
-        self.Logger = maplex.Logger("TableAdapters: Users")
+        self.Logger = maplex.Logger("TableAdapters: ConnectionPool")
+
+        # Pool settings
+
+        self.minSize = Tools.readConfigValue("MIN_SIZE", 2, "DB_POOL")
+        self.maxSize = max(Tools.readConfigValue("MAX_SIZE", 10, "DB_POOL"), 1)
+        self.maxLifetime = Tools.readConfigValue("MAX_LIFETIME", 1800, "DB_POOL")
+        self.checkoutTimeout = Tools.readConfigValue("CHECKOUT_TIMEOUT", 30, "DB_POOL")
+        self.prePing = Tools.readConfigValue("PRE_PING", True, "DB_POOL")
+        self.minSize = min(self.minSize, self.maxSize)
+
+        # Pool state: idle connections and their creation time
+
+        self.idleConnections = collections.deque()
+        self.createdAt = {}
+        self.poolSize = 0
+        self.condition = threading.Condition()
+
+        self.Logger.Info(f"Connection pool created: [min: {self.minSize}, max: {self.maxSize}, lifetime: {self.maxLifetime}s]")
+
+        try:
+
+            for i in range(self.minSize):
+
+                self.idleConnections.append(self.openConnection())
+
+        except Exception as e:
+
+            # The pool can still open connections on demand
+
+            self.Logger.ShowError(e, "Failed to open initial pool connections.")
+
+    def openConnection(self):
+
+        connection = DbConnection().connect()
+
+        with self.condition:
+
+            self.createdAt[connection] = time.monotonic()
+            self.poolSize += 1
+
+        return connection
+
+    def discardConnection(self, connection):
 
         try:
 
-            self.connection = DbConnection().connect()
+            connection.close()
+
+        except Exception:
+
+            pass
+
+        with self.condition:
+
+            self.createdAt.pop(connection, None)
+            self.poolSize -= 1
+            self.condition.notify()
+
+    def isExpired(self, connection) -> bool:
+
+        createdAt = self.createdAt.get(connection)
+        return createdAt is None or time.monotonic() - createdAt > self.maxLifetime
+
+    def isAlive(self, connection) -> bool:
+
+        if not self.prePing:
+
+            return True
+
+        try:
+
+            connection.ping(reconnect=False)
+            return True
+
+        except Exception as e:
+
+            self.Logger.Warn(f"Pooled connection failed pre-ping: {e}")
+            return False
+
+    def checkout(self):
+
+        ''' Get a connection from the pool. Blocks until one is free or the timeout passes. '''
+
+        deadline = time.monotonic() + self.checkoutTimeout
+
+        while True:
+
+            connection = None
+            openNew = False
+
+            with self.condition:
+
+                while not self.idleConnections and self.poolSize >= self.maxSize:
+
+                    remaining = deadline - time.monotonic()
+
+                    if remaining <= 0:
+
+                        raise TimeoutError("Timed out waiting for a database connection.")
+
+                    self.condition.wait(remaining)
+
+                if self.idleConnections:
+
+                    connection = self.idleConnections.pop()
+
+                else:
+
+                    # Reserve a slot before connecting outside the lock
+
+                    self.poolSize += 1
+                    openNew = True
+
+            if openNew:
+
+                try:
+
+                    connection = DbConnection().connect()
+
+                except Exception:
+
+                    with self.condition:
+
+                        self.poolSize -= 1
+                        self.condition.notify()
+
+                    raise
+
+                with self.condition:
+
+                    self.createdAt[connection] = time.monotonic()
+
+                return connection
+
+            if self.isExpired(connection) or not self.isAlive(connection):
+
+                self.Logger.Debug("Recycling pooled connection.")
+                self.discardConnection(connection)
+                continue
+
+            return connection
+
+    def checkin(self, connection):
+
+        ''' Return a connection to the pool '''
+
+        try:
+
+            # End any open transaction so the next user gets a fresh snapshot
+
+            connection.rollback()
+
+        except Exception as e:
+
+            self.Logger.Warn(f"Discarding broken connection on check in: {e}")
+            self.discardConnection(connection)
+            return
+
+        if self.isExpired(connection):
+
+            self.discardConnection(connection)
+            return
+
+        with self.condition:
+
+            self.idleConnections.append(connection)
+            self.condition.notify()
+
+class BaseConnection:
+
+    ''' Driver connection shared by the adapters of a unit of work '''
+
+    def __init__(self, connection):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger("TableAdapters: Connection")
+
+        # Work that must not be seen before the transaction is durable, such as cache invalidations
+
+        self.connection = connection
+        self.commitHooks = []
+
+    def afterCommit(self, callback):
+
+        self.commitHooks.append(callback)
+
+    def runCommitHooks(self):
+
+        commitHooks = self.commitHooks
+        self.commitHooks = []
+
+        for callback in commitHooks:
+
+            try:
+
+                callback()
+
+            except Exception as e:
+
+                # The transaction is committed, so the request still succeeds
+
+                self.Logger.ShowError(e, "Failed to run a commit hook.")
+
+class SyncConnection(BaseConnection):
+
+    ''' pymysql connection of a unit of work '''
+
+    def cursor(self, cursorClass=None):
+
+        return self.connection.cursor(cursorClass)
+
+    def commit(self):
+
+        self.connection.commit()
+        self.runCommitHooks()
+
+    def rollback(self):
+
+        self.commitHooks = []
+        self.connection.rollback()
+
+class BaseTableAdapters:
+
+    def __init__(self, loggerName: str, connection=None):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger(loggerName)
+
+        # A connection handed in by a unit of work is committed and returned by its owner
+
+        self.ownConnection = connection is None
+
+        try:
+
+            self.connection = ConnectionPool.getInstance().checkout() if self.ownConnection else connection
             self.cursor = self.connection.cursor()
-            self.Logger.Info("Database connection established.")
+            self.Logger.Info("Database connection checked out.")
 
         except Exception as e:
 
@@ -55,24 +355,97 @@ class UserTableAdapters:
         try:
 
             self.cursor.close()
-            self.connection.close()
-            self.Logger.Info("Database connection closed.")
+
+            if self.ownConnection:
+
+                ConnectionPool.getInstance().checkin(self.connection)
+                self.Logger.Info("Database connection returned to the pool.")
 
         except Exception as e:
 
             self.Logger.ShowError(e, "Failed to close database connection.")
             raise
 
+    def commit(self):
+
+        # Statements run inside a unit of work are committed once at the end of the request
+
+        if self.ownConnection:
+
+            self.connection.commit()
+
+    def rollback(self):
+
+        if self.ownConnection:
+
+            self.connection.rollback()
+
+    def afterCommit(self, callback):
+
+        # Writes on an own connection are committed before they return
+
+        if self.ownConnection:
+
+            callback()
+
+        else:
+
+            self.connection.afterCommit(callback)
+
+    def savepoint(self, name: str):
+
+        # A part of the request transaction that can be undone on its own
+
+        self.cursor.execute(f"SAVEPOINT {name};")
+
+    def rollbackToSavepoint(self, name: str):
+
+        self.cursor.execute(f"ROLLBACK TO SAVEPOINT {name};")
+
+    def releaseSavepoint(self, name: str):
+
+        self.cursor.execute(f"RELEASE SAVEPOINT {name};")
+
+    def streamRows(self, sql: str, replaceList: list, chunkSize: int = 500):
+
+        ''' Yield the result in chunks from an unbuffered server-side cursor '''
+
+        streamCursor = self.connection.cursor(pymysql.cursors.SSCursor)
+
+        try:
+
+            streamCursor.execute(sql, replaceList)
+
+            while True:
+
+                rows = streamCursor.fetchmany(chunkSize)
+
+                if not rows:
+
+                    break
+
+                yield rows
+
+        finally:
+
+            streamCursor.close()
+
+class UserTableAdapters(BaseTableAdapters):
+
+    def __init__(self, connection=None):
+
+        super().__init__("TableAdapters: Users", connection)
+
     #######################################
     # Insert
 
-    def insertUser(self, userName: str, eMail: str, userPassword: str, initialPassword: int=1, accessLevel: str="user", companyId: int | None = None, userStatus: str | None = None, createUserId: int | None = None) -> bool:
+    def insertUser(self, userName: str, eMail: str, userPassword: str, initialPassword: int=1, accessLevel: str="user", companyId: int | None = None, userStatus: str | None = None, createUserId: int | None = None) -> int:
 
         try:
 
             # Hash password
 
-            hashedPassword = Tools.stringHasher().hashString(userPassword, userName)
+            hashedPassword = Tools.HashExecutor.getInstance().hash(userPassword)
 
             # Insert new user info
 
@@ -80,16 +453,45 @@ class UserTableAdapters:
                 f"(user_name, email, password_hash, initial_password, access_level, company_id, user_status, created_user_id,  updated_user_id) " \
                 f"VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s);"
             self.cursor.execute(sql, (userName, eMail, hashedPassword, initialPassword, accessLevel, companyId, userStatus, createUserId, createUserId))
-            self.connection.commit()
-            self.Logger.Info("New user info created.")
+            self.commit()
+            self.Logger.Info(f"New user info created. [UserID: {self.cursor.lastrowid}]")
 
-            return True
+            return self.cursor.lastrowid
         
         except Exception as e:
 
             self.Logger.ShowError(e, "Failed to insert new user information.")
             raise
 
+    def insertUsers(self, users: list[tuple], createUserId: int | None = None) -> dict[str, int]:
+
+        ''' Insert hashed users in one statement. Returns the new user IDs by user name. '''
+
+        try:
+
+            # users: (user_name, email, password_hash, initial_password, access_level, company_id, user_status)
+
+            sql = f"INSERT INTO Users " \
+                f"(user_name, email, password_hash, initial_password, access_level, company_id, user_status, created_user_id,  updated_user_id) " \
+                f"VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s);"
+            self.cursor.executemany(sql, [(*user, createUserId, createUserId) for user in users])
+
+            # Auto increment values of one statement are not always consecutive, so read them back
+
+            placeholders = ", ".join(["%s"] * len(users))
+            self.cursor.execute(f"SELECT user_name, user_id FROM Users WHERE user_name IN ({placeholders});", [user[0] for user in users])
+            userIds = dict(self.cursor.fetchall())
+
+            self.commit()
+            self.Logger.Info(f"{len(users)} new users created.")
+
+            return userIds
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to insert new users.")
+            raise
+
     ##########################################
     # Update
 
@@ -101,7 +503,7 @@ class UserTableAdapters:
 
             sql = f"UPDATE Users SET password_hash=%s, initial_password=0, updated_user_id=%s, updated_at=CURRENT_TIMESTAMP WHERE user_id=%s;"
             self.cursor.execute(sql, (newPassword, updateUserId, userId))
-            self.connection.commit()
+            self.commit()
             self.Logger.Info("User password updated.")
 
         except Exception as e:
@@ -109,6 +511,22 @@ class UserTableAdapters:
             self.Logger.ShowError(e, "Failed to update user password.")
             raise
 
+    def updatePasswordHash(self, userId: int, passwordHash: str):
+
+        try:
+
+            # Replace the stored hash of an unchanged password
+
+            sql = f"UPDATE Users SET password_hash=%s WHERE user_id=%s;"
+            self.cursor.execute(sql, (passwordHash, userId))
+            self.commit()
+            self.Logger.Info("User password hash upgraded.")
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to upgrade user password hash.")
+            raise
+
     def updateLoginFailed(self, userId: int, failedCount: int, failedAt: datetime.datetime | None = None, userStatus: Literal['active', 'inactive', 'suspended'] = 'active'):
 
         try:
@@ -117,7 +535,7 @@ class UserTableAdapters:
 
             sql = f"UPDATE Users SET login_failed=%s, login_failed_at=%s, user_status=%s WHERE user_id=%s;"
             self.cursor.execute(sql, (failedCount, failedAt, userStatus, userId))
-            self.connection.commit()
+            self.commit()
             self.Logger.Info("User login failed info updated.")
 
         except Exception as e:
@@ -125,83 +543,163 @@ class UserTableAdapters:
             self.Logger.ShowError(e, "Failed to update user login failed info.")
             raise
 
+    def countLoginFailed(self, userId: int) -> int | None:
+
+        ''' Count a failed login in one statement. Returns the new failed count, or None if the user is inactive or missing. '''
+
+        try:
+
+            sql, replaceList = self.countLoginFailedSql(userId)
+            self.cursor.execute(sql, replaceList)
+            self.commit()
+            self.Logger.Info("User login failed info updated.")
+
+            # LAST_INSERT_ID(expr) hands the new count back with the update. A counted failure is at least 1.
+
+            return self.cursor.lastrowid or None
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to update user login failed info.")
+            raise
+
+    @staticmethod
+    def countLoginFailedSql(userId: int) -> tuple[str, list]:
+
+        # The count goes up while it is below 3 (not suspended yet) or while the suspension of 30 minutes x (count - 2) lasts, up to 10.
+        # MySQL applies the assignments from left to right, so user_status sees the new count and the count sees the old failed time.
+
+        sql = f"UPDATE Users SET "\
+            f"login_failed=LAST_INSERT_ID(IF(login_failed<10 AND (login_failed<3 OR "\
+            f"CURRENT_TIMESTAMP<COALESCE(login_failed_at, CURRENT_TIMESTAMP) + INTERVAL 30 * (login_failed - 2) MINUTE), login_failed + 1, login_failed)), "\
+            f"user_status=IF(login_failed>=3, 'suspended', 'active'), "\
+            f"login_failed_at=CURRENT_TIMESTAMP "\
+            f"WHERE user_id=%s AND user_status<>'inactive';"
+
+        return sql, [userId]
+
     ##########################################
     # Select
 
-    def selectUser(self, userId: int | None = None, userName: str | None = None, eMail: str | None = None, accessLevel: Literal['super', 'admin', 'user', 'guest'] | None = None, companyId: int | None = None, userStatus: Literal['active', 'inactive', 'suspended'] | None = None) -> tuple[tuple]:
+    @staticmethod
+    def selectUserSql(userId: int | None = None, userName: str | None = None, eMail: str | None = None, accessLevel: str | None = None, companyId: int | None = None, userStatus: str | None = None, active: bool | None = None, afterUserId: int | None = None, limit: int | None = None, withActive: bool = False) -> tuple[str, list]:
 
-        if userId is None and userName is None and eMail is None and accessLevel is None and companyId is None and userStatus is None:
+        # Generate sql
 
-            # If the parameters are all empty
+        nextOption = False
+        replaceList = []
+        emptyStrs = {None, ""}
+        sql = "SELECT * FROM Users WHERE"
 
-            self.Logger.Warn("Selecting all Users at once is not allowed.")
-            return None
+        if withActive:
 
-        try:
+            # Append the active status as the last column
 
-            # Generate sql
+            sql = "SELECT *, EXISTS (SELECT 1 FROM SessionInfo WHERE SessionInfo.user_id=Users.user_id AND SessionInfo.logout_datetime>=%s) AS active FROM Users WHERE"
+            replaceList.append(f"{datetime.datetime.now():%Y/%m/%d %H:%M:%S}")
+
+        if userId is not None:
+
+            sql += f" user_id=%s"
+            replaceList.append(userId)
+            nextOption = True
+
+        if userName not in emptyStrs:
+
+            if nextOption:
+
+                sql += " AND"
+
+            sql += f" user_name=%s"
+            replaceList.append(userName)
+            nextOption = True
+
+        if eMail not in emptyStrs:
+
+            if nextOption:
+
+                sql += " AND"
+
+            sql += f" email=%s"
+            replaceList.append(eMail)
+            nextOption = True
 
-            nextOption = False
-            replaceList = []
-            emptyStrs = {None, ""}
-            sql = "SELECT * FROM Users WHERE"
+        if accessLevel not in emptyStrs:
 
-            if userId is not None:
+            if nextOption:
 
-                sql += f" user_id=%s"
-                replaceList.append(userId)
-                nextOption = True
+                sql += " AND"
 
-            if userName not in emptyStrs:
+            sql += f" access_level=%s"
+            replaceList.append(accessLevel)
+            nextOption = True
 
-                if nextOption:
+        if companyId is not None:
 
-                    sql += " AND"
+            if nextOption:
 
-                sql += f" user_name=%s"
-                replaceList.append(userName)
-                nextOption = True
+                sql += " AND"
 
-            if eMail not in emptyStrs:
+            sql += f" company_id=%s"
+            replaceList.append(companyId)
+            nextOption = True
 
-                if nextOption:
+        if userStatus not in emptyStrs:
 
-                    sql += " AND"
+            if nextOption:
 
-                sql += f" email=%s"
-                replaceList.append(eMail)
-                nextOption = True
+                sql += " AND"
 
-            if accessLevel not in emptyStrs:
+            sql += f" user_status=%s"
+            replaceList.append(userStatus)
+            nextOption = True
 
-                if nextOption:
+        if active is not None:
 
-                    sql += " AND"
+            # Users with (or without) a live session
 
-                sql += f" access_level=%s"
-                replaceList.append(accessLevel)
-                nextOption = True
+            if nextOption:
 
-            if companyId is not None:
+                sql += " AND"
 
-                if nextOption:
+            sql += f" {'' if active else 'NOT '}EXISTS (SELECT 1 FROM SessionInfo WHERE SessionInfo.user_id=Users.user_id AND SessionInfo.logout_datetime>=%s)"
+            replaceList.append(f"{datetime.datetime.now():%Y/%m/%d %H:%M:%S}")
+            nextOption = True
 
-                    sql += " AND"
+        if afterUserId is not None:
 
-                sql += f" company_id=%s"
-                replaceList.append(companyId)
-                nextOption = True
+            # Keyset page: rows after the last user of the previous page
 
-            if userStatus not in emptyStrs:
+            if nextOption:
 
-                if nextOption:
+                sql += " AND"
 
-                    sql += " AND"
+            sql += f" user_id>%s"
+            replaceList.append(afterUserId)
 
-                sql += f" user_status=%s"
-                replaceList.append(userStatus)
+        if limit is not None:
+
+            sql += f" ORDER BY user_id LIMIT %s"
+            replaceList.append(limit)
+
+        sql += ";"
+
+        return sql, replaceList
+
+    def selectUser(self, userId: int | None = None, userName: str | None = None, eMail: str | None = None, accessLevel: Literal['super', 'admin', 'user', 'guest'] | None = None, companyId: int | None = None, userStatus: Literal['active', 'inactive', 'suspended'] | None = None, active: bool | None = None, afterUserId: int | None = None, limit: int | None = None) -> tuple[tuple]:
+
+        if userId is None and userName is None and eMail is None and accessLevel is None and companyId is None and userStatus is None:
+
+            # If the parameters are all empty
+
+            self.Logger.Warn("Selecting all Users at once is not allowed.")
+            return None
+
+        try:
+
+            # Generate sql
 
-            sql += ";"
+            sql, replaceList = self.selectUserSql(userId, userName, eMail, accessLevel, companyId, userStatus, active, afterUserId, limit)
 
             # Execute sql
 
@@ -213,75 +711,146 @@ class UserTableAdapters:
             self.Logger.ShowError(e, "Failed to select user informantions.")
             raise
 
-class SessionInfoTableAdapters:
+    def selectExistingUsers(self, userNames: list[str], eMails: list[str]) -> tuple[set[str], set[str]]:
 
-    def __init__(self):
+        ''' User names and emails among the given ones that are already taken '''
 
-        # Logging objects
+        if not userNames and not eMails:
 
-        self.Logger = maplex.Logger(f"TableAdapters: Session")
+            return set(), set()
 
         try:
 
-            self.connection = DbConnection().connect()
-            self.cursor = self.connection.cursor()
-            self.Logger.Info("Database connection established.")
+            sql, replaceList = self.selectExistingUsersSql(userNames, eMails)
+            self.cursor.execute(sql, replaceList)
+            rows = self.cursor.fetchall()
+
+            return {row[0] for row in rows}, {row[1] for row in rows}
 
         except Exception as e:
 
-            self.Logger.ShowError(e, "Failed to connect database.")
+            self.Logger.ShowError(e, "Failed to select existing users.")
             raise
 
-    def closeConnection(self):
+    @staticmethod
+    def selectExistingUsersSql(userNames: list[str], eMails: list[str]) -> tuple[str, list]:
+
+        nameHolders = ", ".join(["%s"] * len(userNames)) or "NULL"
+        mailHolders = ", ".join(["%s"] * len(eMails)) or "NULL"
+        sql = f"SELECT user_name, email FROM Users WHERE user_name IN ({nameHolders}) OR email IN ({mailHolders});"
+
+        return sql, [*userNames, *eMails]
+
+    def streamUser(self, userId: int | None = None, userName: str | None = None, eMail: str | None = None, accessLevel: Literal['super', 'admin', 'user', 'guest'] | None = None, companyId: int | None = None, userStatus: Literal['active', 'inactive', 'suspended'] | None = None, active: bool | None = None, chunkSize: int = 500):
+
+        ''' Yield the selected users in chunks. Each row ends with its active status. '''
+
+        if userId is None and userName is None and eMail is None and accessLevel is None and companyId is None and userStatus is None:
+
+            self.Logger.Warn("Selecting all Users at once is not allowed.")
+            return
 
         try:
 
-            self.cursor.close()
-            self.connection.close()
-            self.Logger.Info("Database connection closed.")
+            sql, replaceList = self.selectUserSql(userId, userName, eMail, accessLevel, companyId, userStatus, active, withActive=True)
+            yield from self.streamRows(sql, replaceList, chunkSize)
 
         except Exception as e:
 
-            self.Logger.ShowError(e, "Failed to close database connection.")
+            self.Logger.ShowError(e, "Failed to stream user informantions.")
             raise
 
+class SessionInfoTableAdapters(BaseTableAdapters):
+
+    # Same as the logout_datetime default of SessionInfo
+
+    SESSION_MINUTES = 30
+
+    def __init__(self, connection=None):
+
+        super().__init__("TableAdapters: Session", connection)
+
+    #################################
+    # Session key conversion
+
+    # session_uuid is stored as BINARY(16) in the UUID_TO_BIN(uuid, 1) layout: the time fields of
+    # the version 1 UUID are swapped to the front so new keys are appended at the end of the index.
+    # The rest of the application only sees the string form.
+
+    @staticmethod
+    def toSessionKey(sessionId: str | None) -> bytes | None:
+
+        try:
+
+            data = uuid.UUID(sessionId).bytes
+
+        except (TypeError, ValueError, AttributeError):
+
+            return None
+
+        return data[6:8] + data[4:6] + data[0:4] + data[8:]
+
+    @staticmethod
+    def fromSessionKey(sessionKey: bytes) -> str:
+
+        return str(uuid.UUID(bytes=bytes(sessionKey[4:8] + sessionKey[2:4] + sessionKey[0:2] + sessionKey[8:])))
+
     #################################
     # Insert
 
-    def CreateNewSession(self, userData: tuple) -> str:
+    def CreateNewSession(self, userData: tuple) -> tuple | None:
+
+        ''' Create a session unless the user has a live one. Returns (session uuid, user ID, company ID, access level, logout datetime). '''
 
         self.Logger.Info("Creating new session information.")
-        selectSql = f"SELECT session_uuid FROM SessionInfo WHERE user_id=%s AND logout_datetime>%s;"
-        self.cursor.execute(selectSql, (userData[0], f"{datetime.datetime.now():%Y/%m/%d %H:%M:%S}"))
-        result = self.cursor.fetchall()
-        
-        if result:
 
-            # Session from another computer is still remains
+        try:
 
-            self.Logger.Warn("There is another active session.")
-            return None
-        
-        # Create session info
+            # Logins of one user wait for each other on the user row, so the live session check and the insert cannot interleave
 
-        sql = f"INSERT INTO SessionInfo (user_id, user_name, company_id, access_level) VALUES (%s, %s, %s, %s);"
-        self.cursor.execute(sql, (userData[0], userData[1], userData[6], userData[5]))
-        self.connection.commit()
-        self.Logger.Info("Session info created.")
-        
-        # Recheck duplicate session
+            self.cursor.execute("SELECT user_id FROM Users WHERE user_id=%s FOR UPDATE;", (userData[0],))
 
-        self.cursor.execute(selectSql, (userData[0], f"{datetime.datetime.now():%Y/%m/%d %H:%M:%S}"))
-        result = self.cursor.fetchall()
+            sessionId = str(uuid.uuid1())
+            sql, replaceList = self.createNewSessionSql(sessionId, userData)
 
-        if len(result) > 1:
+            if self.cursor.execute(sql, replaceList) == 0:
 
-            # Login with two computers at the same time!?
+                # Session from another computer is still remains
 
-            self.Logger.Warn("Another computer took the session.")
-            return None
+                self.rollback()
+                self.Logger.Warn("There is another active session.")
+                return None
+
+            # The database clock set the logout time, like every other session predicate uses
+
+            self.cursor.execute("SELECT logout_datetime FROM SessionInfo WHERE session_uuid=%s;", (self.toSessionKey(sessionId),))
+            logoutDatetime = self.cursor.fetchall()[0][0]
+            self.commit()
+            self.Logger.Info("Session info created.")
 
-        return result[0][0]
+            return sessionId, userData[0], userData[6], userData[5], logoutDatetime
+
+        except Exception as e:
+
+            self.rollback()
+            self.Logger.ShowError(e, "Failed to create session information.")
+            raise
+
+    @staticmethod
+    def createNewSessionSql(sessionId: str, userData: tuple) -> tuple[str, list]:
+
+        # The insert happens only when no live session of the user exists.
+        # Both times come from CURRENT_TIMESTAMP, so the application clock cannot shift them.
+
+        sql = f"INSERT INTO SessionInfo (session_uuid, user_id, user_name, company_id, access_level, logout_datetime) "\
+            f"SELECT %s, %s, %s, %s, %s, DATE_ADD(CURRENT_TIMESTAMP, INTERVAL %s MINUTE) FROM DUAL "\
+            f"WHERE NOT EXISTS (SELECT 1 FROM SessionInfo WHERE user_id=%s AND logout_datetime>CURRENT_TIMESTAMP);"
+        replaceList = [
+            SessionInfoTableAdapters.toSessionKey(sessionId), userData[0], userData[1], userData[6], userData[5], SessionInfoTableAdapters.SESSION_MINUTES,
+            userData[0]
+            ]
+
+        return sql, replaceList
 
     ################################
     # Update
@@ -290,12 +859,39 @@ class SessionInfoTableAdapters:
 
         self.Logger.Info(f"Updating logout datetime: +{update}")
 
+        sessionKey = self.toSessionKey(uuid)
+
+        if sessionKey is None:
+
+            self.Logger.Warn(f"Malformed session ID: {uuid}")
+            return
+
         sql = f"UPDATE SessionInfo SET logout_datetime=ADDTIME(CURRENT_TIMESTAMP, %s) WHERE session_uuid=%s;"
-        self.cursor.execute(sql, (update, uuid))
-        self.connection.commit()
+        self.cursor.execute(sql, (update, sessionKey))
+        self.commit()
 
         self.Logger.Info("Logout datetime updated.")
 
+    def UpdateLogoutBatch(self, uuids: list[str], update: str) -> int:
+
+        # Extend several sessions at once. Sessions that already ended (logged out or expired) are left alone.
+
+        self.Logger.Info(f"Updating logout datetime of {len(uuids)} sessions: +{update}")
+
+        sessionKeys = [sessionKey for sessionKey in map(self.toSessionKey, uuids) if sessionKey is not None]
+
+        if not sessionKeys:
+
+            return 0
+
+        placeholders = ", ".join(["%s"] * len(sessionKeys))
+        sql = f"UPDATE SessionInfo SET logout_datetime=ADDTIME(CURRENT_TIMESTAMP, %s) WHERE session_uuid IN ({placeholders}) AND logout_datetime>CURRENT_TIMESTAMP;"
+        updatedCount = self.cursor.execute(sql, (update, *sessionKeys))
+        self.commit()
+
+        self.Logger.Info(f"Logout datetime updated: {updatedCount} sessions.")
+        return updatedCount
+
     ################################
     # Select
 
@@ -303,10 +899,17 @@ class SessionInfoTableAdapters:
 
         self.Logger.Info(f"Selecting session information: {uuid}")
 
+        sessionKey = self.toSessionKey(uuid)
+
+        if sessionKey is None:
+
+            self.Logger.Warn(f"Malformed session ID: {uuid}")
+            return None
+
         try:
 
             sql = f"SELECT user_id, company_id, access_level, logout_datetime FROM SessionInfo WHERE session_uuid=%s;"
-            self.cursor.execute(sql, (uuid,))
+            self.cursor.execute(sql, (sessionKey,))
             result = self.cursor.fetchall()
 
             return result if result else None
@@ -316,79 +919,102 @@ class SessionInfoTableAdapters:
             self.Logger.ShowError(e, f"Failed to select session information: {uuid}")
             raise
 
-    def selectSessionInfoByTimeAndUser(self, userId: int, BeforeAfter: Literal['before', 'after'], logoutDatetime: datetime.datetime | None = None) -> tuple[tuple] | None:
+    def selectEndedSessions(self, since: datetime.datetime) -> tuple[tuple]:
+
+        # Sessions whose logout time passed after the given time
+
+        try:
+
+            sql = f"SELECT session_uuid, logout_datetime FROM SessionInfo WHERE logout_datetime>%s AND logout_datetime<=CURRENT_TIMESTAMP;"
+            self.cursor.execute(sql, (f"{since:%Y/%m/%d %H:%M:%S}",))
+            return tuple((self.fromSessionKey(row[0]), *row[1:]) for row in self.cursor.fetchall())
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, f"Failed to select ended sessions since {since:%Y/%m/%d %H:%M:%S}")
+            raise
+
+    def selectActiveUserIds(self, userIds: list[int], logoutDatetime: datetime.datetime | None = None) -> set[int]:
+
+        ''' Which of the users have a session ending at or after the time (now by default). One query for all. '''
+
+        if not userIds:
+
+            return set()
 
         if logoutDatetime is None:
 
             logoutDatetime = datetime.datetime.now()
 
-        logoutDatetimeString = f"{logoutDatetime:%Y/%m/%d %H:%M:%S}"
-        timeSpan = f"{'<' if BeforeAfter == 'before' else '>'}"
-
-        self.Logger.Info(f"Selecting session information by time and user: {userId}, {BeforeAfter}, {logoutDatetime:%Y/%m/%d %H:%M:%S}")
+        self.Logger.Info(f"Selecting active users among {len(userIds)} users.")
 
         try:
 
-            sql = f"SELECT session_uuid, user_id, company_id, access_level, logout_datetime FROM SessionInfo WHERE user_id=%s AND logout_datetime{timeSpan}=%s;"
-            self.cursor.execute(sql, (userId, logoutDatetimeString))
-            result = self.cursor.fetchall()
+            sql, replaceList = self.selectActiveUserIdsSql(userIds, logoutDatetime)
+            self.cursor.execute(sql, replaceList)
+
+            return {row[0] for row in self.cursor.fetchall()}
 
-            return result if result else None
-        
         except Exception as e:
 
-            self.Logger.ShowError(e, f"Failed to select session information by time and user: {userId}, {BeforeAfter}, {timeSpan}")
+            self.Logger.ShowError(e, "Failed to select active users.")
             raise
 
-class CompanyTableAdapters:
+    @staticmethod
+    def selectActiveUserIdsSql(userIds: list[int], logoutDatetime: datetime.datetime) -> tuple[str, list]:
 
-    def __init__(self):
-        
-        # Logging objects
+        placeholders = ", ".join(["%s"] * len(userIds))
+        sql = f"SELECT DISTINCT user_id FROM SessionInfo WHERE user_id IN ({placeholders}) AND logout_datetime>=%s;"
 
-        self.Logger = maplex.Logger("CompanyTableAdapters")
+        return sql, [*userIds, f"{logoutDatetime:%Y/%m/%d %H:%M:%S}"]
 
-        try:
+    def selectSessionInfoByTimeAndUser(self, userId: int, BeforeAfter: Literal['before', 'after'], logoutDatetime: datetime.datetime | None = None) -> tuple[tuple] | None:
 
-            self.connection = DbConnection().connect()
-            self.cursor = self.connection.cursor()
-            self.Logger.Info("Database connection established.")
+        if logoutDatetime is None:
 
-        except Exception as e:
+            logoutDatetime = datetime.datetime.now()
 
-            self.Logger.ShowError(e, "Failed to connect database.")
-            raise
+        logoutDatetimeString = f"{logoutDatetime:%Y/%m/%d %H:%M:%S}"
+        timeSpan = f"{'<' if BeforeAfter == 'before' else '>'}"
 
-    def closeConnection(self):
+        self.Logger.Info(f"Selecting session information by time and user: {userId}, {BeforeAfter}, {logoutDatetime:%Y/%m/%d %H:%M:%S}")
 
         try:
 
-            self.cursor.close()
-            self.connection.close()
-            self.Logger.Info("Database connection closed.")
+            sql = f"SELECT session_uuid, user_id, company_id, access_level, logout_datetime FROM SessionInfo WHERE user_id=%s AND logout_datetime{timeSpan}=%s;"
+            self.cursor.execute(sql, (userId, logoutDatetimeString))
+            result = tuple((self.fromSessionKey(row[0]), *row[1:]) for row in self.cursor.fetchall())
 
+            return result if result else None
+        
         except Exception as e:
 
-            self.Logger.ShowError(e, "Failed to close database connection.")
+            self.Logger.ShowError(e, f"Failed to select session information by time and user: {userId}, {BeforeAfter}, {timeSpan}")
             raise
 
+class CompanyTableAdapters(BaseTableAdapters):
+
+    def __init__(self, connection=None):
+
+        super().__init__("CompanyTableAdapters", connection)
+
     #################################
     # Insert
 
-    def insertCompany(self, companyName: str, companyPhone: str, companyZipCode: str, companyAddress: str, companyEmail: str, contractLevel: int, createUserId: int | None = None) -> bool:
+    def insertCompany(self, companyName: str, companyPhone: str, companyZipCode: str, companyAddress: str, companyEmail: str, contractLevel: int, createUserId: int | None = None) -> int:
 
         try:
 
             # Insert new company info
 
             sql = f"INSERT INTO ContractCompanies "\
-                f"(company_name, company_phone, company_zipcode, company_address, company_email, contract_level, created_user_id, updated_user_id) "\
+                f"(company_name, company_phone, company_zip_code, company_address, company_email, contract_level, created_user_id, updated_user_id) "\
                 f"VALUES (%s, %s, %s, %s, %s, %s, %s, %s);"
             self.cursor.execute(sql, (companyName, companyPhone, companyZipCode, companyAddress, companyEmail, contractLevel, createUserId, createUserId))
-            self.connection.commit()
-            self.Logger.Info("New company info created.")
+            self.commit()
+            self.Logger.Info(f"New company info created. [CompanyID: {self.cursor.lastrowid}]")
 
-            return True
+            return self.cursor.lastrowid
 
         except Exception as e:
 
@@ -398,6 +1024,47 @@ class CompanyTableAdapters:
     #################################
     # Select
 
+    @staticmethod
+    def selectCompanySql(companyId: int | None = None, companyName: str | None = None, contractLevel: int | None = None, orSearch: bool = False) -> tuple[str, list]:
+
+        # Generate sql
+
+        nextOption = False
+        replaceList = []
+        connector = " OR " if orSearch else " AND "
+        emptyStrs = {None, ""}
+        sql = "SELECT * FROM ContractCompanies WHERE "
+
+        if companyId is not None:
+
+            sql += f"company_id=%s"
+            replaceList.append(companyId)
+            nextOption = True
+
+        if companyName not in emptyStrs:
+
+            if nextOption:
+
+                sql += connector
+
+            sql += f"company_name=%s"
+            replaceList.append(companyName)
+
+            nextOption = True
+
+        if contractLevel is not None:
+
+            if nextOption:
+
+                sql += connector
+
+            sql += f"contract_level=%s"
+            replaceList.append(contractLevel)
+
+        sql += ";"
+
+        return sql, replaceList
+
     def selectCompany(self, companyId: int | None = None, companyName: str | None = None, contractLevel: int | None = None, orSearch: bool = False) -> tuple[tuple] | None:
 
         # Select companies by exact match
@@ -413,109 +1080,202 @@ class CompanyTableAdapters:
 
             # Generate sql
 
-            nextOption = False
-            replaceList = []
-            connector = " OR " if orSearch else " AND "
-            emptyStrs = {None, ""}
-            sql = "SELECT * FROM ContractCompanies WHERE "
+            sql, replaceList = self.selectCompanySql(companyId, companyName, contractLevel, orSearch)
+            self.Logger.Debug(f"Select Company SQL: {sql} with {replaceList}")
 
-            if companyId is not None:
+            # Execute sql
 
-                sql += f"company_id=%s"
-                replaceList.append(companyId)
-                nextOption = True
+            self.cursor.execute(sql, replaceList)
+            return self.cursor.fetchall()
 
-            if companyName not in emptyStrs:
+        except Exception as e:
 
-                if nextOption:
+            self.Logger.ShowError(e, "Failed to select company informantions.")
+            raise
 
-                    sql += connector
+    def selectCompanyNames(self) -> tuple[tuple]:
 
-                sql += f"company_name=%s"
-                replaceList.append(companyName)
+        # (company ID, company name, contract level) of every company, for the typeahead index
 
-                nextOption = True
+        try:
 
-            if contractLevel is not None:
+            self.cursor.execute("SELECT company_id, company_name, contract_level FROM ContractCompanies;")
+            return self.cursor.fetchall()
 
-                if nextOption:
+        except Exception as e:
 
-                    sql += connector
+            self.Logger.ShowError(e, "Failed to select company names.")
+            raise
 
-                sql += f"contract_level=%s"
-                replaceList.append(contractLevel)
+    def selectAllCompanies(self, limit: int) -> tuple[tuple]:
 
-            sql += ";"
-            self.Logger.Debug(f"Select Company SQL: {sql} with {replaceList}")
+        # Every company row in ID order, up to the limit, for the company directory cache
 
-            # Execute sql
+        try:
 
-            self.cursor.execute(sql, replaceList)
+            self.cursor.execute("SELECT * FROM ContractCompanies ORDER BY company_id LIMIT %s;", (limit,))
             return self.cursor.fetchall()
 
         except Exception as e:
 
-            self.Logger.ShowError(e, "Failed to select company informantions.")
+            self.Logger.ShowError(e, "Failed to select all companies.")
             raise
 
-    def searchCompany(self, companyName: str | None = None, companyAddress: str | None = None, companyEmail: str | None = None, orSearch: bool = False) -> tuple[tuple] | None:
+    # ngram_token_size of the server, read once per process. Shorter terms have no n-gram to look up and fall back to a prefix match.
+
+    ngramSize = None
+
+    def readNgramSize(self) -> int:
+
+        if CompanyTableAdapters.ngramSize is None:
+
+            self.cursor.execute("SELECT @@ngram_token_size;")
+            CompanyTableAdapters.ngramSize = int(self.cursor.fetchall()[0][0])
+            self.Logger.Info(f"Server ngram_token_size: {CompanyTableAdapters.ngramSize}")
+
+        return CompanyTableAdapters.ngramSize
+
+    @staticmethod
+    def searchCompanySql(companyName: str | None = None, companyAddress: str | None = None, companyEmail: str | None = None, orSearch: bool = False, fuzzy: bool = False, offset: int = 0, limit: int | None = None, ngramSize: int = 2) -> tuple[str, list]:
+
+        # Each term is looked up in the n-gram FULLTEXT index of its column. A phrase in boolean mode matches the term as
+        # a substring like LIKE '%term%' did, natural language mode (fuzzy) matches any shared n-gram.
+        # Rows are ranked by the full-text relevance, and a match at the start of the column ranks first.
+
+        emptyStrs = {None, ""}
+        conditions = []
+        scores = []
+        conditionList = []
+        scoreList = []
+
+        for column, term in (("company_name", companyName), ("company_address", companyAddress), ("company_email", companyEmail)):
+
+            if term in emptyStrs or not term.strip():
+
+                continue
+
+            term = term.strip()
+            prefix = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
 
-        # Search companies by partial match
+            if len(term) < ngramSize:
 
-        if companyName is None and companyAddress is None and companyEmail is None:
+                conditions.append(f"{column} LIKE %s")
+                conditionList.append(prefix)
+                scores.append(f"({column} LIKE %s) * 10")
+                scoreList.append(prefix)
+                continue
+
+            if fuzzy:
+
+                match = f"MATCH({column}) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+                against = term
+
+            else:
+
+                match = f"MATCH({column}) AGAINST (%s IN BOOLEAN MODE)"
+                against = '"' + term.replace('"', " ") + '"'
+
+            conditions.append(match)
+            conditionList.append(against)
+            scores.append(f"{match} + ({column} LIKE %s) * 10")
+            scoreList.extend([against, prefix])
+
+        connector = " OR " if orSearch else " AND "
+        sql = f"SELECT *, {' + '.join(scores)} AS score FROM ContractCompanies WHERE {connector.join(conditions)} ORDER BY score DESC, company_id"
+        replaceList = scoreList + conditionList
+
+        if limit is not None:
+
+            sql += " LIMIT %s OFFSET %s"
+            replaceList.extend([limit, offset])
+
+        sql += ";"
+
+        return sql, replaceList
+
+    def searchCompany(self, companyName: str | None = None, companyAddress: str | None = None, companyEmail: str | None = None, orSearch: bool = False, fuzzy: bool = False, offset: int = 0, limit: int | None = None) -> tuple[tuple] | None:
+
+        # Search companies by partial match, best match first. Each row ends with its score.
+
+        emptyStrs = {None, ""}
+
+        if companyName in emptyStrs and companyAddress in emptyStrs and companyEmail in emptyStrs:
 
             # If the parameters are all empty
 
             self.Logger.Warn("Searching all Companies at once is not allowed.")
             return None
 
+        if companyEmail not in emptyStrs:
+
+            # Maybe not use this for security reason?
+
+            self.Logger.Warn("Searching by company email is not recommended for security reason.")
+
         try:
 
             # Generate sql
 
-            nextOption = False
-            replaceList = []
-            connector = " OR " if orSearch else " AND "
-            emptyStrs = {None, ""}
-            sql = "SELECT * FROM ContractCompanies WHERE "
+            sql, replaceList = self.searchCompanySql(companyName, companyAddress, companyEmail, orSearch, fuzzy, offset, limit, self.readNgramSize())
+            self.Logger.Debug(f"Search Company SQL: {sql} with {replaceList}")
 
-            if companyName not in emptyStrs:
+            # Execute sql
 
-                sql += f"company_name LIKE %s"
-                replaceList.append(f"%{companyName}%")
-                nextOption = True
+            self.cursor.execute(sql, replaceList)
+            return self.cursor.fetchall()
 
-            if companyAddress not in emptyStrs:
+        except Exception as e:
 
-                if nextOption:
+            self.Logger.ShowError(e, "Failed to search company informantions.")
+            raise
 
-                    sql += connector
+    def streamCompany(self, companyId: int | None = None, companyName: str | None = None, contractLevel: int | None = None, chunkSize: int = 500):
 
-                sql += f"company_address LIKE %s"
-                replaceList.append(f"%{companyAddress}%")
-                nextOption = True
+        ''' Yield the selected companies in chunks '''
 
-            if companyEmail not in emptyStrs:
+        if companyId is None and companyName is None and contractLevel is None:
 
-                # Maybe not use this for security reason?
+            self.Logger.Warn("Selecting all Companies at once is not allowed.")
+            return
 
-                self.Logger.Warn("Searching by company email is not recommended for security reason.")
-                
-                if nextOption:
+        try:
 
-                    sql += connector
+            sql, replaceList = self.selectCompanySql(companyId, companyName, contractLevel)
+            yield from self.streamRows(sql, replaceList, chunkSize)
 
-                sql += f"company_email LIKE %s"
-                replaceList.append(f"%{companyEmail}%")
+        except Exception as e:
 
-            sql += ";"
+            self.Logger.ShowError(e, "Failed to stream company informantions.")
+            raise
 
-            # Execute sql
+class ReferenceTableAdapters(BaseTableAdapters):
 
-            self.cursor.execute(sql, replaceList)
+    # Seed tables from init_db.sql. They are read whole, once per reference data version.
+
+    def __init__(self, connection=None):
+
+        super().__init__("TableAdapters: Reference", connection)
+
+    def selectAll(self, sql: str, name: str) -> tuple[tuple]:
+
+        try:
+
+            self.cursor.execute(sql)
             return self.cursor.fetchall()
 
         except Exception as e:
 
-            self.Logger.ShowError(e, "Failed to search company informantions.")
-            raise
\ No newline at end of file
+            self.Logger.ShowError(e, f"Failed to select {name}.")
+            raise
+
+    def selectContractLevels(self) -> tuple[tuple]:
+
+        return self.selectAll("SELECT level_id, level_name, level_description FROM ContractLevel ORDER BY level_id;", "contract levels")
+
+    def selectLanguageTypes(self) -> tuple[tuple]:
+
+        return self.selectAll("SELECT type_id, root_id, parent_id, type_name, type_description FROM ComputerLanguageTypes ORDER BY type_id;", "computer language types")
+
+    def selectLanguages(self) -> tuple[tuple]:
+
+        return self.selectAll("SELECT language_id, language_name, language_description, type_id FROM ComputerLanguages ORDER BY language_id;", "computer languages")
\ No newline at end of file
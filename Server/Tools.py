@@ -1,6 +1,22 @@
+import asyncio
+import base64
+import bisect
+import collections
+import concurrent.futures
+import csv
+import fcntl
 import hashlib
+import hmac
+import io
+import itertools
+import json
 import maplex
+import mmap
+import multiprocessing
 import os
+import struct
+import threading
+import time
 
 class stringHasher:
 
@@ -19,6 +35,265 @@ class stringHasher:
 
         return hashedPw
 
+class PasswordHasher:
+
+    ''' Self-describing password hashes: "pbkdf2_<algorithm>$<iterations>$<salt>$<digest>" '''
+
+    PREFIX = "pbkdf2_"
+
+    def __init__(self, algorithm: str | None = None, iterations: int | None = None):
+
+        self.ALGORITHM = algorithm if algorithm is not None else readConfigValue("ALGORITHM", "sha256", "PASSWORD_HASHING")
+        self.ITERATIONS = iterations if iterations is not None else readConfigValue("ITERATIONS", 100000, "PASSWORD_HASHING")
+        self.SALT_BYTES = readConfigValue("SALT_BYTES", 16, "PASSWORD_HASHING")
+
+    @staticmethod
+    def encode(data: bytes) -> str:
+
+        return base64.b64encode(data).decode()
+
+    @staticmethod
+    def parse(storedHash: str) -> tuple[str, int, bytes, bytes] | None:
+
+        ''' Split a stored hash into (algorithm, iterations, salt, digest). Returns None for legacy hashes. '''
+
+        try:
+
+            method, iterations, salt, digest = storedHash.split("$")
+
+            if not method.startswith(PasswordHasher.PREFIX):
+
+                return None
+
+            return method[len(PasswordHasher.PREFIX):], int(iterations), base64.b64decode(salt), base64.b64decode(digest)
+
+        except Exception:
+
+            return None
+
+    def hashPassword(self, plainPassword: str) -> str:
+
+        salt = os.urandom(self.SALT_BYTES)
+        digest = hashlib.pbkdf2_hmac(self.ALGORITHM, plainPassword.encode(), salt, self.ITERATIONS)
+
+        return f"{PasswordHasher.PREFIX}{self.ALGORITHM}${self.ITERATIONS}${self.encode(salt)}${self.encode(digest)}"
+
+    @staticmethod
+    def verify(plainPassword: str, storedHash: str, userName: str = "") -> bool:
+
+        ''' Check a password against a stored hash in constant time '''
+
+        parsed = PasswordHasher.parse(storedHash)
+
+        if parsed is None:
+
+            # Legacy hash salted with the user name
+
+            legacyHash = stringHasher().hashString(plainPassword, userName)
+            return hmac.compare_digest(legacyHash.encode(), storedHash.encode())
+
+        algorithm, iterations, salt, digest = parsed
+        plainDigest = hashlib.pbkdf2_hmac(algorithm, plainPassword.encode(), salt, iterations)
+
+        return hmac.compare_digest(plainDigest, digest)
+
+    def needsRehash(self, storedHash: str) -> bool:
+
+        ''' True if the stored hash was made with other parameters than the current ones '''
+
+        parsed = self.parse(storedHash)
+
+        if parsed is None:
+
+            return True
+
+        algorithm, iterations, salt, digest = parsed
+
+        return algorithm != self.ALGORITHM or iterations != self.ITERATIONS or len(salt) != self.SALT_BYTES
+
+    def benchmark(self, rounds: int = 5) -> dict:
+
+        ''' Measure the hashing latency with the current parameters '''
+
+        timings = []
+
+        for i in range(max(rounds, 1)):
+
+            startTime = time.perf_counter()
+            self.hashPassword(f"Benchmark-{i}")
+            timings.append(time.perf_counter() - startTime)
+
+        timings.sort()
+
+        return {
+            "Algorithm": self.ALGORITHM,
+            "Iterations": self.ITERATIONS,
+            "Rounds": len(timings),
+            "MinMs": timings[0] * 1000,
+            "MedianMs": timings[len(timings) // 2] * 1000,
+            "MaxMs": timings[-1] * 1000
+        }
+
+def hashInProcess(plainPassword: str, algorithm: str, iterations: int) -> str:
+
+    # Runs in a hashing worker process
+
+    return PasswordHasher(algorithm, iterations).hashPassword(plainPassword)
+
+def verifyInProcess(plainPassword: str, storedHash: str, userName: str) -> bool:
+
+    # Runs in a hashing worker process
+
+    return PasswordHasher.verify(plainPassword, storedHash, userName)
+
+class HashExecutor:
+
+    ''' Process pool that runs password hashing outside the request threads '''
+
+    instance = None
+    instanceLock = threading.Lock()
+
+    @classmethod
+    def getInstance(cls) -> "HashExecutor":
+
+        with cls.instanceLock:
+
+            if cls.instance is None:
+
+                cls.instance = cls()
+
+            return cls.instance
+
+    def __init__(self):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger("HashExecutor")
+
+        # Settings
+
+        self.workers = max(readConfigValue("WORKERS", 2, "PASSWORD_HASHING"), 1)
+        self.warnQueueDepth = readConfigValue("WARN_QUEUE_DEPTH", 16, "PASSWORD_HASHING")
+        self.hasher = PasswordHasher()
+
+        # Spawned workers do not inherit the server threads or pooled connections
+
+        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+        # Statistics
+
+        self.inFlight = 0
+        self.completed = 0
+        self.lock = threading.Lock()
+
+        self.Logger.Info(f"Hash executor created: [workers: {self.workers}, algorithm: {self.hasher.ALGORITHM}, iterations: {self.hasher.ITERATIONS}]")
+
+    def queueDepth(self) -> int:
+
+        # Hashes waiting for a free worker
+
+        with self.lock:
+
+            return max(self.inFlight - self.workers, 0)
+
+    def taskDone(self, future: concurrent.futures.Future):
+
+        with self.lock:
+
+            self.inFlight -= 1
+            self.completed += 1
+
+    def submit(self, function, *args) -> concurrent.futures.Future:
+
+        with self.lock:
+
+            self.inFlight += 1
+            queueDepth = max(self.inFlight - self.workers, 0)
+
+        if queueDepth >= self.warnQueueDepth:
+
+            self.Logger.Warn(f"Password hashing is saturated: [queue depth: {queueDepth}]")
+
+        try:
+
+            future = self.executor.submit(function, *args)
+
+        except Exception:
+
+            with self.lock:
+
+                self.inFlight -= 1
+
+            raise
+
+        future.add_done_callback(self.taskDone)
+        return future
+
+    def hash(self, plainPassword: str) -> str:
+
+        ''' Hash and wait. The calling thread does not hold the GIL while it waits. '''
+
+        return self.submit(hashInProcess, plainPassword, self.hasher.ALGORITHM, self.hasher.ITERATIONS).result()
+
+    async def hashAsync(self, plainPassword: str) -> str:
+
+        return await asyncio.wrap_future(self.submit(hashInProcess, plainPassword, self.hasher.ALGORITHM, self.hasher.ITERATIONS))
+
+    def hashMany(self, plainPasswords: list[str]) -> list[str]:
+
+        ''' Hash a batch across all workers. Results keep the order of the passwords. '''
+
+        count = len(plainPasswords)
+
+        with self.lock:
+
+            self.inFlight += count
+
+        try:
+
+            chunkSize = max(count // (self.workers * 4), 1)
+
+            return list(self.executor.map(hashInProcess, plainPasswords, itertools.repeat(self.hasher.ALGORITHM), itertools.repeat(self.hasher.ITERATIONS), chunksize=chunkSize))
+
+        finally:
+
+            with self.lock:
+
+                self.inFlight -= count
+                self.completed += count
+
+    async def hashManyAsync(self, plainPasswords: list[str]) -> list[str]:
+
+        return await asyncio.to_thread(self.hashMany, plainPasswords)
+
+    def verify(self, plainPassword: str, storedHash: str, userName: str = "") -> bool:
+
+        return self.submit(verifyInProcess, plainPassword, storedHash, userName).result()
+
+    async def verifyAsync(self, plainPassword: str, storedHash: str, userName: str = "") -> bool:
+
+        return await asyncio.wrap_future(self.submit(verifyInProcess, plainPassword, storedHash, userName))
+
+    def needsRehash(self, storedHash: str) -> bool:
+
+        return self.hasher.needsRehash(storedHash)
+
+    def stats(self) -> dict:
+
+        with self.lock:
+
+            return {
+                "Workers": self.workers,
+                "InFlight": self.inFlight,
+                "QueueDepth": max(self.inFlight - self.workers, 0),
+                "Completed": self.completed
+            }
+
+    def shutdown(self):
+
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.Logger.Info("Hash executor shut down.")
+
 def CheckPasswordPattern(passwordString: str) -> bool:
 
     # If bytes were passed accidentally, decode them to a string (UTF-8)
@@ -69,3 +344,649 @@ def CheckPasswordPattern(passwordString: str) -> bool:
     # All flags must be True
 
     return all((hasLower, hasUpper, hasDigit, hasSpeci))
+
+class PrefixTrie:
+
+    ''' Case-insensitive prefix index. Every node keeps its best entries, so a lookup never walks the subtree. '''
+
+    def __init__(self, name: str, topK: int = 20):
+
+        self.name = name
+        self.topK = max(topK, 1)
+
+        # Node: [children by character, sorted (rank, value) entries of the subtree]
+
+        self.root = [{}, []]
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def add(self, key: str, value, rank: tuple = ()):
+
+        ''' Index the value under the key. Lower ranks come first, ties are ordered by value. '''
+
+        entry = (rank, value)
+
+        with self.lock:
+
+            node = self.root
+            self.keep(node, entry)
+
+            for char in key.casefold():
+
+                node = node[0].setdefault(char, [{}, []])
+                self.keep(node, entry)
+
+            self.size += 1
+
+    def keep(self, node: list, entry: tuple):
+
+        # A value indexed under several keys (e.g. every word of a name) is kept once, with its best rank
+
+        entries = node[1]
+
+        for i, (rank, value) in enumerate(entries):
+
+            if value == entry[1]:
+
+                if rank <= entry[0]:
+
+                    return
+
+                del entries[i]
+                break
+
+        if len(entries) >= self.topK and entry >= entries[-1]:
+
+            return
+
+        bisect.insort(entries, entry)
+        del entries[self.topK:]
+
+    def search(self, prefix: str, limit: int | None = None) -> list[tuple]:
+
+        ''' (rank, value) entries under the prefix, best first '''
+
+        with self.lock:
+
+            node = self.root
+
+            for char in prefix.casefold():
+
+                node = node[0].get(char)
+
+                if node is None:
+
+                    return []
+
+            return node[1][:limit]
+
+def encodeCursor(position: dict) -> str:
+
+    ''' Opaque page cursor for keyset pagination '''
+
+    return base64.urlsafe_b64encode(json.dumps(position, separators=(",", ":")).encode()).rstrip(b"=").decode()
+
+def decodeCursor(cursor: str) -> dict | None:
+
+    try:
+
+        position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+
+        return position if isinstance(position, dict) else None
+
+    except Exception:
+
+        return None
+
+class ExportWriter:
+
+    ''' Formats exported rows as NDJSON lines or CSV text, one chunk at a time '''
+
+    MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+    def __init__(self, exportFormat: str):
+
+        self.exportFormat = exportFormat
+        self.headerWritten = False
+
+    @classmethod
+    def isSupported(cls, exportFormat: str) -> bool:
+
+        return exportFormat in cls.MEDIA_TYPES
+
+    def mediaType(self) -> str:
+
+        return ExportWriter.MEDIA_TYPES[self.exportFormat]
+
+    def chunk(self, rows: list[dict]) -> str:
+
+        if self.exportFormat == "ndjson":
+
+            return "".join(json.dumps(row, default=str) + "\n" for row in rows)
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        if rows and not self.headerWritten:
+
+            writer.writerow(rows[0].keys())
+            self.headerWritten = True
+
+        writer.writerows(row.values() for row in rows)
+
+        return buffer.getvalue()
+
+    def error(self, message: str) -> str:
+
+        # A CSV body has no place for an error, it just ends
+
+        if self.exportFormat == "ndjson":
+
+            return json.dumps({"ErrorInfo": {"Error": True, "Message": message}}) + "\n"
+
+        return ""
+
+def readConfigValue(tag: str, default, *headers: str):
+
+    """ Read a server config value. Returns the default if the tag is missing or invalid. """
+
+    try:
+
+        value = maplex.MapleTree("config.mpl").readMapleTag(tag, "APPLICATION_SETTINGS", *headers)
+
+        if value in {None, ""}:
+
+            return default
+
+        if isinstance(default, bool):
+
+            return value.strip().upper() in {"TRUE", "YES", "ON", "1"}
+
+        if default is None:
+
+            return value
+
+        return type(default)(value)
+
+    except Exception:
+
+        return default
+
+class InvalidationBus:
+
+    ''' Invalidation log shared by the uvicorn workers of one host through a memory-mapped file '''
+
+    # Each channel holds a generation counter and a ring of the keys invalidated at each generation. A reader
+    # compares the counter with the last generation it saw, and drops everything if it fell a full ring behind.
+
+    CHANNELS = ("SessionInfo", "LoginSuspended", "Companies")
+    MAGIC = b"MOBIUSIB"
+    HEADER_SIZE = 64
+    SLOT_SIZE = 128
+    SLOT_HEADER = struct.Struct("<QH")
+    COUNTER = struct.Struct("<Q")
+    RESET_ALL = 0xFFFF
+
+    instance = None
+    instanceLock = threading.Lock()
+
+    @classmethod
+    def getInstance(cls) -> "InvalidationBus":
+
+        with cls.instanceLock:
+
+            if cls.instance is None:
+
+                cls.instance = cls()
+
+            return cls.instance
+
+    def __init__(self):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger("InvalidationBus")
+
+        # Settings: the file lives in /dev/shm, so it is memory only and private to the container
+
+        self.path = readConfigValue("PATH", "/dev/shm/pj-mobius-invalidation", "INVALIDATION_BUS")
+        self.slots = max(readConfigValue("SLOTS", 1024, "INVALIDATION_BUS"), 1)
+        self.channelSize = InvalidationBus.HEADER_SIZE + self.slots * InvalidationBus.SLOT_SIZE
+        self.fileSize = InvalidationBus.HEADER_SIZE + len(InvalidationBus.CHANNELS) * self.channelSize
+
+        # flock() does not exclude threads sharing the file descriptor
+
+        self.lock = threading.Lock()
+        self.fd = None
+        self.memory = None
+
+        if not readConfigValue("ENABLED", True, "INVALIDATION_BUS"):
+
+            self.Logger.Info("Invalidation bus is disabled. Caches are invalidated in this worker only.")
+            return
+
+        try:
+
+            self.open()
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, f"Failed to open the invalidation bus: {self.path}")
+            self.Logger.Warn("Caches are invalidated in this worker only.")
+
+    def layout(self) -> bytes:
+
+        # Workers started with a different channel list or ring size must not share the old file
+
+        return hashlib.blake2b(repr((InvalidationBus.CHANNELS, self.slots, InvalidationBus.SLOT_SIZE)).encode(), digest_size=8).digest()
+
+    def open(self):
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        try:
+
+            fcntl.flock(fd, fcntl.LOCK_EX)
+
+            try:
+
+                header = os.pread(fd, 16, 0)
+
+                if os.fstat(fd).st_size != self.fileSize or header != InvalidationBus.MAGIC + self.layout():
+
+                    os.ftruncate(fd, 0)
+                    os.ftruncate(fd, self.fileSize)
+                    os.pwrite(fd, InvalidationBus.MAGIC + self.layout(), 0)
+                    self.Logger.Info(f"Invalidation bus created: {self.path}")
+
+                self.memory = mmap.mmap(fd, self.fileSize)
+
+            finally:
+
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+        except Exception:
+
+            os.close(fd)
+            raise
+
+        self.fd = fd
+
+    def isEnabled(self) -> bool:
+
+        return self.memory is not None
+
+    def channelOffset(self, channel: str) -> int:
+
+        return InvalidationBus.HEADER_SIZE + InvalidationBus.CHANNELS.index(channel) * self.channelSize
+
+    def slotOffset(self, channelOffset: int, generation: int) -> int:
+
+        return channelOffset + InvalidationBus.HEADER_SIZE + (generation % self.slots) * InvalidationBus.SLOT_SIZE
+
+    def generation(self, channel: str) -> int:
+
+        if self.memory is None:
+
+            return 0
+
+        return InvalidationBus.COUNTER.unpack_from(self.memory, self.channelOffset(channel))[0]
+
+    def publish(self, channel: str, key: str | None = None):
+
+        ''' Invalidate one key of the channel in every worker, or all of them if key is None '''
+
+        if self.memory is None:
+
+            return
+
+        keyBytes = key.encode() if key is not None else b""
+
+        if key is None or len(keyBytes) > InvalidationBus.SLOT_SIZE - InvalidationBus.SLOT_HEADER.size:
+
+            keyLength, keyBytes = InvalidationBus.RESET_ALL, b""
+
+        else:
+
+            keyLength = len(keyBytes)
+
+        offset = self.channelOffset(channel)
+
+        with self.lock:
+
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+
+            try:
+
+                # The slot is written before the counter that makes it visible
+
+                generation = InvalidationBus.COUNTER.unpack_from(self.memory, offset)[0] + 1
+                slotOffset = self.slotOffset(offset, generation)
+                InvalidationBus.SLOT_HEADER.pack_into(self.memory, slotOffset, generation, keyLength)
+                self.memory[slotOffset + InvalidationBus.SLOT_HEADER.size:slotOffset + InvalidationBus.SLOT_HEADER.size + len(keyBytes)] = keyBytes
+                InvalidationBus.COUNTER.pack_into(self.memory, offset, generation)
+
+            finally:
+
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def read(self, channel: str, since: int) -> tuple[int, list[str] | None]:
+
+        ''' (current generation, keys invalidated after since). The keys are None if they must all be dropped. '''
+
+        offset = self.channelOffset(channel)
+
+        with self.lock:
+
+            fcntl.flock(self.fd, fcntl.LOCK_SH)
+
+            try:
+
+                generation = InvalidationBus.COUNTER.unpack_from(self.memory, offset)[0]
+
+                if generation - since > self.slots or generation < since:
+
+                    # Overwritten by newer entries, or the file was recreated
+
+                    return generation, None
+
+                keys = []
+
+                for expected in range(since + 1, generation + 1):
+
+                    slotOffset = self.slotOffset(offset, expected)
+                    slotGeneration, keyLength = InvalidationBus.SLOT_HEADER.unpack_from(self.memory, slotOffset)
+
+                    if slotGeneration != expected or keyLength == InvalidationBus.RESET_ALL:
+
+                        return generation, None
+
+                    keyOffset = slotOffset + InvalidationBus.SLOT_HEADER.size
+                    keys.append(self.memory[keyOffset:keyOffset + keyLength].decode())
+
+                return generation, keys
+
+            finally:
+
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def subscribe(self, channel: str) -> "InvalidationSubscription":
+
+        return InvalidationSubscription(self, channel)
+
+class InvalidationSubscription:
+
+    ''' One reader of an invalidation bus channel. Only entries published after subscribing are seen. '''
+
+    def __init__(self, bus: InvalidationBus, channel: str):
+
+        if channel not in InvalidationBus.CHANNELS:
+
+            raise ValueError(f"Unknown invalidation channel: {channel}")
+
+        self.bus = bus
+        self.channel = channel
+        self.lastSeen = bus.generation(channel)
+        self.lock = threading.Lock()
+
+    def publish(self, key: str | None = None):
+
+        self.bus.publish(self.channel, key)
+
+    def poll(self) -> tuple[bool, list[str]] | None:
+
+        ''' None if nothing changed, otherwise (drop everything, invalidated keys) '''
+
+        # One shared memory read when nothing changed
+
+        if not self.bus.isEnabled() or self.bus.generation(self.channel) == self.lastSeen:
+
+            return None
+
+        with self.lock:
+
+            generation, keys = self.bus.read(self.channel, self.lastSeen)
+
+            if generation == self.lastSeen:
+
+                return None
+
+            self.lastSeen = generation
+
+        return keys is None, keys or []
+
+class TTLCache:
+
+    ''' Bounded LRU cache whose entries expire after a fixed time to live '''
+
+    def __init__(self, name: str, maxSize: int = 1024, ttl: float = 60, channel: str | None = None):
+
+        self.name = name
+        self.maxSize = max(maxSize, 1)
+        self.ttl = ttl
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+        # With an invalidation bus channel, invalidate() reaches the same cache in the other workers. Keys must be strings.
+
+        self.subscription = InvalidationBus.getInstance().subscribe(channel) if channel is not None else None
+
+        # Statistics
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def sync(self):
+
+        # Drop what the other workers invalidated since the last call
+
+        if self.subscription is None:
+
+            return
+
+        changes = self.subscription.poll()
+
+        if changes is None:
+
+            return
+
+        dropAll, keys = changes
+
+        with self.lock:
+
+            if dropAll:
+
+                self.evictions += len(self.entries)
+                self.entries.clear()
+                return
+
+            for key in keys:
+
+                if self.entries.pop(key, None) is not None:
+
+                    self.evictions += 1
+
+    def get(self, key):
+
+        self.sync()
+
+        with self.lock:
+
+            entry = self.entries.get(key)
+
+            if entry is None:
+
+                self.misses += 1
+                return None
+
+            value, expiresAt = entry
+
+            if expiresAt < time.monotonic():
+
+                del self.entries[key]
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+
+        with self.lock:
+
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.maxSize:
+
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key, force: bool = False):
+
+        ''' Drop a key. The other workers are told only if this one held it, or with force after a write to the source. '''
+
+        with self.lock:
+
+            removed = self.entries.pop(key, None) is not None
+
+        if self.subscription is not None and (removed or force):
+
+            self.subscription.publish(key)
+
+    def clear(self, force: bool = False):
+
+        with self.lock:
+
+            removed = len(self.entries) > 0
+            self.entries.clear()
+
+        if self.subscription is not None and (removed or force):
+
+            self.subscription.publish()
+
+    def stats(self) -> dict:
+
+        with self.lock:
+
+            return {
+                "Name": self.name,
+                "Size": len(self.entries),
+                "MaxSize": self.maxSize,
+                "Hits": self.hits,
+                "Misses": self.misses,
+                "Evictions": self.evictions
+            }
+
+class TokenBucketLimiter:
+
+    ''' Per-key token buckets. Idle buckets are dropped once full, the rest are bounded by LRU. '''
+
+    def __init__(self, name: str, capacity: float, refillRate: float, maxSize: int = 10000):
+
+        self.name = name
+        self.capacity = max(capacity, 1)
+        self.refillRate = max(refillRate, 0.001)
+        self.maxSize = max(maxSize, 1)
+
+        # A bucket left alone this long is full again, the same as a new one
+
+        self.idleTime = self.capacity / self.refillRate
+
+        # Buckets: key -> (tokens, last update)
+
+        self.buckets = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def evictIdle(self, now: float):
+
+        while self.buckets:
+
+            key, (tokens, updatedAt) = next(iter(self.buckets.items()))
+
+            if now - updatedAt < self.idleTime:
+
+                break
+
+            del self.buckets[key]
+
+    def allow(self, key) -> bool:
+
+        ''' Take one token from the bucket of the key. Returns False if the bucket is empty. '''
+
+        now = time.monotonic()
+
+        with self.lock:
+
+            self.evictIdle(now)
+            tokens, updatedAt = self.buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updatedAt) * self.refillRate)
+            isAllowed = tokens >= 1
+
+            if isAllowed:
+
+                tokens -= 1
+
+            self.buckets[key] = (tokens, now)
+
+            while len(self.buckets) > self.maxSize:
+
+                self.buckets.popitem(last=False)
+
+            return isAllowed
+
+class PeriodicTask:
+
+    ''' Runs a function every interval seconds on a daemon thread '''
+
+    def __init__(self, name: str, interval: float, function):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger(f"PeriodicTask: {name}")
+
+        self.name = name
+        self.interval = interval
+        self.function = function
+        self.stopEvent = threading.Event()
+        self.thread = None
+
+    def isRunning(self) -> bool:
+
+        return self.thread is not None
+
+    def run(self):
+
+        while not self.stopEvent.wait(self.interval):
+
+            try:
+
+                self.function()
+
+            except Exception as e:
+
+                self.Logger.ShowError(e, f"Periodic task {self.name} failed.")
+
+    def start(self):
+
+        if self.thread is not None:
+
+            return
+
+        self.stopEvent.clear()
+        self.thread = threading.Thread(target=self.run, name=self.name, daemon=True)
+        self.thread.start()
+        self.Logger.Info(f"Periodic task started: [interval: {self.interval}s]")
+
+    def stop(self):
+
+        if self.thread is None:
+
+            return
+
+        self.stopEvent.set()
+        self.thread.join()
+        self.thread = None
+        self.Logger.Info("Periodic task stopped.")
\ No newline at end of file
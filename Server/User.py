@@ -1,12 +1,86 @@
+import AsyncTableAdapters
 import datetime
 import maplex
 import Session
 import TableAdapters
 import Tools
 
+#####################################
+# Login throttle in front of the password check
+
+class LoginThrottle:
+
+    ''' Rejects excess login attempts before any hashing or database work '''
+
+    def __init__(self):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger("LoginThrottle")
+
+        # Token buckets per user name and per source address
+
+        maxSize = Tools.readConfigValue("MAX_SIZE", 10000, "LOGIN_THROTTLE")
+        self.userBuckets = Tools.TokenBucketLimiter(
+            "LoginUser",
+            Tools.readConfigValue("USER_BURST", 5.0, "LOGIN_THROTTLE"),
+            Tools.readConfigValue("USER_RATE", 0.1, "LOGIN_THROTTLE"),
+            maxSize
+            )
+        self.addressBuckets = Tools.TokenBucketLimiter(
+            "LoginAddress",
+            Tools.readConfigValue("ADDRESS_BURST", 20.0, "LOGIN_THROTTLE"),
+            Tools.readConfigValue("ADDRESS_RATE", 1.0, "LOGIN_THROTTLE"),
+            maxSize
+            )
+
+        # Suspended users: user name -> suspended until
+        # The longest suspension is 8 x 30 minutes (failed count 10)
+
+        self.suspended = Tools.TTLCache("LoginSuspended", maxSize, 8 * 30 * 60, "LoginSuspended")
+
+    def check(self, userName: str, address: str | None) -> str | None:
+
+        ''' Returns the rejection message, or None if the attempt may go on '''
+
+        suspendedUntil = self.suspended.get(userName)
+
+        if suspendedUntil is not None and datetime.datetime.now() < suspendedUntil:
+
+            self.Logger.Info(f"Login rejected: User [{userName}] is suspended until {suspendedUntil}.")
+            return "User suspended due to multiple failed login attempts."
+
+        if address is not None and not self.addressBuckets.allow(address):
+
+            self.Logger.Warn(f"Login rejected: Too many attempts from [{address}].")
+            return "Too many login attempts. Try again later."
+
+        if not self.userBuckets.allow(userName):
+
+            self.Logger.Warn(f"Login rejected: Too many attempts for user [{userName}].")
+            return "Too many login attempts. Try again later."
+
+        return None
+
+    def mirror(self, userName: str, status: str, suspendedUntil: datetime.datetime | None):
+
+        ''' Follow the suspended state stored in the Users table '''
+
+        if status == "suspended" and suspendedUntil is not None:
+
+            self.suspended.set(userName, suspendedUntil)
+
+        else:
+
+            # Published only if this worker held a suspension, not on every failed attempt
+
+            self.suspended.invalidate(userName)
+
+loginThrottle = LoginThrottle()
+
 class UserLogin:
 
-    def __init__(self, userName: str, userPassword: str):
+    def __init__(self, userName: str, userPassword: str, connection=None):
 
         # Logging objects
 
@@ -15,8 +89,9 @@ class UserLogin:
         # Variables
 
         self.userName = userName
-        self.userPassword = Tools.stringHasher().hashString(userPassword, userName)
-        self.userTableAdapter = TableAdapters.UserTableAdapters()
+        self.userPassword = userPassword
+        self.connection = connection
+        self.userTableAdapter = TableAdapters.UserTableAdapters(connection)
 
         self.Logger.Info(f"UserLogin instance created for user [{self.userName}].")
 
@@ -25,37 +100,66 @@ class UserLogin:
         self.userTableAdapter.closeConnection()
         self.Logger.Info("Closed UserLogin object.")
 
-    def updateLoginFailed(self, userId: int, failedCount: int, failedAt: datetime.datetime | None = None) -> str:
+    def loginFailedStatus(self, userId: int, failedCount: int | None) -> str:
 
-        try:
+        ''' User status after a counted failure. None means the user row was not updated (inactive or removed). '''
 
-            status = "active"
+        if failedCount is None:
 
-            if failedAt is not None:
+            return "inactive"
 
-                self.Logger.Debug(f"Last failed login at {failedAt}, current failed count is {failedCount}.")
-                suspendCount = failedCount - 2
-                suspendTime = datetime.timedelta(minutes=30 * suspendCount)
+        status = "active"
 
-                if datetime.datetime.now() < failedAt + suspendTime or suspendCount < 1:
+        # Set as suspended if failed count reached 3
 
-                    if failedCount < 10:
+        if failedCount >= 3:
 
-                        failedCount += 1
+            self.Logger.Info(f"User ID [{userId}] account suspended due to multiple failed login attempts.")
+            status = "suspended"
 
-                # Set as suspended if failed count reached 3
+        loginThrottle.mirror(self.userName, status, self.suspendedUntil(failedCount, datetime.datetime.now()))
 
-                if failedCount >= 3:
+        return status
 
-                    self.Logger.Info(f"User ID [{userId}] account suspended due to multiple failed login attempts.")
-                    status = "suspended"
+    def suspendedUntil(self, failedCount: int, failedAt: datetime.datetime | None) -> datetime.datetime | None:
 
-                # Update failed time
+        if failedAt is None:
 
-                failedAt = datetime.datetime.now()
+            return None
 
-            self.userTableAdapter.updateLoginFailed(userId, failedCount, failedAt, status)
-            return status
+        suspendCount = failedCount - 2
+
+        return failedAt + datetime.timedelta(minutes=30 * suspendCount)
+
+    def isSuspended(self, failedCount: int, failedAt: datetime.datetime | None) -> bool:
+
+        if failedAt is None:
+
+            return False
+
+        self.Logger.Debug(f"Last failed login at {failedAt}, current failed count is {failedCount}.")
+
+        return datetime.datetime.now() < self.suspendedUntil(failedCount, failedAt)
+
+    def countLoginFailed(self, userId: int) -> str:
+
+        # The count, the suspension and the status are all updated by one statement
+
+        try:
+
+            return self.loginFailedStatus(userId, self.userTableAdapter.countLoginFailed(userId))
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to update login failed info.")
+            raise
+
+    def resetLoginFailed(self, userId: int):
+
+        try:
+
+            self.userTableAdapter.updateLoginFailed(userId, 0, None, "active")
+            loginThrottle.mirror(self.userName, "active", None)
         
         except Exception as e:
 
@@ -68,21 +172,16 @@ class UserLogin:
 
             status = "active"
 
-            if failedAt is not None:
-
-                self.Logger.Debug(f"Last failed login at {failedAt}, current failed count is {failedCount}.")
-                suspendCount = failedCount - 2
-                suspendTime = datetime.timedelta(minutes=30 * suspendCount)
+            if self.isSuspended(failedCount, failedAt):
 
-                if datetime.datetime.now() < failedAt + suspendTime:
+                self.Logger.Info(f"User account is currently suspended due to multiple failed login attempts.")
+                status = "suspended"
+                loginThrottle.mirror(self.userName, status, self.suspendedUntil(failedCount, failedAt))
 
-                    self.Logger.Info(f"User account is currently suspended due to multiple failed login attempts.")
-                    status = "suspended"
+            elif failedAt is not None:
 
-                else:
-
-                    self.Logger.Debug(f"Suspend time has passed. User account is no longer suspended.")
-                    self.updateLoginFailed(userId, 0, None)
+                self.Logger.Debug(f"Suspend time has passed. User account is no longer suspended.")
+                self.resetLoginFailed(userId)
 
             return status
         
@@ -91,9 +190,27 @@ class UserLogin:
             self.Logger.ShowError(e, "Failed to check suspended status.")
             raise
 
-    def Login(self) -> dict:
+    def rehashPassword(self, userId: int, tablePassword: str):
+
+        executor = Tools.HashExecutor.getInstance()
+
+        if not executor.needsRehash(tablePassword):
+
+            return
+
+        try:
+
+            self.userTableAdapter.updatePasswordHash(userId, executor.hash(self.userPassword))
 
-        retDict = {
+        except Exception as e:
+
+            # The login itself is still valid
+
+            self.Logger.Warn(f"Failed to upgrade password hash: {e}")
+
+    def newLoginResult(self) -> dict:
+
+        return {
             "LoginResult": 
                    {
                        "Login": False,
@@ -115,6 +232,10 @@ class UserLogin:
                    }
         }
 
+    def Login(self) -> dict:
+
+        retDict = self.newLoginResult()
+
         if self.userName == "":
 
             self.Logger.Warn("User name is blank. (This log should not be outputed.)")
@@ -141,21 +262,15 @@ class UserLogin:
                     retDict["LoginResult"]["Message"] = f"User account is inactive state."
                     return retDict
                 
+                # Hash only once the user is known to exist
+
                 tablePassword = userList[0][3]
                 
-                if tablePassword != self.userPassword:
+                if not Tools.HashExecutor.getInstance().verify(self.userPassword, tablePassword, self.userName):
 
                     # Update login failed info
 
-                    if userList[0][8] is None:
-
-                        suspendDatetime = datetime.datetime.now()
-
-                    else:
-
-                        suspendDatetime = userList[0][8]
-
-                    userStatus = self.updateLoginFailed(userList[0][0], userList[0][7], suspendDatetime)
+                    userStatus = self.countLoginFailed(userList[0][0])
                     
                     if userStatus == "suspended":
 
@@ -183,11 +298,15 @@ class UserLogin:
 
                     # Reset login failed count
 
-                    self.updateLoginFailed(userList[0][0], 0, None)
+                    self.resetLoginFailed(userList[0][0])
+
+                # Upgrade the stored hash made with outdated parameters
+
+                self.rehashPassword(userList[0][0], tablePassword)
                 
                 # Create and get new session
 
-                sessionInfo = Session.SessionUpdate().CreateNewSession(userList[0])
+                sessionInfo = Session.SessionUpdate(self.connection).CreateNewSession(userList[0])
 
                 if not sessionInfo:
 
@@ -223,7 +342,7 @@ class UserLogin:
 
 class UserPasswordUpdate:
 
-    def __init__(self, userName: str, userPassword: str, token: str, userOldPassword: str | None = None):
+    def __init__(self, userName: str, userPassword: str, token: str, userOldPassword: str | None = None, connection=None):
 
         # Logging objects
 
@@ -237,8 +356,8 @@ class UserPasswordUpdate:
 
         # Table adapters
 
-        self.userTableAdapter = TableAdapters.UserTableAdapters()
-        self.sessionTableAdapter = Session.CheckSession(token)
+        self.userTableAdapter = TableAdapters.UserTableAdapters(connection)
+        self.sessionTableAdapter = Session.CheckSession(token, connection)
 
     def close(self):
 
@@ -320,9 +439,8 @@ class UserPasswordUpdate:
                 # If this is an user reset, check the old password
 
                 dbOldPassword = userData[3]
-                userOldPasswordHash = Tools.stringHasher().hashString(self.userOldPassword, self.userName)
 
-                if dbOldPassword != userOldPasswordHash:
+                if not Tools.HashExecutor.getInstance().verify(self.userOldPassword, dbOldPassword, self.userName):
 
                     retDict["Message"] = "Password incorrect."
                     self.Logger.Error("User old password did not match.")
@@ -333,7 +451,7 @@ class UserPasswordUpdate:
 
             # Update password
 
-            newPasswordHash = Tools.stringHasher().hashString(self.userPassword, self.userName)
+            newPasswordHash = Tools.HashExecutor.getInstance().hash(self.userPassword)
             self.userTableAdapter.updateUserPassword(userData[0], newPasswordHash, sessionData[0])
             retDict["Update"] = True
             retDict["Message"] = "Password updated successfully."
@@ -349,7 +467,7 @@ class UserPasswordUpdate:
 
 class UserInfo:
 
-    def __init__(self, token: str):
+    def __init__(self, token: str, connection=None):
 
         # Logging objects
 
@@ -357,8 +475,8 @@ class UserInfo:
 
         # Table adapters
 
-        self.userTableAdapter = TableAdapters.UserTableAdapters()
-        self.sessionData = Session.CheckSession(token)
+        self.userTableAdapter = TableAdapters.UserTableAdapters(connection)
+        self.sessionData = Session.CheckSession(token, connection)
 
         # Variables
 
@@ -370,9 +488,125 @@ class UserInfo:
         self.sessionData.close()
         self.Logger.Info("Closed UserInfo object.")
 
-    def getUserInfo(self, userId: int | None = None, userName: str | None = None, eMail: str | None = None, accessLevel: str | None = None, companyId: int | None = None, userStatus: str | None = None, active: bool | None = None) -> list[dict] | None:
+    def checkSearchAuthority(self, retDict: dict, sessionInfo: tuple, companyId: int | None, accessLevel: str | None) -> bool:
+
+        ''' Check the session user may search the requested users. Sets the error info on failure. '''
+
+        sessionAccessLevel = sessionInfo[2]
+        sessionCompanyId = sessionInfo[1]
+
+        # Check access level
+
+        if sessionAccessLevel not in ["super", "admin", "user"]:
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = "User has no authority to get user information."
+            self.Logger.Error(f"User has no authority to get user information: Access level [{sessionAccessLevel}]")
+            return False
+        
+        if companyId is not None and sessionCompanyId != companyId and sessionAccessLevel != "super":
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = "User has no authority to get user information.\nCannot search other company user."
+            self.Logger.Error(f"User has no authority to get user information: Company mismatch. [Session: {sessionCompanyId} / Request: {companyId}]")
+            return False
+        
+        if accessLevel is not None:
+            
+            accessLevelDict = {"super": 3, "admin": 2, "user": 1, "guest": 0}
+
+            if accessLevel not in accessLevelDict:
+
+                retDict["ErrorInfo"]["Error"] = True
+                retDict["ErrorInfo"]["Message"] = "Bad access level."
+                self.Logger.Error(f"Bad access level: {accessLevel}")
+                return False
+            
+            if accessLevelDict[sessionAccessLevel] <= accessLevelDict[accessLevel] and sessionAccessLevel != "super":
+
+                retDict["ErrorInfo"]["Error"] = True
+                retDict["ErrorInfo"]["Message"] = "User has no authority to get user information.\nCannot search same or higher access level user."
+                self.Logger.Error(f"User has no authority to get user information: Access level too high. [Session: {sessionAccessLevel} / Request: {accessLevel}]")
+                return False
+
+        return True
+
+    def checkPageRequest(self, retDict: dict, cursor: str | None, limit: int | None) -> tuple[bool, int | None, int]:
+
+        ''' Check the paging parameters. Returns the result, the last user ID of the previous page and the page size. '''
+
+        defaultLimit = Tools.readConfigValue("DEFAULT_LIMIT", 100, "USER_LISTING")
+        maxLimit = Tools.readConfigValue("MAX_LIMIT", 500, "USER_LISTING")
+
+        if limit is None:
+
+            limit = defaultLimit
+
+        if limit < 1 or limit > maxLimit:
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = f"Limit must be between 1 and {maxLimit}."
+            self.Logger.Error(f"Bad page limit: {limit}")
+            return False, None, limit
+
+        if cursor is None:
+
+            return True, None, limit
+
+        position = Tools.decodeCursor(cursor)
+
+        if position is None or not isinstance(position.get("UserID"), int):
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = "Bad cursor."
+            self.Logger.Error(f"Bad page cursor: {cursor}")
+            return False, None, limit
+
+        return True, position["UserID"], limit
+
+    def pageOf(self, retDict: dict, userList: tuple[tuple] | None, limit: int) -> tuple[tuple] | None:
+
+        ''' Cut the extra row off the page and set the cursor of the next page '''
+
+        if userList and len(userList) > limit:
+
+            userList = userList[:limit]
+            retDict["NextCursor"] = Tools.encodeCursor({"UserID": userList[-1][0]})
+
+        return userList
+
+    def activeUserIds(self, userList: tuple[tuple], active: bool | None) -> set[int]:
+
+        ''' Active users among the selected ones. Resolved in one query unless the select already filtered them. '''
+
+        if active is not None:
+
+            return {user[0] for user in userList} if active else set()
+
+        try:
+
+            return self.sessionData.activeUserIds([user[0] for user in userList])
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to check if users are active.")
+            return set()
+
+    def userDict(self, user: tuple, isActive: bool) -> dict:
+
+        return {
+            "UserID": user[0],
+            "UserName": user[1],
+            "Email": user[2],
+            "AccessLevel": user[5],
+            "CompanyID": user[6],
+            "UserStatus": user[9],
+            "Active": isActive
+        }
+
+    def getUserInfo(self, userId: int | None = None, userName: str | None = None, eMail: str | None = None, accessLevel: str | None = None, companyId: int | None = None, userStatus: str | None = None, active: bool | None = None, cursor: str | None = None, limit: int | None = None) -> list[dict] | None:
 
-        retDict = {"Users": [], "ErrorInfo": {"Error": False, "Message": ""}}
+        retDict = {"Users": [], "NextCursor": None, "ErrorInfo": {"Error": False, "Message": ""}}
 
         # Check parameters
 
@@ -395,76 +629,32 @@ class UserInfo:
                 return retDict
             
             sessionInfo = self.sessionData.GetSessionInfo()
-            sessionAccessLevel = sessionInfo[2]
-            sessionCompanyId = sessionInfo[1]
 
-            # Check access level
+            if not self.checkSearchAuthority(retDict, sessionInfo, companyId, accessLevel):
 
-            if sessionAccessLevel not in ["super", "admin", "user"]:
-
-                retDict["ErrorInfo"]["Error"] = True
-                retDict["ErrorInfo"]["Message"] = "User has no authority to get user information."
-                self.Logger.Error(f"User has no authority to get user information: Access level [{sessionAccessLevel}]")
                 return retDict
-            
-            if companyId is not None and sessionCompanyId != companyId and sessionAccessLevel != "super":
 
-                retDict["ErrorInfo"]["Error"] = True
-                retDict["ErrorInfo"]["Message"] = "User has no authority to get user information.\nCannot search other company user."
-                self.Logger.Error(f"User has no authority to get user information: Company mismatch. [Session: {sessionCompanyId} / Request: {companyId}]")
-                return retDict
-            
-            if accessLevel is not None:
-                
-                accessLevelDict = {"super": 3, "admin": 2, "user": 1, "guest": 0}
+            checkResult, afterUserId, limit = self.checkPageRequest(retDict, cursor, limit)
 
-                if accessLevel not in accessLevelDict:
+            if not checkResult:
 
-                    retDict["ErrorInfo"]["Error"] = True
-                    retDict["ErrorInfo"]["Message"] = "Bad access level."
-                    self.Logger.Error(f"Bad access level: {accessLevel}")
-                    return retDict
-                
-                if accessLevelDict[sessionAccessLevel] <= accessLevelDict[accessLevel] and sessionAccessLevel != "super":
+                return retDict
 
-                    retDict["ErrorInfo"]["Error"] = True
-                    retDict["ErrorInfo"]["Message"] = "User has no authority to get user information.\nCannot search same or higher access level user."
-                    self.Logger.Error(f"User has no authority to get user information: Access level too high. [Session: {sessionAccessLevel} / Request: {accessLevel}]")
-                    return retDict
-                
-            # Get user info
+            # Get one page of users (one extra row tells if there is a next page)
+            # The active filter runs in the same query
 
-            userList = self.userTableAdapter.selectUser(userId=userId, userName=userName, eMail=eMail, accessLevel=accessLevel, companyId=companyId, userStatus=userStatus)
+            userList = self.userTableAdapter.selectUser(userId=userId, userName=userName, eMail=eMail, accessLevel=accessLevel, companyId=companyId, userStatus=userStatus, active=active, afterUserId=afterUserId, limit=limit + 1)
+            userList = self.pageOf(retDict, userList, limit)
 
             # Build return dict user list
 
             if userList:
 
-                for user in userList:
-
-                    try:
-
-                        isActive = self.sessionData.isActive(user[0])
-
-                    except Exception as e:
-
-                        self.Logger.ShowError(e, "Failed to check if user is active.")
-                        isActive = False
-
-                    if active is not None and isActive != active:
+                activeUserIds = self.activeUserIds(userList, active)
 
-                        continue
+                for user in userList:
 
-                    userDict = {
-                        "UserID": user[0],
-                        "UserName": user[1],
-                        "Email": user[2],
-                        "AccessLevel": user[5],
-                        "CompanyID": user[6],
-                        "UserStatus": user[9],
-                        "Active": isActive
-                    }
-                    retDict["Users"].append(userDict)
+                    retDict["Users"].append(self.userDict(user, user[0] in activeUserIds))
 
             return retDict
         
@@ -475,9 +665,27 @@ class UserInfo:
             retDict["ErrorInfo"]["Message"] = f"{e}"
             return retDict
         
-    def addUser(self, userName: str, eMail: str, password: str, initialPassword: int, accessLevel: str, userStatus: str, companyId: int | None = None) -> dict:
+    def exportUserInfo(self, userId: int | None = None, userName: str | None = None, eMail: str | None = None, accessLevel: str | None = None, companyId: int | None = None, userStatus: str | None = None, active: bool | None = None, exportFormat: str = "ndjson") -> tuple[dict, Tools.ExportWriter | None, object]:
 
-        retDict = {"Created": False, "UserID": None, "ErrorInfo": {"Error": False, "Message": ""}}
+        ''' Check the export request like getUserInfo. Returns the result, the writer and the row chunks to stream. '''
+
+        retDict = {"ErrorInfo": {"Error": False, "Message": ""}}
+
+        # Check parameters
+
+        if userId is None and userName is None and eMail is None and accessLevel is None and companyId is None and userStatus is None:
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = "At least one search condition must be specified."
+            self.Logger.Error("At least one search condition must be specified.")
+            return retDict, None, None
+
+        if not Tools.ExportWriter.isSupported(exportFormat):
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = "Bad export format."
+            self.Logger.Error(f"Bad export format: {exportFormat}")
+            return retDict, None, None
 
         try:
 
@@ -488,67 +696,137 @@ class UserInfo:
                 retDict["ErrorInfo"]["Error"] = True
                 retDict["ErrorInfo"]["Message"] = "Session time out."
                 self.Logger.Error("User session time out.")
-                return retDict
-            
+                return retDict, None, None
+
             sessionInfo = self.sessionData.GetSessionInfo()
-            sessionAccessLevel = sessionInfo[2]
-            sessionUserId = sessionInfo[0]
 
-            # Check access level
+            if not self.checkSearchAuthority(retDict, sessionInfo, companyId, accessLevel):
 
-            if sessionAccessLevel not in ["super", "admin", "user"]:
+                return retDict, None, None
 
-                retDict["ErrorInfo"]["Error"] = True
-                retDict["ErrorInfo"]["Message"] = "Guest user has no authority to add user."
-                self.Logger.Error(f"Guest user has no authority to add user: Access level [{sessionAccessLevel}]")
-                return retDict
-            
-            if sessionAccessLevel != "super":
+            writer = Tools.ExportWriter(exportFormat)
+            filters = {"userId": userId, "userName": userName, "eMail": eMail, "accessLevel": accessLevel, "companyId": companyId, "userStatus": userStatus, "active": active}
+
+            return retDict, writer, self.exportRows(writer, filters)
 
-                if companyId is None:
+        except Exception as e:
 
-                    companyId = sessionInfo[1]
+            self.Logger.ShowError(e, "Failed to export user information.")
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = f"{e}"
+            return retDict, None, None
 
-                elif companyId != sessionInfo[1]:
+    def exportRows(self, writer: Tools.ExportWriter, filters: dict):
 
-                    retDict["ErrorInfo"]["Error"] = True
-                    retDict["ErrorInfo"]["Message"] = "User has no authority to add user.\nCannot add user to other company."
-                    self.Logger.Error(f"User has no authority to add user: Company mismatch. [Session: {sessionInfo[1]} / Request: {companyId}]")
-                    return retDict
-                
-            # Check value validity
+        # Streams on the request connection, which the unit of work keeps until the body is sent
 
-            if accessLevel not in ["super", "admin", "user", "guest"]:
+        userTableAdapter = None
 
-                retDict["ErrorInfo"]["Error"] = True
-                retDict["ErrorInfo"]["Message"] = "Bad access level."
-                self.Logger.Error(f"Bad access level: {accessLevel}")
-                return retDict
+        try:
+
+            userTableAdapter = TableAdapters.UserTableAdapters(self.userTableAdapter.connection)
+
+            for users in userTableAdapter.streamUser(**filters, chunkSize=Tools.readConfigValue("CHUNK_SIZE", 500, "EXPORT")):
+
+                yield writer.chunk([self.userDict(user, bool(user[-1])) for user in users])
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to export user information.")
+            yield writer.error(f"{e}")
 
-            if userStatus not in ["active", "inactive", "suspended"]:
+        finally:
+
+            if userTableAdapter is not None:
+
+                userTableAdapter.closeConnection()
+
+    def checkAddUserRequest(self, retDict: dict, sessionInfo: tuple, companyId: int | None, accessLevel: str, userStatus: str, password: str) -> tuple[bool, int | None]:
+
+        ''' Check the session user may add the requested user. Returns the result and the resolved company ID. '''
+
+        sessionAccessLevel = sessionInfo[2]
+
+        # Check access level
+
+        if sessionAccessLevel not in ["super", "admin", "user"]:
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = "Guest user has no authority to add user."
+            self.Logger.Error(f"Guest user has no authority to add user: Access level [{sessionAccessLevel}]")
+            return False, companyId
+        
+        if sessionAccessLevel != "super":
+
+            if companyId is None:
+
+                companyId = sessionInfo[1]
+
+            elif companyId != sessionInfo[1]:
 
                 retDict["ErrorInfo"]["Error"] = True
-                retDict["ErrorInfo"]["Message"] = "Bad user status."
-                self.Logger.Error(f"Bad user status: {userStatus}")
-                return retDict
+                retDict["ErrorInfo"]["Message"] = "User has no authority to add user.\nCannot add user to other company."
+                self.Logger.Error(f"User has no authority to add user: Company mismatch. [Session: {sessionInfo[1]} / Request: {companyId}]")
+                return False, companyId
             
-            if not Tools.CheckPasswordPattern(password):
+        # Check value validity
+
+        if accessLevel not in ["super", "admin", "user", "guest"]:
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = "Bad access level."
+            self.Logger.Error(f"Bad access level: {accessLevel}")
+            return False, companyId
+
+        if userStatus not in ["active", "inactive", "suspended"]:
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = "Bad user status."
+            self.Logger.Error(f"Bad user status: {userStatus}")
+            return False, companyId
+        
+        if not Tools.CheckPasswordPattern(password):
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = "Bad password: Password must be at least 8 characters long and contain uppercase, lowercase, digit, and special character."
+            self.Logger.Error("Bad password pattern.")
+            return False, companyId
+        
+        if accessLevel != "super" and companyId is None:
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = "Company must be specified for non-Super users."
+            self.Logger.Error("Company must be specified for non-Super users.")
+            return False, companyId
+
+        return True, companyId
+
+    def addUser(self, userName: str, eMail: str, password: str, initialPassword: int, accessLevel: str, userStatus: str, companyId: int | None = None) -> dict:
+
+        retDict = {"Created": False, "UserID": None, "ErrorInfo": {"Error": False, "Message": ""}}
+
+        try:
+
+            # Get session infos
+
+            if not self.sessionData.IsValid(True):
 
                 retDict["ErrorInfo"]["Error"] = True
-                retDict["ErrorInfo"]["Message"] = "Bad password: Password must be at least 8 characters long and contain uppercase, lowercase, digit, and special character."
-                self.Logger.Error("Bad password pattern.")
+                retDict["ErrorInfo"]["Message"] = "Session time out."
+                self.Logger.Error("User session time out.")
                 return retDict
             
-            if accessLevel != "super" and companyId is None:
+            sessionInfo = self.sessionData.GetSessionInfo()
+            sessionUserId = sessionInfo[0]
+            checkResult, companyId = self.checkAddUserRequest(retDict, sessionInfo, companyId, accessLevel, userStatus, password)
+
+            if not checkResult:
 
-                retDict["ErrorInfo"]["Error"] = True
-                retDict["ErrorInfo"]["Message"] = "Company must be specified for non-Super users."
-                self.Logger.Error("Company must be specified for non-Super users.")
                 return retDict
-            
+
             # Add user
 
-            retDict["Created"] = self.userTableAdapter.insertUser(
+            retDict["UserID"] = self.userTableAdapter.insertUser(
                 userName=userName,
                 eMail=eMail,
                 userPassword=password,
@@ -559,9 +837,10 @@ class UserInfo:
                 createUserId=sessionUserId
             )
 
+            retDict["Created"] = retDict["UserID"] is not None
+
             if retDict["Created"]:
 
-                retDict["UserID"] = self.userTableAdapter.selectUser(userName=userName)[0][0]
                 self.Logger.Info(f"User [{userName}] added successfully. [UserID: {retDict['UserID']}]")
 
             return retDict
@@ -572,3 +851,670 @@ class UserInfo:
             retDict["ErrorInfo"]["Error"] = True
             retDict["ErrorInfo"]["Message"] = f"{e}"
             return retDict
+
+    def checkBulkUsers(self, sessionInfo: tuple, users: list[dict]) -> tuple[list[dict], list[int]]:
+
+        ''' Check every requested user like addUser. Returns the per-row results and the indexes of the valid rows. '''
+
+        results = []
+        validIndexes = []
+        userNames = set()
+        eMails = set()
+
+        for index, user in enumerate(users):
+
+            result = {"Index": index, "UserName": user["UserName"], "Created": False, "UserID": None, "Message": ""}
+            results.append(result)
+
+            if user["UserName"] in {None, ""} or user["Email"] in {None, ""}:
+
+                result["Message"] = "User name and email are required."
+                continue
+
+            if user["UserName"] in userNames or user["Email"] in eMails:
+
+                result["Message"] = "Duplicate user in the request."
+                continue
+
+            userNames.add(user["UserName"])
+            eMails.add(user["Email"])
+
+            rowDict = {"ErrorInfo": {"Error": False, "Message": ""}}
+            checkResult, user["CompanyID"] = self.checkAddUserRequest(rowDict, sessionInfo, user["CompanyID"], user["AccessLevel"], user["UserStatus"], user["Password"] or "")
+
+            if not checkResult:
+
+                result["Message"] = rowDict["ErrorInfo"]["Message"]
+                continue
+
+            validIndexes.append(index)
+
+        return results, validIndexes
+
+    def dropExistingUsers(self, results: list[dict], users: list[dict], indexes: list[int], existingUsers: tuple[set[str], set[str]]) -> list[int]:
+
+        existingNames, existingEmails = existingUsers
+        newIndexes = []
+
+        for index in indexes:
+
+            if users[index]["UserName"] in existingNames or users[index]["Email"] in existingEmails:
+
+                results[index]["Message"] = "User already exists."
+
+            else:
+
+                newIndexes.append(index)
+
+        return newIndexes
+
+    def bulkUserRows(self, users: list[dict], indexes: list[int], passwordHashes: list[str]) -> list[tuple]:
+
+        return [
+            (users[index]["UserName"], users[index]["Email"], passwordHash, 1 if users[index]["InitialPassword"] is None else users[index]["InitialPassword"], users[index]["AccessLevel"], users[index]["CompanyID"], users[index]["UserStatus"])
+            for index, passwordHash in zip(indexes, passwordHashes)
+            ]
+
+    def markInserted(self, results: list[dict], users: list[dict], indexes: list[int], userIds: dict[str, int]):
+
+        for index in indexes:
+
+            results[index]["Created"] = True
+            results[index]["UserID"] = userIds.get(users[index]["UserName"])
+            results[index]["Message"] = "Created."
+
+    def markFailed(self, results: list[dict], indexes: list[int], message: str):
+
+        for index in indexes:
+
+            results[index]["Message"] = message
+
+    def addUsers(self, users: list[dict]) -> dict:
+
+        ''' Add many users. Passwords are hashed in parallel and rows are inserted in chunks, one savepoint each. '''
+
+        retDict = {"Created": 0, "Results": [], "ErrorInfo": {"Error": False, "Message": ""}}
+        maxUsers = Tools.readConfigValue("MAX_USERS", 5000, "BULK_USERS")
+        chunkSize = max(Tools.readConfigValue("CHUNK_SIZE", 500, "BULK_USERS"), 1)
+
+        if len(users) > maxUsers:
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = f"Too many users: at most {maxUsers} users can be added at once."
+            self.Logger.Error(f"Too many users in bulk request: {len(users)}")
+            return retDict
+
+        try:
+
+            # Get session infos
+
+            if not self.sessionData.IsValid(True):
+
+                retDict["ErrorInfo"]["Error"] = True
+                retDict["ErrorInfo"]["Message"] = "Session time out."
+                self.Logger.Error("User session time out.")
+                return retDict
+
+            sessionInfo = self.sessionData.GetSessionInfo()
+            results, validIndexes = self.checkBulkUsers(sessionInfo, users)
+            retDict["Results"] = results
+
+            # Each chunk is inserted under a savepoint of the request transaction, so a failed chunk does not undo the others
+
+            executor = Tools.HashExecutor.getInstance()
+
+            for start in range(0, len(validIndexes), chunkSize):
+
+                indexes = validIndexes[start:start + chunkSize]
+                inSavepoint = False
+
+                try:
+
+                    existingUsers = self.userTableAdapter.selectExistingUsers([users[index]["UserName"] for index in indexes], [users[index]["Email"] for index in indexes])
+                    indexes = self.dropExistingUsers(results, users, indexes, existingUsers)
+
+                    if not indexes:
+
+                        continue
+
+                    passwordHashes = executor.hashMany([users[index]["Password"] for index in indexes])
+                    self.userTableAdapter.savepoint("bulk_users")
+                    inSavepoint = True
+                    userIds = self.userTableAdapter.insertUsers(self.bulkUserRows(users, indexes, passwordHashes), sessionInfo[0])
+                    self.userTableAdapter.releaseSavepoint("bulk_users")
+                    self.markInserted(results, users, indexes, userIds)
+                    retDict["Created"] += len(indexes)
+
+                except Exception as e:
+
+                    self.Logger.ShowError(e, "Failed to add a chunk of users.")
+
+                    if inSavepoint:
+
+                        self.userTableAdapter.rollbackToSavepoint("bulk_users")
+
+                    self.markFailed(results, indexes, f"{e}")
+
+            self.Logger.Info(f"Bulk user request done: [{retDict['Created']} / {len(users)} created]")
+            return retDict
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to add users.")
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = f"{e}"
+            return retDict
+
+class AsyncUserLogin(UserLogin):
+
+    def __init__(self, userName: str, userPassword: str, userTableAdapter: AsyncTableAdapters.AsyncUserTableAdapters, connection=None):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger("AsyncUserLogin")
+
+        # Variables
+
+        self.userName = userName
+        self.userPassword = userPassword
+        self.connection = connection
+        self.userTableAdapter = userTableAdapter
+
+        self.Logger.Info(f"AsyncUserLogin instance created for user [{self.userName}].")
+
+    @classmethod
+    async def create(cls, userName: str, userPassword: str, connection=None) -> "AsyncUserLogin":
+
+        return cls(userName, userPassword, await AsyncTableAdapters.AsyncUserTableAdapters.create(connection), connection)
+
+    async def close(self):
+
+        await self.userTableAdapter.closeConnection()
+        self.Logger.Info("Closed AsyncUserLogin object.")
+
+    async def rehashPassword(self, userId: int, tablePassword: str):
+
+        executor = Tools.HashExecutor.getInstance()
+
+        if not executor.needsRehash(tablePassword):
+
+            return
+
+        try:
+
+            await self.userTableAdapter.updatePasswordHash(userId, await executor.hashAsync(self.userPassword))
+
+        except Exception as e:
+
+            # The login itself is still valid
+
+            self.Logger.Warn(f"Failed to upgrade password hash: {e}")
+
+    async def countLoginFailed(self, userId: int) -> str:
+
+        try:
+
+            return self.loginFailedStatus(userId, await self.userTableAdapter.countLoginFailed(userId))
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to update login failed info.")
+            raise
+
+    async def resetLoginFailed(self, userId: int):
+
+        try:
+
+            await self.userTableAdapter.updateLoginFailed(userId, 0, None, "active")
+            loginThrottle.mirror(self.userName, "active", None)
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to update login failed info.")
+            raise
+
+    async def checkSuspended(self, userId: int, failedCount: int, failedAt: datetime.datetime | None) -> str:
+
+        try:
+
+            status = "active"
+
+            if self.isSuspended(failedCount, failedAt):
+
+                self.Logger.Info(f"User account is currently suspended due to multiple failed login attempts.")
+                status = "suspended"
+                loginThrottle.mirror(self.userName, status, self.suspendedUntil(failedCount, failedAt))
+
+            elif failedAt is not None:
+
+                self.Logger.Debug(f"Suspend time has passed. User account is no longer suspended.")
+                await self.resetLoginFailed(userId)
+
+            return status
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to check suspended status.")
+            raise
+
+    async def Login(self) -> dict:
+
+        retDict = self.newLoginResult()
+
+        if self.userName == "":
+
+            self.Logger.Warn("User name is blank. (This log should not be outputed.)")
+            retDict["LoginResult"]["Message"] = "User name is blank."
+            return retDict
+
+        try:
+
+            userList = await self.userTableAdapter.selectUser(userName=self.userName)
+
+            if userList:
+
+                if len(userList) > 1:
+
+                    self.Logger.Warn("Invalid user info: Duplicate user name.")
+                    return retDict
+
+                userStatus = userList[0][9]
+
+                if userStatus == "inactive":
+
+                    # Treat inactive users as non-loginable
+                    self.Logger.Warn(f"User account is inactive state.")
+                    retDict["LoginResult"]["Message"] = f"User account is inactive state."
+                    return retDict
+
+                # Hash only once the user is known to exist
+
+                tablePassword = userList[0][3]
+
+                if not await Tools.HashExecutor.getInstance().verifyAsync(self.userPassword, tablePassword, self.userName):
+
+                    # Update login failed info
+
+                    userStatus = await self.countLoginFailed(userList[0][0])
+
+                    if userStatus == "suspended":
+
+                        self.Logger.Info("Invalid user info: Invalid user password and account is suspended.")
+                        retDict["LoginResult"]["Message"] = "User suspended due to multiple failed login attempts."
+                        return retDict
+
+                    else:
+
+                        self.Logger.Info("Invalid user info: Invalid user password.")
+
+                    return retDict
+
+                if userStatus == "suspended":
+
+                    # Check login failed count and time
+
+                    if await self.checkSuspended(userList[0][0], userList[0][7], userList[0][8]) == "suspended":
+
+                        self.Logger.Info("Invalid user info: User account is still suspended.")
+                        retDict["LoginResult"]["Message"] = "User suspended due to multiple failed login attempts."
+                        return retDict
+
+                elif userList[0][7] != 0 or userList[0][8] is not None:
+
+                    # Reset login failed count
+
+                    await self.resetLoginFailed(userList[0][0])
+
+                # Upgrade the stored hash made with outdated parameters
+
+                await self.rehashPassword(userList[0][0], tablePassword)
+
+                # Create and get new session
+
+                sessionInfo = await Session.AsyncSessionUpdate(self.connection).CreateNewSession(userList[0])
+
+                if not sessionInfo:
+
+                    self.Logger.Warn("Invalid session info: Duplicate session.")
+                    retDict["LoginResult"]["Message"] = "There is another session remains from another computer."
+                    return retDict
+
+                retDict["LoginResult"]["Login"] = True
+                retDict["LoginResult"]["Token"] = sessionInfo["Token"]
+                retDict["LoginResult"]["Message"] = "Login success."
+                retDict["SessionInfo"]["UserID"] = sessionInfo["UserID"]
+                retDict["SessionInfo"]["CompanyID"] = sessionInfo["CompanyID"]
+                retDict["SessionInfo"]["AccessLevel"] = sessionInfo["AccessLevel"]
+                retDict["SessionInfo"]["LogoutTime"] = sessionInfo["LogoutTime"]
+
+                if userList[0][4] == 1:
+
+                    retDict["LoginResult"]["InitialPassword"] = True
+
+                return retDict
+
+            else:
+
+                self.Logger.Warn("User name not found.")
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to login.")
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = f"{e}"
+
+        return retDict
+
+class AsyncUserInfo(UserInfo):
+
+    def __init__(self, token: str, userTableAdapter: AsyncTableAdapters.AsyncUserTableAdapters, sessionData: Session.AsyncCheckSession):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger("AsyncUserInfo")
+
+        # Table adapters
+
+        self.userTableAdapter = userTableAdapter
+        self.sessionData = sessionData
+
+        # Variables
+
+        self.token = token
+
+    @classmethod
+    async def create(cls, token: str, connection=None) -> "AsyncUserInfo":
+
+        userTableAdapter = await AsyncTableAdapters.AsyncUserTableAdapters.create(connection)
+
+        try:
+
+            sessionData = await Session.AsyncCheckSession.create(token, connection)
+
+        except Exception:
+
+            await userTableAdapter.closeConnection()
+            raise
+
+        return cls(token, userTableAdapter, sessionData)
+
+    async def close(self):
+
+        await self.userTableAdapter.closeConnection()
+        await self.sessionData.close()
+        self.Logger.Info("Closed AsyncUserInfo object.")
+
+    async def activeUserIds(self, userList: tuple[tuple], active: bool | None) -> set[int]:
+
+        if active is not None:
+
+            return {user[0] for user in userList} if active else set()
+
+        try:
+
+            return await self.sessionData.activeUserIds([user[0] for user in userList])
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to check if users are active.")
+            return set()
+
+    async def getUserInfo(self, userId: int | None = None, userName: str | None = None, eMail: str | None = None, accessLevel: str | None = None, companyId: int | None = None, userStatus: str | None = None, active: bool | None = None, cursor: str | None = None, limit: int | None = None) -> list[dict] | None:
+
+        retDict = {"Users": [], "NextCursor": None, "ErrorInfo": {"Error": False, "Message": ""}}
+
+        # Check parameters
+
+        if userId is None and userName is None and eMail is None and accessLevel is None and companyId is None and userStatus is None:
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = "At least one search condition must be specified."
+            self.Logger.Error("At least one search condition must be specified.")
+            return retDict
+
+        try:
+
+            # Get session infos
+
+            if not await self.sessionData.IsValid(True):
+
+                retDict["ErrorInfo"]["Error"] = True
+                retDict["ErrorInfo"]["Message"] = "Session time out."
+                self.Logger.Error("User session time out.")
+                return retDict
+
+            sessionInfo = await self.sessionData.GetSessionInfo()
+
+            if not self.checkSearchAuthority(retDict, sessionInfo, companyId, accessLevel):
+
+                return retDict
+
+            checkResult, afterUserId, limit = self.checkPageRequest(retDict, cursor, limit)
+
+            if not checkResult:
+
+                return retDict
+
+            # Get one page of users (one extra row tells if there is a next page)
+            # The active filter runs in the same query
+
+            userList = await self.userTableAdapter.selectUser(userId=userId, userName=userName, eMail=eMail, accessLevel=accessLevel, companyId=companyId, userStatus=userStatus, active=active, afterUserId=afterUserId, limit=limit + 1)
+            userList = self.pageOf(retDict, userList, limit)
+
+            # Build return dict user list
+
+            if userList:
+
+                activeUserIds = await self.activeUserIds(userList, active)
+
+                for user in userList:
+
+                    retDict["Users"].append(self.userDict(user, user[0] in activeUserIds))
+
+            return retDict
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to get user information.")
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = f"{e}"
+            return retDict
+
+    async def exportUserInfo(self, userId: int | None = None, userName: str | None = None, eMail: str | None = None, accessLevel: str | None = None, companyId: int | None = None, userStatus: str | None = None, active: bool | None = None, exportFormat: str = "ndjson") -> tuple[dict, Tools.ExportWriter | None, object]:
+
+        retDict = {"ErrorInfo": {"Error": False, "Message": ""}}
+
+        # Check parameters
+
+        if userId is None and userName is None and eMail is None and accessLevel is None and companyId is None and userStatus is None:
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = "At least one search condition must be specified."
+            self.Logger.Error("At least one search condition must be specified.")
+            return retDict, None, None
+
+        if not Tools.ExportWriter.isSupported(exportFormat):
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = "Bad export format."
+            self.Logger.Error(f"Bad export format: {exportFormat}")
+            return retDict, None, None
+
+        try:
+
+            # Get session infos
+
+            if not await self.sessionData.IsValid(True):
+
+                retDict["ErrorInfo"]["Error"] = True
+                retDict["ErrorInfo"]["Message"] = "Session time out."
+                self.Logger.Error("User session time out.")
+                return retDict, None, None
+
+            sessionInfo = await self.sessionData.GetSessionInfo()
+
+            if not self.checkSearchAuthority(retDict, sessionInfo, companyId, accessLevel):
+
+                return retDict, None, None
+
+            writer = Tools.ExportWriter(exportFormat)
+            filters = {"userId": userId, "userName": userName, "eMail": eMail, "accessLevel": accessLevel, "companyId": companyId, "userStatus": userStatus, "active": active}
+
+            return retDict, writer, self.exportRows(writer, filters)
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to export user information.")
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = f"{e}"
+            return retDict, None, None
+
+    async def exportRows(self, writer: Tools.ExportWriter, filters: dict):
+
+        # Streams on the request connection, which the unit of work keeps until the body is sent
+
+        userTableAdapter = None
+
+        try:
+
+            userTableAdapter = await AsyncTableAdapters.AsyncUserTableAdapters.create(self.userTableAdapter.connection)
+
+            async for users in userTableAdapter.streamUser(**filters, chunkSize=Tools.readConfigValue("CHUNK_SIZE", 500, "EXPORT")):
+
+                yield writer.chunk([self.userDict(user, bool(user[-1])) for user in users])
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to export user information.")
+            yield writer.error(f"{e}")
+
+        finally:
+
+            if userTableAdapter is not None:
+
+                await userTableAdapter.closeConnection()
+
+    async def addUser(self, userName: str, eMail: str, password: str, initialPassword: int, accessLevel: str, userStatus: str, companyId: int | None = None) -> dict:
+
+        retDict = {"Created": False, "UserID": None, "ErrorInfo": {"Error": False, "Message": ""}}
+
+        try:
+
+            # Get session infos
+
+            if not await self.sessionData.IsValid(True):
+
+                retDict["ErrorInfo"]["Error"] = True
+                retDict["ErrorInfo"]["Message"] = "Session time out."
+                self.Logger.Error("User session time out.")
+                return retDict
+
+            sessionInfo = await self.sessionData.GetSessionInfo()
+            sessionUserId = sessionInfo[0]
+            checkResult, companyId = self.checkAddUserRequest(retDict, sessionInfo, companyId, accessLevel, userStatus, password)
+
+            if not checkResult:
+
+                return retDict
+
+            # Add user
+
+            retDict["UserID"] = await self.userTableAdapter.insertUser(
+                userName=userName,
+                eMail=eMail,
+                userPassword=password,
+                initialPassword=initialPassword,
+                accessLevel=accessLevel,
+                companyId=companyId,
+                userStatus=userStatus,
+                createUserId=sessionUserId
+            )
+
+            retDict["Created"] = retDict["UserID"] is not None
+
+            if retDict["Created"]:
+
+                self.Logger.Info(f"User [{userName}] added successfully. [UserID: {retDict['UserID']}]")
+
+            return retDict
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to add user.")
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = f"{e}"
+            return retDict
+
+    async def addUsers(self, users: list[dict]) -> dict:
+
+        retDict = {"Created": 0, "Results": [], "ErrorInfo": {"Error": False, "Message": ""}}
+        maxUsers = Tools.readConfigValue("MAX_USERS", 5000, "BULK_USERS")
+        chunkSize = max(Tools.readConfigValue("CHUNK_SIZE", 500, "BULK_USERS"), 1)
+
+        if len(users) > maxUsers:
+
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = f"Too many users: at most {maxUsers} users can be added at once."
+            self.Logger.Error(f"Too many users in bulk request: {len(users)}")
+            return retDict
+
+        try:
+
+            # Get session infos
+
+            if not await self.sessionData.IsValid(True):
+
+                retDict["ErrorInfo"]["Error"] = True
+                retDict["ErrorInfo"]["Message"] = "Session time out."
+                self.Logger.Error("User session time out.")
+                return retDict
+
+            sessionInfo = await self.sessionData.GetSessionInfo()
+            results, validIndexes = self.checkBulkUsers(sessionInfo, users)
+            retDict["Results"] = results
+
+            # Each chunk is inserted under a savepoint of the request transaction, so a failed chunk does not undo the others
+
+            executor = Tools.HashExecutor.getInstance()
+
+            for start in range(0, len(validIndexes), chunkSize):
+
+                indexes = validIndexes[start:start + chunkSize]
+                inSavepoint = False
+
+                try:
+
+                    existingUsers = await self.userTableAdapter.selectExistingUsers([users[index]["UserName"] for index in indexes], [users[index]["Email"] for index in indexes])
+                    indexes = self.dropExistingUsers(results, users, indexes, existingUsers)
+
+                    if not indexes:
+
+                        continue
+
+                    passwordHashes = await executor.hashManyAsync([users[index]["Password"] for index in indexes])
+                    await self.userTableAdapter.savepoint("bulk_users")
+                    inSavepoint = True
+                    userIds = await self.userTableAdapter.insertUsers(self.bulkUserRows(users, indexes, passwordHashes), sessionInfo[0])
+                    await self.userTableAdapter.releaseSavepoint("bulk_users")
+                    self.markInserted(results, users, indexes, userIds)
+                    retDict["Created"] += len(indexes)
+
+                except Exception as e:
+
+                    self.Logger.ShowError(e, "Failed to add a chunk of users.")
+
+                    if inSavepoint:
+
+                        await self.userTableAdapter.rollbackToSavepoint("bulk_users")
+
+                    self.markFailed(results, indexes, f"{e}")
+
+            self.Logger.Info(f"Bulk user request done: [{retDict['Created']} / {len(users)} created]")
+            return retDict
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Failed to add users.")
+            retDict["ErrorInfo"]["Error"] = True
+            retDict["ErrorInfo"]["Message"] = f"{e}"
+            return retDict
\ No newline at end of file
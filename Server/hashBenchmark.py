@@ -0,0 +1,87 @@
+import argparse
+import maplex
+import os
+import Tools
+
+# Benchmark the password hashing parameters, or calibrate the iteration count for this host
+# Usage:
+#   python hashBenchmark.py [--rounds N] [--iterations N]
+#   python hashBenchmark.py --calibrate [--latency MS] [--throughput LOGINS] [--uvicorn-workers N] [--dry-run]
+
+MIN_ITERATIONS = 10000
+
+def printResult(result: dict):
+
+    print(f"Algorithm : pbkdf2_{result['Algorithm']}")
+    print(f"Iterations: {result['Iterations']}")
+    print(f"Rounds    : {result['Rounds']}")
+    print(f"Latency   : min {result['MinMs']:.1f} ms / median {result['MedianMs']:.1f} ms / max {result['MaxMs']:.1f} ms")
+
+def hashingProcesses(uvicornWorkers: int) -> int:
+
+    # Every uvicorn worker owns a hash executor, but they share the host cores
+
+    hashWorkers = max(Tools.readConfigValue("WORKERS", 2, "PASSWORD_HASHING"), 1)
+
+    return max(min(uvicornWorkers * hashWorkers, os.cpu_count() or 1), 1)
+
+def projectedLoginsPerSecond(medianMs: float, uvicornWorkers: int) -> float:
+
+    return hashingProcesses(uvicornWorkers) * 1000 / medianMs
+
+def calibrate(targetLatency: float, targetThroughput: float, uvicornWorkers: int, rounds: int) -> int:
+
+    ''' Recommend an iteration count that meets both the latency and the throughput target '''
+
+    # Hashing time grows linearly with the iteration count, so one sample scales
+
+    sample = Tools.PasswordHasher().benchmark(rounds)
+    msPerIteration = sample["MedianMs"] / sample["Iterations"]
+
+    latencyIterations = targetLatency / msPerIteration
+    throughputIterations = hashingProcesses(uvicornWorkers) * 1000 / targetThroughput / msPerIteration
+
+    print(f"Sample    : {sample['Iterations']} iterations in {sample['MedianMs']:.1f} ms")
+    print(f"Latency target    {targetLatency:.0f} ms    -> {int(latencyIterations)} iterations")
+    print(f"Throughput target {targetThroughput:.1f} logins/s -> {int(throughputIterations)} iterations")
+
+    recommended = int(min(latencyIterations, throughputIterations)) // 1000 * 1000
+
+    if recommended < MIN_ITERATIONS:
+
+        print(f"Warning: the targets cannot be met on this host with at least {MIN_ITERATIONS} iterations.")
+        recommended = MIN_ITERATIONS
+
+    return recommended
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark or calibrate the password hashing cost.")
+    parser.add_argument("--rounds", type=int, default=5, help="Hashes per measurement")
+    parser.add_argument("--iterations", type=int, default=None, help="Benchmark this iteration count instead of the configured one")
+    parser.add_argument("--calibrate", action="store_true", help="Recommend an iteration count and write it to config.mpl")
+    parser.add_argument("--latency", type=float, default=250, help="Target hashing latency per login in milliseconds")
+    parser.add_argument("--throughput", type=float, default=20, help="Target concurrent logins per second")
+    parser.add_argument("--uvicorn-workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", 4)), help="Number of uvicorn worker processes")
+    parser.add_argument("--dry-run", action="store_true", help="Do not write the result to config.mpl")
+    args = parser.parse_args()
+
+    if args.calibrate:
+
+        iterations = calibrate(args.latency, args.throughput, args.uvicorn_workers, args.rounds)
+
+        print()
+        result = Tools.PasswordHasher(iterations=iterations).benchmark(args.rounds)
+
+        if not args.dry_run:
+
+            maplex.MapleTree("config.mpl").saveValue("ITERATIONS", str(iterations), "APPLICATION_SETTINGS", "PASSWORD_HASHING", save=True)
+            print(f"Saved ITERATIONS {iterations} to config.mpl")
+
+    else:
+
+        result = Tools.PasswordHasher(iterations=args.iterations).benchmark(args.rounds)
+
+    printResult(result)
+    print(f"Capacity  : {projectedLoginsPerSecond(result['MedianMs'], args.uvicorn_workers):.1f} logins/s "
+          f"[uvicorn workers: {args.uvicorn_workers}, hashing processes: {hashingProcesses(args.uvicorn_workers)}]")
\ No newline at end of file
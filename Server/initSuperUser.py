@@ -17,10 +17,6 @@ class InitSuperUser:
         self.superUserName = superUserName
         self.superPassWd = superPassWd
 
-        # String hasher
-
-        self.hasher = Tools.stringHasher()
-
         # Table adapter
 
         self.tableAdapter = TableAdapters.UserTableAdapters()
@@ -39,14 +35,12 @@ class InitSuperUser:
 
                 envPassword = envPasswordFile.read().strip()
 
-            hashedPassword = self.hasher.hashString(self.passWord, envUserName)
-
         except Exception as e:
 
             self.Logger.ShowError(e, "Failed to get admin informations.")
             raise
 
-        return hashedPassword == envPassword
+        return Tools.PasswordHasher.verify(self.passWord, envPassword, envUserName)
     
     def checkFirstEntry(self):
 
@@ -75,7 +69,7 @@ class InitSuperUser:
                 self.Logger.Info("Another user info already exists.")
                 return False
             
-            return self.tableAdapter.insertUser(self.superUserName, "default@default", self.superPassWd, accessLevel="super")
+            return self.tableAdapter.insertUser(self.superUserName, "default@default", self.superPassWd, accessLevel="super") is not None
             
         except Exception as e:
 
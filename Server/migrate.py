@@ -0,0 +1,197 @@
+import maplex
+import os
+import pymysql
+import re
+import sys
+import time
+import TableAdapters
+import Tools
+
+class MigrationRunner:
+
+    ''' Applies the numbered SQL files in migrations/ that are newer than the recorded schema version '''
+
+    FILE_PATTERN = re.compile(r"^(\d{4})_(\w+)\.sql$")
+    LOCK_NAME = "MobiusDB.migrations"
+
+    def __init__(self, directory: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")):
+
+        # Logging objects
+
+        self.Logger = maplex.Logger("MigrationRunner")
+
+        # Settings
+
+        self.directory = directory
+        self.connectTimeout = Tools.readConfigValue("CONNECT_TIMEOUT", 60, "MIGRATION")
+        self.lockTimeout = Tools.readConfigValue("LOCK_TIMEOUT", 60, "MIGRATION")
+
+    def migrations(self) -> list[tuple[int, str, str]]:
+
+        ''' (version, name, path) of every migration file, oldest first '''
+
+        migrationList = []
+
+        for fileName in sorted(os.listdir(self.directory)):
+
+            match = MigrationRunner.FILE_PATTERN.match(fileName)
+
+            if match is None:
+
+                continue
+
+            migrationList.append((int(match.group(1)), match.group(2), os.path.join(self.directory, fileName)))
+
+        versions = [migration[0] for migration in migrationList]
+
+        if len(versions) != len(set(versions)):
+
+            raise ValueError("Duplicate migration version numbers.")
+
+        return migrationList
+
+    @staticmethod
+    def statements(script: str) -> list[str]:
+
+        # Statements end with ";". Comment lines start with "--".
+
+        lines = [line for line in script.splitlines() if not line.strip().startswith("--")]
+
+        return [statement.strip() for statement in "\n".join(lines).split(";") if statement.strip()]
+
+    def connect(self):
+
+        # The database container may still be starting
+
+        deadline = time.monotonic() + self.connectTimeout
+
+        while True:
+
+            try:
+
+                return TableAdapters.DbConnection().connectMaintenance()
+
+            except PermissionError:
+
+                raise
+
+            except pymysql.err.OperationalError as e:
+
+                # Access denied: waiting does not help
+
+                if e.args[0] == 1045:
+
+                    raise PermissionError(f"The maintenance user cannot log in: {e.args[1]}")
+
+                if time.monotonic() > deadline:
+
+                    raise
+
+                self.Logger.Info(f"Waiting for the database: {e}")
+                time.sleep(2)
+
+            except Exception as e:
+
+                if time.monotonic() > deadline:
+
+                    raise
+
+                self.Logger.Info(f"Waiting for the database: {e}")
+                time.sleep(2)
+
+    def run(self) -> int:
+
+        ''' Apply the pending migrations. Returns the number applied. '''
+
+        connection = self.connect()
+        cursor = connection.cursor()
+        appliedCount = 0
+
+        try:
+
+            # Only one runner at a time
+
+            cursor.execute("SELECT GET_LOCK(%s, %s);", (MigrationRunner.LOCK_NAME, self.lockTimeout))
+
+            if cursor.fetchone()[0] != 1:
+
+                raise TimeoutError("Timed out waiting for the migration lock.")
+
+            cursor.execute(
+                "CREATE TABLE IF NOT EXISTS SchemaVersion ("
+                "version INT NOT NULL PRIMARY KEY, "
+                "migration_name VARCHAR(100) NOT NULL, "
+                "applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP);"
+                )
+            cursor.execute("SELECT version FROM SchemaVersion;")
+            appliedVersions = {row[0] for row in cursor.fetchall()}
+
+            for version, name, path in self.migrations():
+
+                if version in appliedVersions:
+
+                    continue
+
+                self.Logger.Info(f"Applying migration {version:04d}: {name}")
+
+                with open(path, "r") as migrationFile:
+
+                    statements = self.statements(migrationFile.read())
+
+                # DDL statements commit implicitly, so the version is recorded right after them
+
+                for statement in statements:
+
+                    cursor.execute(statement)
+
+                cursor.execute("INSERT INTO SchemaVersion (version, migration_name) VALUES (%s, %s);", (version, name))
+                connection.commit()
+                appliedCount += 1
+
+            self.Logger.Info(f"Schema is up to date. [{appliedCount} migrations applied]")
+            return appliedCount
+
+        except Exception as e:
+
+            self.Logger.ShowError(e, "Migration failed.")
+            connection.rollback()
+            raise
+
+        finally:
+
+            try:
+
+                cursor.execute("SELECT RELEASE_LOCK(%s);", (MigrationRunner.LOCK_NAME,))
+
+            except Exception as e:
+
+                self.Logger.Warn(f"Failed to release the migration lock: {e}")
+
+            cursor.close()
+            connection.close()
+
+if __name__ == "__main__":
+
+    Logger = maplex.Logger("migrate")
+
+    if TableAdapters.DbConnection().readMaintenanceCredentials() is None:
+
+        # The code needs the latest schema, so a skipped migration must not look like success
+
+        Logger.Error("DB_MAINTENANCE_USER / DB_MAINTENANCE_PASSWORD are not set. Migrations cannot run.")
+        sys.exit(1)
+
+    try:
+
+        MigrationRunner().run()
+
+    except PermissionError as e:
+
+        # Data volumes created before the maintenance user existed do not have it
+
+        Logger.Error(f"{e} Run DB_init/grantMaintenanceUser.sh once against the database (see README.md).")
+        sys.exit(1)
+
+    except Exception:
+
+        sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,3 @@
+-- Every authenticated request looks its session up by session_uuid
+
+CREATE UNIQUE INDEX uq_session_uuid ON SessionInfo (session_uuid);
\ No newline at end of file
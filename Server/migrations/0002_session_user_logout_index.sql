@@ -0,0 +1,3 @@
+-- Live session checks per user (login, user listings)
+
+CREATE INDEX idx_session_user_logout ON SessionInfo (user_id, logout_datetime);
\ No newline at end of file
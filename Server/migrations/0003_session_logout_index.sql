@@ -0,0 +1,3 @@
+-- Sessions ended since a given time (revocation list refresh, touch flush)
+
+CREATE INDEX idx_session_logout ON SessionInfo (logout_datetime);
\ No newline at end of file
@@ -0,0 +1,3 @@
+-- User listings filter on company, access level and status
+
+CREATE INDEX idx_user_company_level_status ON Users (company_id, access_level, user_status);
\ No newline at end of file
@@ -0,0 +1,46 @@
+-- Store session_uuid as BINARY(16) with the time fields first (UUID_TO_BIN swap flag),
+-- so new sessions are appended to the end of the unique index instead of landing at random pages.
+-- DDL commits implicitly, so a failed run can stop between steps. Each step checks information_schema
+-- and is skipped once it is done, so the migration can simply be run again.
+
+-- Add the binary key next to the text key
+
+SET @migrationStep = IF((SELECT COUNT(*) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'SessionInfo' AND COLUMN_NAME = 'session_key') = 0 AND (SELECT COUNT(*) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'SessionInfo' AND COLUMN_NAME = 'session_uuid' AND DATA_TYPE = 'varchar') = 1, 'ALTER TABLE SessionInfo ADD COLUMN session_key BINARY(16) NULL AFTER session_id', 'DO 0');
+PREPARE migrationStep FROM @migrationStep;
+EXECUTE migrationStep;
+DEALLOCATE PREPARE migrationStep;
+
+-- Fill it (rows filled by an earlier run are kept)
+
+SET @migrationStep = IF((SELECT COUNT(*) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'SessionInfo' AND COLUMN_NAME = 'session_key') = 1 AND (SELECT COUNT(*) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'SessionInfo' AND COLUMN_NAME = 'session_uuid' AND DATA_TYPE = 'varchar') = 1, 'UPDATE SessionInfo SET session_key = UUID_TO_BIN(session_uuid, 1) WHERE session_key IS NULL', 'DO 0');
+PREPARE migrationStep FROM @migrationStep;
+EXECUTE migrationStep;
+DEALLOCATE PREPARE migrationStep;
+
+-- Drop the text key together with its index
+
+SET @migrationStep = IF((SELECT COUNT(*) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'SessionInfo' AND COLUMN_NAME = 'session_key') = 1 AND (SELECT COUNT(*) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'SessionInfo' AND COLUMN_NAME = 'session_uuid' AND DATA_TYPE = 'varchar') = 1, 'ALTER TABLE SessionInfo DROP COLUMN session_uuid', 'DO 0');
+PREPARE migrationStep FROM @migrationStep;
+EXECUTE migrationStep;
+DEALLOCATE PREPARE migrationStep;
+
+-- Give the binary key the old name
+
+SET @migrationStep = IF((SELECT COUNT(*) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'SessionInfo' AND COLUMN_NAME = 'session_key') = 1 AND (SELECT COUNT(*) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'SessionInfo' AND COLUMN_NAME = 'session_uuid') = 0, 'ALTER TABLE SessionInfo RENAME COLUMN session_key TO session_uuid', 'DO 0');
+PREPARE migrationStep FROM @migrationStep;
+EXECUTE migrationStep;
+DEALLOCATE PREPARE migrationStep;
+
+-- Set its final definition (the same definition again is a no-op)
+
+SET @migrationStep = IF((SELECT COUNT(*) FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'SessionInfo' AND COLUMN_NAME = 'session_uuid' AND DATA_TYPE = 'binary') = 1, 'ALTER TABLE SessionInfo MODIFY session_uuid BINARY(16) NOT NULL DEFAULT (UUID_TO_BIN(UUID(), 1))', 'DO 0');
+PREPARE migrationStep FROM @migrationStep;
+EXECUTE migrationStep;
+DEALLOCATE PREPARE migrationStep;
+
+-- Index it again
+
+SET @migrationStep = IF((SELECT COUNT(*) FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'SessionInfo' AND INDEX_NAME = 'uq_session_uuid') = 0, 'CREATE UNIQUE INDEX uq_session_uuid ON SessionInfo (session_uuid)', 'DO 0');
+PREPARE migrationStep FROM @migrationStep;
+EXECUTE migrationStep;
+DEALLOCATE PREPARE migrationStep;
\ No newline at end of file
@@ -0,0 +1,21 @@
+-- Expired sessions are moved here by SessionArchive.py. Monthly partitions are added by the
+-- archive job by splitting p_future, and expired months are dropped as a whole.
+-- Partitioned tables cannot have foreign keys, and every unique key must contain logout_datetime.
+
+CREATE TABLE IF NOT EXISTS SessionInfoHistory (
+    session_id BIGINT NOT NULL,
+    session_uuid BINARY(16) NOT NULL,
+    user_id INT,
+    user_name VARCHAR(50) NOT NULL,
+    company_id INT,
+    access_level ENUM('super', 'admin', 'user', 'guest') NOT NULL,
+    login_datetime DATETIME NOT NULL,
+    logout_datetime DATETIME NOT NULL,
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (session_id, logout_datetime),
+    INDEX idx_session_history_uuid (session_uuid),
+    INDEX idx_session_history_user (user_id, logout_datetime)
+)
+PARTITION BY RANGE COLUMNS (logout_datetime) (
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
\ No newline at end of file
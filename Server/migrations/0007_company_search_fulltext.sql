@@ -0,0 +1,26 @@
+-- Company search looks terms up in n-gram FULLTEXT indexes instead of scanning with LIKE '%term%'.
+-- Stopwords are kept, otherwise n-grams such as "at" or "in" would never be indexed.
+-- Each index commits on its own, so each one is skipped once it exists and a failed run can simply be run again.
+
+SET SESSION innodb_ft_enable_stopword=OFF;
+
+-- Company name
+
+SET @migrationStep = IF((SELECT COUNT(*) FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'ContractCompanies' AND INDEX_NAME = 'ft_company_name') = 0, 'CREATE FULLTEXT INDEX ft_company_name ON ContractCompanies (company_name) WITH PARSER ngram', 'DO 0');
+PREPARE migrationStep FROM @migrationStep;
+EXECUTE migrationStep;
+DEALLOCATE PREPARE migrationStep;
+
+-- Company address
+
+SET @migrationStep = IF((SELECT COUNT(*) FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'ContractCompanies' AND INDEX_NAME = 'ft_company_address') = 0, 'CREATE FULLTEXT INDEX ft_company_address ON ContractCompanies (company_address) WITH PARSER ngram', 'DO 0');
+PREPARE migrationStep FROM @migrationStep;
+EXECUTE migrationStep;
+DEALLOCATE PREPARE migrationStep;
+
+-- Company email
+
+SET @migrationStep = IF((SELECT COUNT(*) FROM information_schema.STATISTICS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'ContractCompanies' AND INDEX_NAME = 'ft_company_email') = 0, 'CREATE FULLTEXT INDEX ft_company_email ON ContractCompanies (company_email) WITH PARSER ngram', 'DO 0');
+PREPARE migrationStep FROM @migrationStep;
+EXECUTE migrationStep;
+DEALLOCATE PREPARE migrationStep;
\ No newline at end of file
@@ -0,0 +1,152 @@
+import argparse
+import random
+import statistics
+import TableAdapters
+import time
+import uuid
+
+# Compare the VARCHAR(36) and the time-ordered BINARY(16) session key layouts on scratch tables
+# Usage:
+#   python sessionKeyBenchmark.py [--rows N] [--batch N] [--lookups N] [--keep]
+
+LAYOUTS = {
+    "text": ("VARCHAR(36)", str),
+    "binary": ("BINARY(16)", lambda sessionId: TableAdapters.SessionInfoTableAdapters.toSessionKey(str(sessionId)))
+}
+
+def tableName(layout: str) -> str:
+
+    return f"SessionKeyBenchmark_{layout}"
+
+def createTable(cursor, layout: str):
+
+    columnType = LAYOUTS[layout][0]
+
+    cursor.execute(f"DROP TABLE IF EXISTS {tableName(layout)};")
+    cursor.execute(
+        f"CREATE TABLE {tableName(layout)} ("
+        f"session_id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY, "
+        f"session_uuid {columnType} NOT NULL, "
+        f"user_id INT NOT NULL, "
+        f"logout_datetime TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+        f"UNIQUE INDEX uq_session_uuid (session_uuid));"
+        )
+
+def insertRows(connection, layout: str, rows: int, batchSize: int, sampleSize: int) -> tuple[float, list[str]]:
+
+    ''' Insert the rows in batches. Returns (rows per second, a sample of the inserted session IDs). '''
+
+    convert = LAYOUTS[layout][1]
+    sql = f"INSERT INTO {tableName(layout)} (session_uuid, user_id) VALUES (%s, %s);"
+    sampleEvery = max(rows // max(sampleSize, 1), 1)
+    sample = []
+    elapsed = 0.0
+
+    with connection.cursor() as cursor:
+
+        for offset in range(0, rows, batchSize):
+
+            # The login path generates version 1 UUIDs (MySQL UUID())
+
+            sessionIds = [uuid.uuid1() for _ in range(min(batchSize, rows - offset))]
+            sample.extend(str(sessionId) for i, sessionId in enumerate(sessionIds, offset) if i % sampleEvery == 0)
+            values = [(convert(sessionId), random.randint(1, 10000)) for sessionId in sessionIds]
+
+            start = time.perf_counter()
+            cursor.executemany(sql, values)
+            connection.commit()
+            elapsed += time.perf_counter() - start
+
+            if (offset // batchSize) % 100 == 0:
+
+                print(f"  {layout}: {offset + len(values)} / {rows} rows")
+
+    return rows / elapsed, sample
+
+def lookupLatency(connection, layout: str, sessionIds: list[str]) -> dict:
+
+    convert = LAYOUTS[layout][1]
+    sql = f"SELECT user_id, logout_datetime FROM {tableName(layout)} WHERE session_uuid=%s;"
+    latencies = []
+
+    with connection.cursor() as cursor:
+
+        for sessionId in random.sample(sessionIds, len(sessionIds)):
+
+            start = time.perf_counter()
+            cursor.execute(sql, (convert(sessionId),))
+            cursor.fetchall()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+
+    return {
+        "MedianMs": statistics.median(latencies),
+        "P99Ms": latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)],
+        "MaxMs": latencies[-1]
+    }
+
+def tableSize(cursor, layout: str) -> tuple[int, int]:
+
+    # (data bytes, index bytes) as reported by InnoDB
+
+    cursor.execute(f"ANALYZE TABLE {tableName(layout)};")
+    cursor.fetchall()
+    cursor.execute(
+        "SELECT data_length, index_length FROM information_schema.TABLES WHERE table_schema=DATABASE() AND table_name=%s;",
+        (tableName(layout),)
+        )
+
+    return cursor.fetchone()
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark the session key column layouts.")
+    parser.add_argument("--rows", type=int, default=10000000, help="Session rows per table")
+    parser.add_argument("--batch", type=int, default=5000, help="Rows per insert batch")
+    parser.add_argument("--lookups", type=int, default=10000, help="Random lookups per table")
+    parser.add_argument("--keep", action="store_true", help="Do not drop the scratch tables afterwards")
+    args = parser.parse_args()
+
+    # Scratch tables need DDL rights
+
+    connection = TableAdapters.DbConnection().connectMaintenance()
+    results = {}
+
+    try:
+
+        for layout in LAYOUTS:
+
+            with connection.cursor() as cursor:
+
+                createTable(cursor, layout)
+
+            print(f"Inserting {args.rows} rows into {tableName(layout)}")
+            insertRate, sample = insertRows(connection, layout, args.rows, args.batch, args.lookups)
+            latency = lookupLatency(connection, layout, sample)
+
+            with connection.cursor() as cursor:
+
+                dataBytes, indexBytes = tableSize(cursor, layout)
+
+            results[layout] = (insertRate, latency, dataBytes, indexBytes)
+
+    finally:
+
+        if not args.keep:
+
+            with connection.cursor() as cursor:
+
+                for layout in LAYOUTS:
+
+                    cursor.execute(f"DROP TABLE IF EXISTS {tableName(layout)};")
+
+        connection.close()
+
+    print()
+
+    for layout, (insertRate, latency, dataBytes, indexBytes) in results.items():
+
+        print(f"{layout:<7}: {LAYOUTS[layout][0]:<11} insert {insertRate:,.0f} rows/s, "
+              f"lookup median {latency['MedianMs']:.2f} ms / p99 {latency['P99Ms']:.2f} ms / max {latency['MaxMs']:.2f} ms, "
+              f"data {dataBytes / 1048576:,.0f} MiB, index {indexBytes / 1048576:,.0f} MiB")
\ No newline at end of file